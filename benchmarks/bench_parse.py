@@ -0,0 +1,145 @@
+"""Benchmark of parsing markdown files and checks of internal links on a synthetic corpus.
+
+Each phase is timed separately, then executed again under tracemalloc to measure peak memory,
+so tracing overhead does not affect the timings. Results are saved as JSON to compare two commits:
+
+    python benchmarks/bench_parse.py --files 10000 --output base.json
+    python benchmarks/bench_parse.py --files 10000 --output new.json --compare base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from corpus import CorpusGenerator
+from corpus import CorpusSpec
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.link_checker import check_path_links
+from md_dead_link_check.preprocess import Engine
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.preprocess import find_all_markdowns
+from md_dead_link_check.preprocess import process_header_to_fragment
+from md_dead_link_check.preprocess import process_md_file
+from md_dead_link_check.preprocess import process_md_files
+
+
+def measure(func: Callable[[], Any], memory: bool) -> tuple[Any, dict[str, float]]:
+    gc.collect()
+    start = time.perf_counter()
+    ret = func()
+    result = {"time": time.perf_counter() - start}
+    if memory:
+        del ret
+        gc.collect()
+        tracemalloc.start()
+        ret = func()
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return ret, result
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    spec = CorpusSpec(num_files=args.files, depth=args.depth, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root_dir = Path(tmp_dir)
+        start = time.perf_counter()
+        all_files = CorpusGenerator(spec).write(root_dir)
+        generation_time = time.perf_counter() - start
+        num_lines = sum(len((root_dir / f).read_bytes().splitlines()) for f in all_files)
+
+        phases: dict[str, dict[str, float]] = {}
+        md_files, phases["find_all_markdowns"] = measure(lambda: find_all_markdowns(all_files), args.memory)
+        files_in_repo, phases["repo_files"] = measure(lambda: RepoFiles(all_files), args.memory)
+
+        def parse(engine: Engine) -> dict[str, Any]:
+            process_header_to_fragment.cache_clear()
+            return {f.as_posix(): process_md_file(f, root_dir, engine) for f in md_files}
+
+        _, phases["parse_regex"] = measure(lambda: parse(Engine.REGEX), args.memory)
+        md_data, phases["parse_scanner"] = measure(lambda: parse(Engine.SCANNER), args.memory)
+        if args.jobs != 1:
+            # Memory of worker processes is not traced
+            _, phases["parse_parallel"] = measure(lambda: process_md_files(md_files, root_dir, args.jobs), False)
+        config = Config(check_web_links=False)
+        path_status, phases["check_path_links"] = measure(
+            lambda: check_path_links(md_data, root_dir, config, files_in_repo), args.memory
+        )
+
+    for name in ("parse_regex", "parse_scanner", "parse_parallel"):
+        if name in phases:
+            phases[name]["files_per_second"] = len(md_files) / phases[name]["time"]
+            phases[name]["lines_per_second"] = num_lines / phases[name]["time"]
+    phases["check_path_links"]["links_per_second"] = len(path_status) / phases["check_path_links"]["time"]
+
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "files": len(md_files),
+            "lines": num_lines,
+            "links": len(path_status),
+            "seed": args.seed,
+            "generation_time": generation_time,
+        },
+        "phases": phases,
+    }
+
+
+def print_results(results: dict[str, Any], base: dict[str, Any] | None) -> None:
+    meta = results["meta"]
+    print(f"Files: {meta['files']}, lines: {meta['lines']}, internal links: {meta['links']}")
+    print(f"{'Phase':<20} {'Time, s':>10} {'Peak, MiB':>10} {'Base, s':>10} {'Ratio':>8}")
+    for name, phase in results["phases"].items():
+        peak = f"{phase['peak_memory'] / 2**20:.1f}" if "peak_memory" in phase else "-"
+        line = f"{name:<20} {phase['time']:>10.3f} {peak:>10}"
+        if base is not None and name in base["phases"]:
+            base_time = base["phases"][name]["time"]
+            line += f" {base_time:>10.3f} {phase['time'] / base_time:>8.2f}"
+        print(line)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of parsing and internal link checks.")
+    parser.add_argument("--files", type=int, default=CorpusSpec.num_files, help="Number of generated markdown files.")
+    parser.add_argument("--depth", type=int, default=CorpusSpec.depth, help="Maximum depth of directories.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the corpus generator.")
+    parser.add_argument("--jobs", "-j", type=int, default=0, help="Processes for parallel parsing, 1 to skip.")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="Do not measure peak memory.")
+    parser.add_argument("--output", "-o", type=Path, help="Path to save results in JSON format.")
+    parser.add_argument("--compare", type=Path, help="Results of the previous run to compare with.")
+    args = parser.parse_args()
+
+    base = json.loads(args.compare.read_text()) if args.compare else None
+    if base is not None and base["meta"]["files"] != args.files:
+        print(f"Warning: base results were measured on {base['meta']['files']} files", file=sys.stderr)
+
+    results = run(args)
+    print_results(results, base)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+"""Benchmark of web link checks against simulated servers from `web_server.py`.
+
+Servers run in a separate process, so they do not compete with checks for the event loop.
+Reports throughput of checks, statuses of links and, for every host, number of requests,
+peak number of concurrent requests and number of 429 responses:
+
+    python benchmarks/bench_web.py --links 5000 --hosts 20 --rate-limited-hosts 2 --output web.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
+import urllib.request
+from collections import Counter
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any
+
+from web_server import LATENCY_DISTRIBUTIONS
+from web_server import HostSpec
+from web_server import SimulatedServer
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.link_checker import LinkRequest
+from md_dead_link_check.link_checker import async_check_links
+from md_dead_link_check.link_checker import run_async
+
+# Relative frequency of kinds of links in the corpus
+LINK_KINDS = {
+    "ok": 70,
+    "nohead": 8,
+    "head405": 2,
+    "redirect": 8,
+    "missing": 6,
+    "big": 3,
+    "slow": 3,
+}
+
+
+def serve(specs: list[HostSpec], seed: int, conn: Connection) -> None:
+    async def run() -> None:
+        server = SimulatedServer(specs, seed)
+        conn.send(await server.start())
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+def generate_links(ports: list[int], num_links: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    kinds = rng.choices(list(LINK_KINDS), weights=list(LINK_KINDS.values()), k=num_links)
+    links = []
+    for idx, kind in enumerate(kinds):
+        port = ports[idx % len(ports)]
+        path = f"redirect/{rng.randint(1, 3)}/{idx}" if kind == "redirect" else f"{kind}/{idx}"
+        links.append(f"http://127.0.0.1:{port}/{path}")
+    return links
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    specs = [
+        HostSpec(
+            latency=args.latency,
+            latency_ms=args.latency_ms,
+            rate_limit=args.rate_limit if idx < args.rate_limited_hosts else 0,
+            error_ratio=args.error_ratio,
+            hang=args.hang,
+        )
+        for idx in range(args.hosts)
+    ]
+    parent_conn, child_conn = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(specs, args.seed, child_conn), daemon=True)
+    process.start()
+    try:
+        ports: list[int] = parent_conn.recv()
+        links = generate_links(ports, args.links, args.seed)
+        config = Config(
+            timeout=args.timeout,
+            throttle_groups=args.throttle_groups,
+            throttle_delay=args.throttle_delay,
+            throttle_max_delay=args.throttle_max_delay,
+            throttle_max_concurrency=args.throttle_max_concurrency,
+            retry_budget=args.retry_budget,
+        )
+
+        start = time.perf_counter()
+        statuses = run_async(async_check_links([LinkRequest(link) for link in links], config), config)
+        total_time = time.perf_counter() - start
+
+        # Servers are not affected by proxy settings of the environment
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+        with opener.open(f"http://127.0.0.1:{ports[0]}/__stats") as response:
+            hosts = json.loads(response.read())
+    finally:
+        process.terminate()
+        process.join()
+
+    return {
+        "meta": {
+            "links": len(links),
+            "hosts": args.hosts,
+            "rate_limited_hosts": args.rate_limited_hosts,
+            "latency": args.latency,
+            "latency_ms": args.latency_ms,
+            "seed": args.seed,
+        },
+        "total_time": total_time,
+        "links_per_second": len(links) / total_time,
+        "statuses": dict(Counter(s.status.name for s in statuses)),
+        "messages": dict(Counter(s.msg for s in statuses if s.msg).most_common(10)),
+        "hosts": hosts,
+    }
+
+
+def print_results(results: dict[str, Any]) -> None:
+    print(f"Links: {results['meta']['links']}, hosts: {results['meta']['hosts']}")
+    print(f"Total time: {results['total_time']:.2f} s, {results['links_per_second']:.1f} links/s")
+    print(f"Statuses: {results['statuses']}")
+    for msg, count in results["messages"].items():
+        print(f"  {count:>6} {msg}")
+    print(f"{'Port':<8} {'Requests':>9} {'HEAD':>7} {'Peak conc.':>11} {'429':>6}")
+    for port, host in results["hosts"].items():
+        print(
+            f"{port:<8} {host['requests']:>9} {host['head_requests']:>7} {host['peak_in_flight']:>11} "
+            f"{host['responses'].get('429', 0):>6}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark of web link checks on simulated servers.")
+    parser.add_argument("--links", type=int, default=2000, help="Number of links to check.")
+    parser.add_argument("--hosts", type=int, default=10, help="Number of simulated hosts.")
+    parser.add_argument("--rate-limited-hosts", type=int, default=1, help="Number of hosts with rate limit.")
+    parser.add_argument("--rate-limit", type=float, default=20, help="Requests per second of rate limited hosts.")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Mean latency of responses.")
+    parser.add_argument("--error-ratio", type=float, default=0.0, help="Part of responses that fail with 503.")
+    parser.add_argument("--hang", type=float, default=30, help="Delay of slow responses in seconds.")
+    parser.add_argument("--timeout", type=int, default=5, help="Timeout of requests, `timeout` option.")
+    parser.add_argument("--throttle-groups", type=int, default=Config.throttle_groups)
+    parser.add_argument("--throttle-delay", type=float, default=Config.throttle_delay)
+    parser.add_argument("--throttle-max-delay", type=float, default=Config.throttle_max_delay)
+    parser.add_argument("--throttle-max-concurrency", type=int, default=Config.throttle_max_concurrency)
+    parser.add_argument("--retry-budget", type=int, default=Config.retry_budget)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", type=Path, help="Path to save results in JSON format.")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
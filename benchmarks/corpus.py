@@ -0,0 +1,154 @@
+"""Generator of synthetic markdown repositories for benchmarks.
+
+Generated files contain typical content of documentation: nested headers, long changelogs
+with repeated headers, link-dense tables, code blocks, images and html anchors.
+Internal links point to other generated files and their headers, a small part of them is broken.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+WORDS = [
+    "install", "config", "release", "parser", "network", "cache", "module", "option", "server", "client",
+    "request", "header", "anchor", "example", "guide", "reference", "migration", "support", "build", "test",
+]  # fmt: skip
+
+
+@dataclass
+class CorpusSpec:
+    # Number of markdown files
+    num_files: int = 1000
+    # Maximum depth of the directory tree
+    depth: int = 6
+    # Number of subdirectories in each directory
+    fanout: int = 8
+    # Part of files that are changelogs with repeated headers
+    changelog_ratio: float = 0.02
+    # Number of releases in a changelog
+    changelog_releases: int = 100
+    # Number of rows in a table of links
+    table_rows: int = 30
+    # Number of sections in a regular file
+    sections: int = 8
+    # Part of internal links that are broken
+    broken_ratio: float = 0.02
+    # Number of distinct web domains
+    num_domains: int = 50
+    seed: int = 0
+
+
+def file_paths(spec: CorpusSpec) -> list[str]:
+    """Returns relative paths of files, spread over a tree of directories."""
+    rng = random.Random(spec.seed)
+    paths = []
+    for idx in range(spec.num_files):
+        depth = rng.randint(0, spec.depth)
+        parts = [f"d{rng.randrange(spec.fanout)}" for _ in range(depth)]
+        name = "CHANGELOG" if rng.random() < spec.changelog_ratio else f"{rng.choice(WORDS)}_{idx}"
+        paths.append("/".join([*parts, f"{name}_{idx}.md" if name == "CHANGELOG" else f"{name}.md"]))
+    return paths
+
+
+def section_title(idx: int) -> str:
+    return f"Section {idx} {WORDS[idx % len(WORDS)]}"
+
+
+def relative_link(src: str, dst: str) -> str:
+    src_parts = src.split("/")[:-1]
+    dst_parts = dst.split("/")
+    common = 0
+    while common < min(len(src_parts), len(dst_parts) - 1) and src_parts[common] == dst_parts[common]:
+        common += 1
+    return "/".join([".."] * (len(src_parts) - common) + dst_parts[common:])
+
+
+class CorpusGenerator:
+    def __init__(self, spec: CorpusSpec) -> None:
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.paths = file_paths(spec)
+
+    def internal_link(self, src: str) -> str:
+        dst = self.rng.choice(self.paths)
+        link = relative_link(src, dst) if dst != src else ""
+        if self.rng.random() < self.spec.broken_ratio:
+            return f"{link or dst}.missing"
+        if self.rng.random() < 0.5:
+            if Path(dst).name.startswith("CHANGELOG"):
+                release = self.rng.randrange(self.spec.changelog_releases)
+                fragment = f"fixed-{release}" if release else "fixed"
+            else:
+                fragment = section_title(self.rng.randrange(self.spec.sections)).lower().replace(" ", "-")
+            return f"{link}#{fragment}"
+        return link or "#"
+
+    def web_link(self) -> str:
+        domain = self.rng.randrange(self.spec.num_domains)
+        return f"https://host{domain}.example.com/{self.rng.choice(WORDS)}/{self.rng.randrange(1000)}"
+
+    def table(self, src: str) -> list[str]:
+        header = ["| Name | Document | Web | Image |", "| --- | --- | --- | --- |"]
+        return header + [
+            f"| {WORDS[row % len(WORDS)]} | [doc]({self.internal_link(src)}) | [web]({self.web_link()}) "
+            f"| ![img]({self.web_link()}.png) |"
+            for row in range(self.spec.table_rows)
+        ]
+
+    def regular_file(self, src: str) -> str:
+        lines = [f"# {src}", ""]
+        for idx in range(self.spec.sections):
+            lines += [f"## {section_title(idx)}", ""]
+            lines.append(
+                f"Text with [inline link]({self.internal_link(src)}), bare url {self.web_link()} "
+                f'and <a href="{self.web_link()}">html link</a>.'
+            )
+            lines.append(f'<a id="anchor-{idx}"></a>')
+            if idx % 3 == 0:
+                lines += ["```python", f'url = "{self.web_link()}"', "# [not a link](missing.md)", "```"]
+            if idx == 1:
+                lines += self.table(src)
+            lines.append("")
+        return "\n".join(lines)
+
+    def changelog(self, src: str) -> str:
+        lines = ["# Changelog", ""]
+        for release in range(self.spec.changelog_releases, 0, -1):
+            lines += [f"## 1.{release}.0", ""]
+            for kind in ("Added", "Fixed", "Changed"):
+                # Repeated headers get numbered fragments: #added, #added-1, ...
+                lines += [f"### {kind}", ""]
+                lines.append(f"- Fix [issue]({self.web_link()}) in [docs]({self.internal_link(src)})")
+                lines.append("")
+        return "\n".join(lines)
+
+    def content(self, src: str) -> str:
+        if Path(src).name.startswith("CHANGELOG"):
+            return self.changelog(src)
+        return self.regular_file(src)
+
+    def write(self, root_dir: Path) -> list[str]:
+        """Write the corpus to the directory, returns relative paths of the files."""
+        for src in self.paths:
+            path = root_dir / src
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(self.content(src), encoding="utf-8")
+        return self.paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic markdown repository.")
+    parser.add_argument("output", type=Path, help="Directory to write files.")
+    parser.add_argument("--files", type=int, default=CorpusSpec.num_files, help="Number of markdown files.")
+    parser.add_argument("--depth", type=int, default=CorpusSpec.depth, help="Maximum depth of directories.")
+    parser.add_argument("--seed", type=int, default=CorpusSpec.seed)
+    args = parser.parse_args()
+    paths = CorpusGenerator(CorpusSpec(num_files=args.files, depth=args.depth, seed=args.seed)).write(args.output)
+    print(f"Generated {len(paths)} files in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Local stand-in for web servers to benchmark checks of web links without the internet.
+
+Every virtual host listens on its own port of 127.0.0.1, so hosts are different domains for the throttler.
+Behavior of a request is selected by the first part of the path:
+
+- /ok/<id>: 200
+- /nohead/<id>: 404 on HEAD request, 200 on GET
+- /head405/<id>: 405 on HEAD request, 200 on GET
+- /redirect/<n>/<id>: chain of n redirects to /ok/<id>
+- /missing/<id>: 404
+- /slow/<id>: response after `hang` seconds
+- /big/<id>: 200 with large body
+
+Every response is delayed by the latency of the host. Hosts with `rate_limit` return 429 with
+Retry-After header if requests exceed the rate. Statistics of hosts are available at /__stats.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+
+from aiohttp import web
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+BIG_BODY = b"x" * (5 * 1024 * 1024)
+
+
+@dataclass
+class HostSpec:
+    # Distribution of latency: fixed, uniform, exponential or lognormal
+    latency: str = "lognormal"
+    # Mean latency in milliseconds
+    latency_ms: float = 50
+    # Allowed requests per second, 0 means no limit
+    rate_limit: float = 0
+    # Number of requests allowed without limit
+    burst: int = 10
+    # Value of Retry-After header of 429 responses
+    retry_after: int = 1
+    # Part of requests that fail with 503
+    error_ratio: float = 0.0
+    # Delay of /slow responses in seconds
+    hang: float = 30
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    head_requests: int = 0
+    responses: dict[str, int] = field(default_factory=lambda: {})
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+
+class SimulatedHost:
+    def __init__(self, spec: HostSpec, seed: int) -> None:
+        self.spec = spec
+        self.rng = random.Random(seed)
+        self.stats = HostStats()
+        self._tokens = float(spec.burst)
+        self._last = time.monotonic()
+
+    def latency(self) -> float:
+        mean = self.spec.latency_ms / 1000
+        if self.spec.latency == "fixed":
+            return mean
+        if self.spec.latency == "uniform":
+            return self.rng.uniform(0, 2 * mean)
+        if self.spec.latency == "exponential":
+            return self.rng.expovariate(1 / mean) if mean else 0
+        # Lognormal with median equal to the mean latency and long tail
+        return self.rng.lognormvariate(math.log(mean), 0.8) if mean else 0
+
+    def limited(self) -> bool:
+        if not self.spec.rate_limit:
+            return False
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._last) * self.spec.rate_limit, self.spec.burst)
+        self._last = now
+        if self._tokens < 1:
+            return True
+        self._tokens -= 1
+        return False
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        stats = self.stats
+        stats.requests += 1
+        stats.head_requests += request.method == "HEAD"
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            response = await self.respond(request)
+        finally:
+            stats.in_flight -= 1
+        stats.responses[str(response.status)] = stats.responses.get(str(response.status), 0) + 1
+        return response
+
+    async def respond(self, request: web.Request) -> web.StreamResponse:
+        if self.limited():
+            return web.Response(status=429, headers={"Retry-After": str(self.spec.retry_after)})
+        await asyncio.sleep(self.latency())
+        if self.rng.random() < self.spec.error_ratio:
+            return web.Response(status=503)
+
+        parts = request.path.strip("/").split("/")
+        kind = parts[0]
+        if kind == "ok":
+            return web.Response(text="ok")
+        if kind == "nohead":
+            return web.Response(status=404) if request.method == "HEAD" else web.Response(text="ok")
+        if kind == "head405":
+            return web.Response(status=405) if request.method == "HEAD" else web.Response(text="ok")
+        if kind == "redirect":
+            num = int(parts[1])
+            location = f"/redirect/{num - 1}/{parts[2]}" if num > 1 else f"/ok/{parts[2]}"
+            raise web.HTTPFound(location)
+        if kind == "slow":
+            await asyncio.sleep(self.spec.hang)
+            return web.Response(text="ok")
+        if kind == "big":
+            return web.Response(body=b"" if request.method == "HEAD" else BIG_BODY)
+        return web.Response(status=404)
+
+
+class SimulatedServer:
+    def __init__(self, specs: list[HostSpec], seed: int = 0) -> None:
+        self.hosts = [SimulatedHost(spec, seed + idx) for idx, spec in enumerate(specs)]
+        self.runners: list[web.AppRunner] = []
+        self.ports: list[int] = []
+
+    def stats(self) -> dict[str, Any]:
+        return {str(port): asdict(host.stats) for port, host in zip(self.ports, self.hosts, strict=True)}
+
+    async def start(self) -> list[int]:
+        for host in self.hosts:
+            app = web.Application()
+            app.router.add_get("/__stats", self.handle_stats)
+            app.router.add_route("*", "/{tail:.*}", host.handle)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, "127.0.0.1", 0, backlog=1024).start()
+            self.runners.append(runner)
+            self.ports.append(runner.addresses[0][1])
+        return self.ports
+
+    async def stop(self) -> None:
+        for runner in self.runners:
+            await runner.cleanup()
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run simulated web servers.")
+    parser.add_argument("--hosts", type=int, default=4, help="Number of virtual hosts.")
+    parser.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default=HostSpec.latency)
+    parser.add_argument("--latency-ms", type=float, default=HostSpec.latency_ms)
+    parser.add_argument("--rate-limit", type=float, default=0, help="Allowed requests per second of each host.")
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        spec = HostSpec(latency=args.latency, latency_ms=args.latency_ms, rate_limit=args.rate_limit)
+        server = SimulatedServer([spec] * args.hosts)
+        ports = await server.start()
+        print(json.dumps({"ports": ports}), flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
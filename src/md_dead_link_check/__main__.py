@@ -1,13 +1,25 @@
+import sys
 from argparse import ArgumentParser
 from argparse import Namespace
 from argparse import RawTextHelpFormatter
+from contextlib import ExitStack
+from contextlib import redirect_stdout
 from pathlib import Path
 
 from md_dead_link_check.config import get_config
+from md_dead_link_check.diff import select_changed_links
+from md_dead_link_check.helpers import REPORTERS
 from md_dead_link_check.helpers import normalize_files
-from md_dead_link_check.helpers import summary
 from md_dead_link_check.link_checker import check_all_links
+from md_dead_link_check.link_checker import report_all_links
+from md_dead_link_check.listing import Backend
+from md_dead_link_check.listing import find_git_root
+from md_dead_link_check.preprocess import find_links_to
 from md_dead_link_check.preprocess import preprocess_repository
+from md_dead_link_check.preprocess import update_link_index
+from md_dead_link_check.stats import STATS
+from md_dead_link_check.watch import WatchSession
+from md_dead_link_check.watch import watch_links
 
 
 def args_parser() -> Namespace:
@@ -38,22 +50,185 @@ def args_parser() -> Namespace:
     parser.add_argument("--warn", "-w", action="store_true", help="Show warning messages.")
     parser.add_argument("--all", "-a", action="store_true", help="Show all links.")
     parser.add_argument("--no-color", "-nc", action="store_true", help="Disable coloring of output.")
+    parser.add_argument(
+        "--sort",
+        action="store_true",
+        help=(
+            "Print results sorted by status and location after all checks."
+            "\nBy default results are printed as soon as they are known."
+        ),
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop all checks on the first error in internal links.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(REPORTERS),
+        default="text",
+        help=(
+            "Format of results. Machine-readable formats are written as soon as results are known,"
+            "\nother messages are printed to stderr if results are written to stdout."
+        ),
+    )
+    parser.add_argument("--output", "-o", type=Path, help="Path to the file to write results, default: stdout.")
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=(
+            "Keep running and check links again on changes of markdown files."
+            "\nOnly changed files are parsed, web links are checked only if they are new."
+            "\nCan not be used with --since, --format, --output and --sort."
+        ),
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print time of phases, parsing throughput and latency of web requests per domain.",
+    )
     parser.add_argument("--untrack", action="store_true", help="Check untracked files.")
-    return parser.parse_args()
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help=(
+            "Parse only the provided files and markdown files which are referenced by internal links with fragments."
+            "\nInternal links will be checked only in the provided files. Useful for the pre-commit hook."
+        ),
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help=(
+            "Check only links affected by changes since the merge base of the git revision and HEAD:"
+            "\nweb links on changed lines, internal links in changed files and links to changed or removed files."
+        ),
+    )
+    parser.add_argument(
+        "--parse-cache",
+        type=Path,
+        help="Path to the file to store parsed markdown files between runs, only changed files will be parsed.",
+    )
+    parser.add_argument(
+        "--link-index",
+        type=Path,
+        help=(
+            "Path to the file to store the index of links between runs, only changed files will be parsed."
+            "\nThe index is used by --links-to and --links-to-domain queries, it can not be used with --parse-cache."
+        ),
+    )
+    parser.add_argument(
+        "--links-to",
+        metavar="PATH",
+        help="Print links to the file or the fragment (e.g. docs/api.md#auth) from the link index and exit.",
+    )
+    parser.add_argument(
+        "--links-to-domain",
+        metavar="DOMAIN",
+        help="Print web links to the domain and its subdomains from the link index and exit.",
+    )
+    parser.add_argument(
+        "--file-backend",
+        type=Backend,
+        choices=[x.value for x in Backend],
+        default=Backend.GIT,
+        help=(
+            "Backend to list files of the repository. Default: git."
+            "\ngit: run `git ls-files`, index: read `.git/index` directly,"
+            "\nscandir: walk all files of the repository root, or of the current directory outside git."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        help=(
+            "Number of processes to parse markdown files. Default: 0 (number of CPU cores)."
+            "\nParallel parsing is used only for repositories with many markdown files."
+        ),
+    )
+    args = parser.parse_args()
+    if args.watch:
+        watch_conflicts = {
+            "--since": args.since,
+            "--format": args.format != "text",
+            "--output": args.output,
+            "--sort": args.sort,
+        }
+        conflicts = [name for name, value in watch_conflicts.items() if value]
+        if conflicts:
+            parser.error(f"--watch can not be used with {', '.join(conflicts)}")
+    if args.file_backend == Backend.SCANDIR and find_git_root(Path.cwd()) is None:
+        git_options = {"--parse-cache": args.parse_cache, "--link-index": args.link_index, "--since": args.since}
+        conflicts = [name for name, value in git_options.items() if value]
+        if conflicts:
+            parser.error(f"{', '.join(conflicts)} can not be used with --file-backend scandir outside a git repository")
+    if args.parse_cache is not None and args.link_index is not None:
+        parser.error("--parse-cache can not be used with --link-index, the link index already stores parsed files")
+    if (args.links_to or args.links_to_domain) and args.link_index is None:
+        parser.error("--link-index is required for --links-to and --links-to-domain")
+    return args
+
+
+def query_link_index(args: Namespace) -> int:
+    with update_link_index(args.untrack, args.jobs, args.link_index, args.file_backend) as index:
+        links = find_links_to(index, args.links_to) if args.links_to else index.links_to_domain(args.links_to_domain)
+    for source, line, link in links:
+        print(f"{source}:{line} {link}")
+    return 0
 
 
 def main() -> int:
     args = args_parser()
+    STATS.enabled = args.stats
+    if args.links_to or args.links_to_domain:
+        return query_link_index(args)
 
-    md_data, repo_dir, files_in_repo = preprocess_repository(untracked_files=args.untrack)
+    md_data, repo_dir, files_in_repo = preprocess_repository(
+        untracked_files=args.untrack,
+        jobs=args.jobs,
+        parse_cache=args.parse_cache,
+        link_index=args.link_index,
+        backend=args.file_backend,
+        lazy=args.lazy and not args.watch and not args.since,
+    )
     config = get_config(repo_dir, args.config)
 
     files = normalize_files(args.files, repo_dir)
     if not args.hook and not files:
         files = list(md_data)
 
-    status_list = check_all_links(md_data, config, repo_dir, files, files_in_repo)
-    err_num = summary(status_list, args.warn, args.all, args.no_color)
+    if args.watch:
+        session = WatchSession(dict(md_data), repo_dir, files_in_repo, config, files, args.untrack)
+        watch_links(session, args.warn, args.all, args.no_color)
+        return 0
+
+    # In lazy mode internal links are checked only in the provided files
+    path_files = files if args.lazy else None
+    if args.since:
+        with STATS.phase("select changed links"):
+            md_data, changed_files = select_changed_links(md_data, repo_dir, files_in_repo, args.since, args.untrack)
+        if args.files:
+            changed_files = sorted(set(changed_files) & set(files))
+        files = path_files = changed_files
+    with ExitStack() as stack:
+        stream = sys.stdout if args.output is None else stack.enter_context(args.output.open("w", encoding="utf-8"))
+        reporter = REPORTERS[args.format](args.warn, args.all, args.no_color, stream)
+        if args.format != "text" and args.output is None:
+            # Keep stdout clean for machine-readable results
+            stack.enter_context(redirect_stdout(sys.stderr))
+        if args.sort:
+            status_list = check_all_links(md_data, config, repo_dir, files, files_in_repo, path_files, args.fail_fast)
+            for status in status_list:
+                reporter.report(status)
+        else:
+            report_all_links(
+                md_data, config, repo_dir, files, files_in_repo, reporter.report, path_files, args.fail_fast
+            )
+        err_num = reporter.finish()
+        if args.stats:
+            STATS.print_report()
 
     return int(err_num != 0)
 
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import marshal
+import os
+import sqlite3
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from urllib.parse import urlsplit
+
+# Increase the version if the layout of the table is changed, old cache will be dropped
+SCHEMA_VERSION = 1
+# Maximum number of variables in one sqlite query
+QUERY_CHUNK_SIZE = 500
+
+
+@dataclass
+class CacheEntry:
+    link: str
+    status: int
+    msg: str | None
+    code: int | None
+    checked_at: float
+    etag: str | None = None
+    last_modified: str | None = None
+
+
+class LinkCache:
+    """Persistent storage of web link results between runs.
+
+    Every entry is stored with time of the check, and considered as fresh during
+    time to live that depends on the status of the link.
+    """
+
+    def __init__(self, path: Path, ttl: dict[int, int], max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self._init_schema()
+
+    def __enter__(self) -> LinkCache:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _init_schema(self) -> None:
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS links")
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS links ("
+            "link TEXT PRIMARY KEY, status INTEGER, msg TEXT, code INTEGER, checked_at REAL, "
+            "etag TEXT, last_modified TEXT)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS links_checked_at ON links (checked_at)")
+        self.connection.commit()
+
+    def is_fresh(self, entry: CacheEntry, now: float | None = None) -> bool:
+        """Check that time to live of the entry is not expired."""
+        if now is None:
+            now = time.time()
+        return now - entry.checked_at < self.ttl.get(entry.status, 0)
+
+    def get_many(self, links: Iterable[str]) -> dict[str, CacheEntry]:
+        """Returns stored entries for the links, expired entries are returned too."""
+        ret: dict[str, CacheEntry] = {}
+        links = list(links)
+        for idx in range(0, len(links), QUERY_CHUNK_SIZE):
+            chunk = links[idx : idx + QUERY_CHUNK_SIZE]
+            rows = self.connection.execute(
+                "SELECT link, status, msg, code, checked_at, etag, last_modified FROM links "
+                f"WHERE link IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                ret[row[0]] = CacheEntry(*row)
+        return ret
+
+    def put_many(self, entries: Iterable[CacheEntry]) -> None:
+        """Store entries and evict the oldest ones if the cache exceeds the size limit."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO links (link, status, msg, code, checked_at, etag, last_modified) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(e.link, e.status, e.msg, e.code, e.checked_at, e.etag, e.last_modified) for e in entries],
+        )
+        num_entries = self.connection.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+        if num_entries > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM links WHERE link IN (SELECT link FROM links ORDER BY checked_at LIMIT ?)",
+                (num_entries - self.max_entries,),
+            )
+        self.connection.commit()
+
+
+# Fragments and pairs of link and line number of a markdown file
+CompactMarkdownInfo = tuple[list[str], list[tuple[str, int]]]
+
+
+class ParseCache:
+    """Storage of parsed markdown files between runs.
+
+    All entries are stored in one binary file in marshal format, the file is ignored if it was created
+    by another version of the tool or the parser. Only entries used in the current run are saved,
+    so entries of removed files do not accumulate.
+    """
+
+    def __init__(self, path: Path, version: str) -> None:
+        self.path = path
+        self.version = version
+        self._stored: dict[str, CompactMarkdownInfo] = {}
+        self._used: dict[str, CompactMarkdownInfo] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.is_file():
+            return
+        try:
+            version, entries = marshal.loads(self.path.read_bytes())
+        except (EOFError, ValueError, TypeError):
+            # Corrupted file or file created by another version of python
+            return
+        if version == self.version and isinstance(entries, dict):
+            self._stored = entries
+
+    def get(self, key: str) -> CompactMarkdownInfo | None:
+        data = self._stored.get(key)
+        if data is not None:
+            self._used[key] = data
+        return data
+
+    def set(self, key: str, data: CompactMarkdownInfo) -> None:
+        self._used[key] = data
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(marshal.dumps((self.version, self._used)))
+        os.replace(tmp_path, self.path)
+
+
+# Source file, line number and link
+IndexedLink = tuple[str, int, str]
+# Increase the version if the layout of tables of the link index is changed
+INDEX_SCHEMA_VERSION = 1
+
+
+def reverse_domain(domain: str) -> str:
+    """Returns domain with reversed order of labels, to find subdomains by a range of keys."""
+    return ".".join(reversed(domain.split(".")))
+
+
+class LinkIndex:
+    """Persistent index of links between files of the repository in sqlite database.
+
+    Stores headers and links of every markdown file with the key of the file content, the key is the same
+    as in the parse cache. Every link is stored with the normalized target path, the fragment and the domain,
+    so queries like "who links to the file" are answered by the indexes of the database without parsing files.
+    """
+
+    def __init__(self, path: Path, version: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self._init_schema(version)
+
+    def __enter__(self) -> LinkIndex:
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc: BaseException | None, traceback: TracebackType | None
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _init_schema(self, version: str) -> None:
+        schema_version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version != INDEX_SCHEMA_VERSION:
+            for table in ("meta", "files", "links"):
+                self.connection.execute(f"DROP TABLE IF EXISTS {table}")
+            self.connection.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, key TEXT, fragments BLOB)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS links (source TEXT, line INTEGER, link TEXT, target TEXT, fragment TEXT, "
+            "domain TEXT)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS links_source ON links (source)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS links_target ON links (target, fragment)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS links_domain ON links (domain)")
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        if row is None or row[0] != version:
+            # Index was created by another version of the parser
+            self.connection.execute("DELETE FROM files")
+            self.connection.execute("DELETE FROM links")
+            self.connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,))
+        self.connection.commit()
+
+    def get_keys(self) -> dict[str, str]:
+        """Returns keys of indexed files."""
+        return dict(self.connection.execute("SELECT path, key FROM files").fetchall())
+
+    def load(self) -> dict[str, CompactMarkdownInfo]:
+        """Returns fragments and links of all indexed files."""
+        ret: dict[str, CompactMarkdownInfo] = {
+            path: (marshal.loads(fragments), [])
+            for path, fragments in self.connection.execute("SELECT path, fragments FROM files")
+        }
+        for source, line, link in self.connection.execute("SELECT source, line, link FROM links ORDER BY rowid"):
+            ret[source][1].append((link, line))
+        return ret
+
+    def put_many(self, entries: Iterable[tuple[str, str, CompactMarkdownInfo, list[str | None]]]) -> None:
+        """Store files with keys, parsed data and target paths of links, None for web links."""
+        entries = list(entries)
+        self._delete([path for path, _, _, _ in entries])
+        self.connection.executemany(
+            "INSERT INTO files (path, key, fragments) VALUES (?, ?, ?)",
+            [(path, key, marshal.dumps(data[0])) for path, key, data, _ in entries],
+        )
+        rows: list[tuple[str, int, str, str | None, str, str | None]] = []
+        for path, _, (_, links), targets in entries:
+            for (link, line), target in zip(links, targets, strict=True):
+                try:
+                    split_result = urlsplit(link)
+                    hostname = split_result.hostname
+                except ValueError:
+                    rows.append((path, line, link, target, "", None))
+                    continue
+                domain = reverse_domain(hostname) if hostname else None
+                rows.append((path, line, link, target, split_result.fragment.lower(), domain))
+        self.connection.executemany(
+            "INSERT INTO links (source, line, link, target, fragment, domain) VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        self.connection.commit()
+
+    def remove_many(self, paths: Iterable[str]) -> None:
+        self._delete(list(paths))
+        self.connection.commit()
+
+    def _delete(self, paths: list[str]) -> None:
+        for idx in range(0, len(paths), QUERY_CHUNK_SIZE):
+            chunk = paths[idx : idx + QUERY_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            self.connection.execute(f"DELETE FROM files WHERE path IN ({placeholders})", chunk)
+            self.connection.execute(f"DELETE FROM links WHERE source IN ({placeholders})", chunk)
+
+    def links_to(self, target: str, fragment: str | None = None) -> list[IndexedLink]:
+        """Returns links to the path, only links to the fragment if it is set."""
+        if fragment is None:
+            rows = self.connection.execute(
+                "SELECT source, line, link FROM links WHERE target = ? ORDER BY source, line, rowid", (target,)
+            )
+        else:
+            rows = self.connection.execute(
+                "SELECT source, line, link FROM links WHERE target = ? AND fragment = ? ORDER BY source, line, rowid",
+                (target, fragment.lower()),
+            )
+        return rows.fetchall()
+
+    def links_to_domain(self, domain: str) -> list[IndexedLink]:
+        """Returns web links to the domain and its subdomains."""
+        key = reverse_domain(domain.lower())
+        # Subdomains are in the range of keys between "<key>." and "<key>/"
+        rows = self.connection.execute(
+            "SELECT source, line, link FROM links WHERE domain = ? OR (domain > ? AND domain < ?) "
+            "ORDER BY source, line, rowid",
+            (key, f"{key}.", f"{key}/"),
+        )
+        return rows.fetchall()
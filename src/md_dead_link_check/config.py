@@ -1,6 +1,11 @@
+import os
+import re
 import sys
 from dataclasses import dataclass
 from dataclasses import field
+from dataclasses import fields
+from fnmatch import translate
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Any
 
@@ -18,6 +23,72 @@ DEFAULT_CATCH_RESPONSE_CODES = [
 ]
 
 
+WILDCARD_SYMBOLS = ("*", "?", "[")
+
+# Settings of aiohttp.TCPConnector, see https://docs.aiohttp.org/en/stable/client_reference.html#tcpconnector
+DEFAULT_CONNECTOR: dict[str, Any] = {
+    "limit": 100,
+    "limit_per_host": 0,
+    "keepalive_timeout": 15,
+    "use_dns_cache": True,
+    "ttl_dns_cache": 10,
+    "resolver": "threaded",
+}
+RESOLVERS = ("threaded", "async")
+# Number of retries for each class of transient failures
+DEFAULT_RETRY_ATTEMPTS = {
+    "timeout": 1,
+    "connection": 1,
+    "server_error": 1,
+    "too_many_requests": 2,
+}
+EVENT_LOOPS = ("asyncio", "uvloop", "auto")
+
+THROTTLE_DOMAIN_KEYS = ("rate", "burst", "max_rate", "max_concurrency", "max_delay")
+
+
+class PatternMatcher:
+    """Matches strings against a list of fnmatch patterns.
+    Patterns without wildcards are checked by lookup in a set, patterns with only trailing `*` by prefix,
+    other patterns are combined to one regular expression. Results are cached for repeated strings.
+    """
+
+    __slots__ = ["patterns", "_literals", "_prefixes", "_regex", "_cache"]
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.patterns = patterns
+        self._literals: set[str] = set()
+        prefixes: list[str] = []
+        regexps: list[str] = []
+        for pattern in patterns:
+            # Same normalization as in fnmatch.fnmatch
+            pattern = os.path.normcase(pattern)
+            if not any(s in pattern for s in WILDCARD_SYMBOLS):
+                self._literals.add(pattern)
+            elif pattern.endswith("*") and not any(s in pattern[:-1] for s in WILDCARD_SYMBOLS):
+                prefixes.append(pattern[:-1])
+            else:
+                regexps.append(translate(pattern))
+        self._prefixes = tuple(prefixes)
+        self._regex = re.compile("|".join(regexps)) if regexps else None
+        self._cache: dict[str, bool] = {}
+
+    def match(self, value: str) -> bool:
+        """Returns True if value matches any of patterns."""
+        if not self.patterns:
+            return False
+        ret = self._cache.get(value)
+        if ret is None:
+            norm_value = os.path.normcase(value)
+            ret = (
+                norm_value in self._literals
+                or norm_value.startswith(self._prefixes)
+                or (self._regex is not None and self._regex.match(norm_value) is not None)
+            )
+            self._cache[value] = ret
+        return ret
+
+
 @dataclass
 class Config:
     timeout: int = 5
@@ -26,16 +97,74 @@ class Config:
     exclude_files: list[str] = field(default_factory=lambda: [])
     force_get_requests_for_links: list[str] = field(default_factory=lambda: [])
     check_web_links: bool = True
+    canonicalize_links: bool = True
+    strip_trailing_slash: bool = False
+    strip_query_params: list[str] = field(default_factory=lambda: [])
     validate_ssl: bool = True
+    precheck_hosts: bool = False
     throttle_groups: int = 100
     throttle_delay: int = 20
     throttle_max_delay: int = 100
+    throttle_max_concurrency: int = 0
+    throttle_domains: dict[str, dict[str, float]] = field(default_factory=lambda: {})
+    connector: dict[str, Any] = field(default_factory=lambda: {})
+    retry_attempts: dict[str, int] = field(default_factory=lambda: {})
+    retry_backoff: float = 1
+    retry_max_backoff: float = 30
+    retry_budget: int = 100
+    event_loop: str = "asyncio"
+    cache_file: str = ""
+    cache_ttl_ok: int = 7 * 24 * 60 * 60
+    cache_ttl_warning: int = 24 * 60 * 60
+    cache_ttl_error: int = 60 * 60
+    cache_max_entries: int = 100000
+
+    def __post_init__(self) -> None:
+        # Compiled matchers with the patterns they were compiled from
+        self._matchers: dict[str, tuple[tuple[str, ...], PatternMatcher]] = {}
+
+    def _get_matcher(self, name: str, patterns: list[str]) -> PatternMatcher:
+        """Returns matcher of the patterns, the matcher is compiled again if the patterns are changed."""
+        key = tuple(patterns)
+        cached = self._matchers.get(name)
+        if cached is None or cached[0] != key:
+            cached = key, PatternMatcher(list(key))
+            self._matchers[name] = cached
+        return cached[1]
+
+    @property
+    def exclude_links_matcher(self) -> PatternMatcher:
+        return self._get_matcher("exclude_links", self.exclude_links)
+
+    @property
+    def exclude_files_matcher(self) -> PatternMatcher:
+        return self._get_matcher("exclude_files", self.exclude_files)
+
+    @property
+    def force_get_requests_matcher(self) -> PatternMatcher:
+        return self._get_matcher("force_get_requests_for_links", self.force_get_requests_for_links)
+
+    @property
+    def strip_query_params_matcher(self) -> PatternMatcher:
+        return self._get_matcher("strip_query_params", self.strip_query_params)
+
+
+def get_tool_version() -> str:
+    """Returns version of the installed package, importlib.metadata is imported on demand to speed up startup."""
+    from importlib.metadata import PackageNotFoundError
+    from importlib.metadata import version
+
+    try:
+        return version(PROJECT_NAME)
+    except PackageNotFoundError:
+        return "unknown"
 
 
 def get_config(root_dir: Path, config_path: Path | None) -> Config:
     if not config_path:
         config_path = root_dir / "pyproject.toml"
     config = Config()
+    available_keys = [f.name for f in fields(config)]
 
     if config_path.is_file():
         with open(config_path, "rb") as handle:
@@ -43,17 +172,26 @@ def get_config(root_dir: Path, config_path: Path | None) -> Config:
         toml_config: dict[str, Any] = pyproject_toml.get("tool", {}).get(PROJECT_NAME, {})
 
         for key, value in toml_config.items():
-            if hasattr(config, key):
+            if key in available_keys:
                 setattr(config, key, value)
             else:
                 msg = (
                     f"Unexpected config key `{key}` in {config_path.name}. "
-                    f"Available keys: [{', '.join(config.__annotations__)}]"
+                    f"Available keys: [{', '.join(available_keys)}]"
                 )
                 raise ValueError(msg)
     if not isinstance(config.timeout, int) or config.timeout < 1:
         msg = "`timeout` must be an integer greater than or equal to 1."
         raise ValueError(msg)
+    for key in ["precheck_hosts", "canonicalize_links", "strip_trailing_slash"]:
+        if not isinstance(getattr(config, key), bool):
+            msg = f"`{key}` must be a boolean."
+            raise ValueError(msg)
+    if not isinstance(config.strip_query_params, list) or not all(
+        isinstance(x, str) for x in config.strip_query_params
+    ):
+        msg = "`strip_query_params` must be a list of strings."
+        raise ValueError(msg)
     if not isinstance(config.throttle_groups, int) or config.throttle_groups < 1:
         msg = "`throttle_groups` must be an integer greater than or equal to 1."
         raise ValueError(msg)
@@ -63,4 +201,71 @@ def get_config(root_dir: Path, config_path: Path | None) -> Config:
     if not isinstance(config.throttle_max_delay, int) or config.throttle_max_delay < 0:
         msg = "`throttle_max_delay` must be a non-negative integer."
         raise ValueError(msg)
+    if not isinstance(config.throttle_max_concurrency, int) or config.throttle_max_concurrency < 0:
+        msg = "`throttle_max_concurrency` must be a non-negative integer."
+        raise ValueError(msg)
+    for domain, settings in config.throttle_domains.items():
+        if not isinstance(settings, dict):
+            msg = f"`throttle_domains.{domain}` must be a table."
+            raise ValueError(msg)
+        for key, value in settings.items():
+            if key not in THROTTLE_DOMAIN_KEYS:
+                msg = (
+                    f"Unexpected key `{key}` in `throttle_domains.{domain}`. "
+                    f"Available keys: [{', '.join(THROTTLE_DOMAIN_KEYS)}]"
+                )
+                raise ValueError(msg)
+            if not isinstance(value, (int, float)) or value < 0 or (key in ["rate", "burst"] and value <= 0):
+                msg = f"`throttle_domains.{domain}.{key}` must be a positive number."
+                raise ValueError(msg)
+    for key, value in config.connector.items():
+        if key not in DEFAULT_CONNECTOR:
+            msg = f"Unexpected key `{key}` in `connector`. Available keys: [{', '.join(DEFAULT_CONNECTOR)}]"
+            raise ValueError(msg)
+        if key == "resolver":
+            if value not in RESOLVERS:
+                msg = f"`connector.resolver` must be one of [{', '.join(RESOLVERS)}]."
+                raise ValueError(msg)
+            if value == "async" and find_spec("aiodns") is None:
+                msg = "`connector.resolver = 'async'` requires aiodns package: pip install aiodns"
+                raise ValueError(msg)
+        elif key == "use_dns_cache":
+            if not isinstance(value, bool):
+                msg = "`connector.use_dns_cache` must be a boolean."
+                raise ValueError(msg)
+        elif not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            msg = f"`connector.{key}` must be a non-negative number."
+            raise ValueError(msg)
+    for key, value in config.retry_attempts.items():
+        if key not in DEFAULT_RETRY_ATTEMPTS:
+            msg = f"Unexpected key `{key}` in `retry_attempts`. Available keys: [{', '.join(DEFAULT_RETRY_ATTEMPTS)}]"
+            raise ValueError(msg)
+        if not isinstance(value, int) or value < 0:
+            msg = f"`retry_attempts.{key}` must be a non-negative integer."
+            raise ValueError(msg)
+    for key in ["retry_backoff", "retry_max_backoff"]:
+        value = getattr(config, key)
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            msg = f"`{key}` must be a non-negative number."
+            raise ValueError(msg)
+    if not isinstance(config.retry_budget, int) or config.retry_budget < 0:
+        msg = "`retry_budget` must be a non-negative integer."
+        raise ValueError(msg)
+    if config.event_loop not in EVENT_LOOPS:
+        msg = f"`event_loop` must be one of [{', '.join(EVENT_LOOPS)}]."
+        raise ValueError(msg)
+    if config.event_loop == "uvloop" and find_spec("uvloop") is None:
+        msg = "`event_loop = 'uvloop'` requires uvloop package: pip install uvloop"
+        raise ValueError(msg)
+    for key in ["cache_ttl_ok", "cache_ttl_warning", "cache_ttl_error"]:
+        value = getattr(config, key)
+        if not isinstance(value, int) or value < 0:
+            msg = f"`{key}` must be a non-negative integer."
+            raise ValueError(msg)
+    if not isinstance(config.cache_max_entries, int) or config.cache_max_entries < 1:
+        msg = "`cache_max_entries` must be an integer greater than or equal to 1."
+        raise ValueError(msg)
+    if config.cache_file:
+        # Path to the cache is relative to the root of repository
+        config.cache_file = (root_dir / config.cache_file).as_posix()
     return config
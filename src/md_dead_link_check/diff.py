@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import ast
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+from dataclasses import field
+from dataclasses import replace
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from md_dead_link_check.graph import LinkGraph
+from md_dead_link_check.preprocess import LinkInfo
+from md_dead_link_check.preprocess import MarkdownInfo
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.preprocess import open_repo
+
+if TYPE_CHECKING:
+    from git import Repo
+
+RE_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass
+class RepoDiff:
+    """Changes of the working tree since the base revision."""
+
+    # Added and modified files -> numbers of changed lines, None for new files
+    changed: dict[str, set[int] | None] = field(default_factory=lambda: {})
+    # Deleted files and old paths of renamed files
+    removed: set[str] = field(default_factory=lambda: set())
+
+
+def unquote_path(path: str) -> str:
+    """Decode path quoted by git, paths with special characters are quoted as C strings."""
+    if path.startswith('"'):
+        return bytes(ast.literal_eval(f"b{path}")).decode("utf8", errors="surrogateescape")
+    return path
+
+
+def parse_name_status(output: str) -> RepoDiff:
+    """Parse output of `git diff --name-status -z`."""
+    diff = RepoDiff()
+    tokens = output.split("\0")
+    idx = 0
+    while idx < len(tokens) and tokens[idx]:
+        status = tokens[idx][0]
+        if status in "RC":
+            old_path, new_path = tokens[idx + 1], tokens[idx + 2]
+            idx += 3
+            if status == "R":
+                diff.removed.add(old_path)
+            diff.changed[new_path] = set()
+        else:
+            path = tokens[idx + 1]
+            idx += 2
+            if status == "D":
+                diff.removed.add(path)
+            elif status == "A":
+                diff.changed[path] = None
+            else:
+                diff.changed[path] = set()
+    return diff
+
+
+def parse_changed_lines(output: str) -> dict[str, set[int]]:
+    """Parse numbers of added and changed lines from output of `git diff --unified=0`."""
+    ret: dict[str, set[int]] = {}
+    lines: set[int] = set()
+    for line in output.splitlines():
+        if line.startswith("+++ "):
+            # Git appends TAB to unquoted paths with spaces
+            path = unquote_path(line[4:].rstrip("\t"))
+            lines = ret.setdefault(path[2:], set()) if path != "/dev/null" else set()
+        elif line.startswith("@@"):
+            match = RE_HUNK_HEADER.match(line)
+            if match:
+                start = int(match.group(1))
+                count = 1 if match.group(2) is None else int(match.group(2))
+                lines.update(range(start, start + count))
+    return ret
+
+
+def get_repo_diff(repo: Repo, ref: str, untracked_files: bool) -> RepoDiff:
+    """Returns changes of the working tree since the merge base of the ref and HEAD."""
+    from git import GitCommandError
+
+    try:
+        base = repo.git.merge_base(ref, "HEAD")
+        name_status = repo.git.diff("--name-status", "-z", "-M", "--no-ext-diff", base)
+        patch = repo.git.diff(
+            "--unified=0", "-M", "--no-color", "--no-ext-diff", "--src-prefix=a/", "--dst-prefix=b/", base
+        )
+    except GitCommandError as e:
+        msg = f"Failed to get changes since {ref}: {e}"
+        raise ValueError(msg) from e
+
+    diff = parse_name_status(name_status)
+    for path, lines in parse_changed_lines(patch).items():
+        if diff.changed.get(path) is not None:
+            diff.changed[path] = lines
+    if untracked_files:
+        for path in repo.untracked_files:
+            diff.changed[path] = None
+    return diff
+
+
+def is_web_link(link: str) -> bool:
+    try:
+        return bool(urlsplit(link).netloc)
+    except ValueError:
+        return False
+
+
+def select_affected_links(
+    diff: RepoDiff, md_data: Mapping[str, MarkdownInfo], graph: LinkGraph, files_in_repo: RepoFiles
+) -> dict[str, list[LinkInfo]]:
+    """Returns links that can be broken by the changes for each markdown file.
+
+    Selected links are web links on changed lines and internal links in changed files,
+    links to removed files and directories, and links with fragments to changed markdown files.
+    """
+    affected: dict[str, dict[int, LinkInfo]] = {}
+
+    def add(links: list[LinkInfo]) -> None:
+        for li in links:
+            affected.setdefault(li.location.as_posix(), {})[id(li)] = li
+
+    for path, lines in diff.changed.items():
+        if path not in md_data:
+            continue
+        add([li for li in md_data[path].links if lines is None or li.line_num in lines or not is_web_link(li.link)])
+        add([li for li in graph.links_to(path) if "#" in li.link])
+
+    for path in diff.removed:
+        add(graph.links_to(path))
+        # Links to directories without files
+        while "/" in path:
+            path = path.rsplit("/", 1)[0]
+            if path in files_in_repo:
+                break
+            add(graph.links_to(path))
+
+    return {
+        md_file: sorted(links.values(), key=lambda li: li.line_num)
+        for md_file, links in affected.items()
+        if md_file in md_data
+    }
+
+
+def filter_md_data(md_data: Mapping[str, MarkdownInfo], links: Mapping[str, list[LinkInfo]]) -> dict[str, MarkdownInfo]:
+    """Returns markdown data with only selected links in the files,
+    other files are kept unchanged to check fragments of links to them.
+    """
+    ret = dict(md_data)
+    for md_file, md_file_links in links.items():
+        ret[md_file] = replace(ret[md_file], links=md_file_links)
+    return ret
+
+
+def select_changed_links(
+    md_data: Mapping[str, MarkdownInfo], root_dir: Path, files_in_repo: RepoFiles, ref: str, untracked_files: bool
+) -> tuple[dict[str, MarkdownInfo], list[str]]:
+    """Select links affected by changes since the ref, see `select_affected_links`.
+    Returns markdown data with only affected links and list of files with them.
+    """
+    diff = get_repo_diff(open_repo(root_dir), ref, untracked_files)
+    graph = LinkGraph.from_md_data(md_data)
+    affected = select_affected_links(diff, md_data, graph, files_in_repo)
+    return filter_md_data(md_data, affected), list(affected)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+from md_dead_link_check.preprocess import LinkInfo
+from md_dead_link_check.preprocess import MarkdownInfo
+from md_dead_link_check.preprocess import resolve_link_target
+
+
+class LinkGraph:
+    """Graph of internal links between files of the repository.
+
+    Stores targets of links for every markdown file and the reverse index to find links
+    to the given file. Paths of targets are normalized without access to the file system,
+    so targets may be missing files.
+    """
+
+    def __init__(self) -> None:
+        self.targets: dict[str, set[str]] = {}
+        # Target path -> source file -> links
+        self.sources: dict[str, dict[str, list[LinkInfo]]] = {}
+
+    @classmethod
+    def from_md_data(cls, md_data: Mapping[str, MarkdownInfo]) -> LinkGraph:
+        graph = cls()
+        for md_file, md_info in md_data.items():
+            graph.update(md_file, md_info)
+        return graph
+
+    def update(self, md_file: str, md_info: MarkdownInfo | None) -> None:
+        """Replace links of the file, None removes the file from the graph."""
+        for target in self.targets.pop(md_file, ()):
+            sources = self.sources[target]
+            del sources[md_file]
+            if not sources:
+                del self.sources[target]
+        if md_info is None:
+            return
+        targets: set[str] = set()
+        for li in md_info.links:
+            link_target = resolve_link_target(li.link, md_file)
+            if link_target is not None:
+                targets.add(link_target)
+                self.sources.setdefault(link_target, {}).setdefault(md_file, []).append(li)
+        self.targets[md_file] = targets
+
+    def linked_from(self, path: str) -> set[str]:
+        """Returns files with links to the path."""
+        return set(self.sources.get(path, ()))
+
+    def links_to(self, path: str) -> list[LinkInfo]:
+        """Returns links to the path from all files."""
+        return [li for links in self.sources.get(path, {}).values() for li in links]
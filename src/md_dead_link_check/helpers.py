@@ -1,10 +1,17 @@
+import json
 import os
 import sys
+import time
 from pathlib import Path
+from typing import Any
+from typing import TextIO
 
+from md_dead_link_check.config import get_tool_version
 from md_dead_link_check.link_checker import Status
 from md_dead_link_check.link_checker import StatusInfo
 
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
 
 class SpecSymbols:
     __slots__ = ["blue", "green", "yellow", "red", "clean", "ok", "fail", "split", "cat_ok", "cat_fail"]
@@ -38,47 +45,203 @@ class SpecSymbols:
                 setattr(self, key, "")
 
 
-def summary(status: list[StatusInfo], print_warn: bool, print_all: bool, no_color: bool) -> int:
-    """Print summary.
-    Returns 0 if not found any error, otherwise 1.
+class StreamReporter:
+    """Prints results of checks as soon as they are known.
+
+    Only counters of errors are kept in memory. Output is written to the buffered stream,
+    which is flushed not more often than once per FLUSH_INTERVAL seconds.
     """
-    specs = SpecSymbols()
-    if no_color:
-        specs.disable_colors()
-    err_nums = 0
-    count_429 = 0
 
-    for x in status:
+    FLUSH_INTERVAL = 0.5
+
+    def __init__(self, print_warn: bool, print_all: bool, no_color: bool, stream: TextIO | None = None) -> None:
+        self.print_warn = print_warn
+        self.print_all = print_all
+        self.no_color = no_color
+        self.specs = SpecSymbols()
+        if no_color:
+            self.specs.disable_colors()
+        self.stream = sys.stdout if stream is None else stream
+        self.err_nums = 0
+        self.count_429 = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, line: str) -> None:
+        self.stream.write(line + "\n")
+        now = time.monotonic()
+        if now - self._last_flush >= self.FLUSH_INTERVAL:
+            self.stream.flush()
+            self._last_flush = now
+
+    def report(self, x: StatusInfo) -> None:
+        specs = self.specs
         link_msg = (
             f"{specs.blue}File:{specs.clean} {x.link_info.get_location()}"
             f" {specs.split} {specs.blue}Link:{specs.clean} {x.link_info.link}"
         )
         if x.msg is not None and "429: too many request" in x.msg.lower():
-            count_429 += 1
+            self.count_429 += 1
 
         if x.status == Status.ERROR:
-            print(f"{link_msg} {specs.split} {specs.red}Error{specs.clean}: {x.msg}")
-            err_nums += 1
-        elif x.status == Status.WARNING and (print_warn or print_all):
-            print(f"{link_msg} {specs.split} {specs.yellow}Warn{specs.clean}: {x.msg}")
-        elif print_all:
-            print(f"{link_msg} {specs.split} {specs.green}OK{specs.clean}")
-
-    if count_429:
-        print(
-            f"\n{specs.yellow}WARNING:{specs.clean} "
-            f'{count_429} link{"s" if count_429 > 1 else ""} returned "429: Too Many Request" respond code. '
-            f"This indicates that one of the servers is being accessed too frequently.\n"
-            f"To more information visit "
-            "https://github.com/AlexanderDokuchaev/md-dead-link-check/#rate-limiting-and-request-throttling"
+            self.write(f"{link_msg} {specs.split} {specs.red}Error{specs.clean}: {x.msg}")
+            self.err_nums += 1
+        elif x.status == Status.WARNING and (self.print_warn or self.print_all):
+            self.write(f"{link_msg} {specs.split} {specs.yellow}Warn{specs.clean}: {x.msg}")
+        elif self.print_all:
+            self.write(f"{link_msg} {specs.split} {specs.green}OK{specs.clean}")
+
+    def finish(self) -> int:
+        """Print summary.
+        Returns 0 if not found any error, otherwise 1.
+        """
+        specs = self.specs
+        if self.count_429:
+            self.write(
+                f"\n{specs.yellow}WARNING:{specs.clean} "
+                f'{self.count_429} link{"s" if self.count_429 > 1 else ""} returned "429: Too Many Request" '
+                "respond code. This indicates that one of the servers is being accessed too frequently.\n"
+                f"To more information visit "
+                "https://github.com/AlexanderDokuchaev/md-dead-link-check/#rate-limiting-and-request-throttling"
+            )
+
+        ret = 0
+        if self.err_nums:
+            cat_repeat = 0 if self.no_color else max(min(self.err_nums // 10, 5), 1)
+            self.write(
+                f"{specs.fail}Found {self.err_nums} dead link{'s' if self.err_nums > 1 else ''}"
+                + specs.cat_fail * cat_repeat
+            )
+            ret = 1
+        else:
+            self.write(f"{specs.ok}Not found dead links{specs.cat_ok}")
+        self.stream.flush()
+        return ret
+
+
+def status_record(x: StatusInfo) -> dict[str, Any]:
+    return {
+        "file": x.link_info.location.as_posix(),
+        "line": x.link_info.line_num,
+        "link": x.link_info.link,
+        "status": x.status.name.lower(),
+        "message": x.msg,
+        "code": x.code,
+        "duration": None if x.duration is None else round(x.duration, 6),
+    }
+
+
+class JsonlReporter(StreamReporter):
+    """Writes results as JSON objects, one per line."""
+
+    def __init__(self, print_warn: bool, print_all: bool, no_color: bool, stream: TextIO | None = None) -> None:
+        super().__init__(print_warn, print_all, no_color, stream)
+        self.counts = dict.fromkeys(Status, 0)
+
+    def is_shown(self, x: StatusInfo) -> bool:
+        return (
+            x.status == Status.ERROR
+            or (x.status == Status.WARNING and (self.print_warn or self.print_all))
+            or self.print_all
         )
 
-    if err_nums:
-        cat_repeat = 0 if no_color else max(min(err_nums // 10, 5), 1)
-        print(f"{specs.fail}Found {err_nums} dead link{'s' if err_nums > 1 else ''}" + specs.cat_fail * cat_repeat)
-        return 1
-    print(f"{specs.ok}Not found dead links{specs.cat_ok}")
-    return 0
+    def report(self, x: StatusInfo) -> None:
+        self.counts[x.status] += 1
+        if x.status == Status.ERROR:
+            self.err_nums += 1
+        if self.is_shown(x):
+            self.write_record(status_record(x))
+
+    def write_record(self, record: dict[str, Any]) -> None:
+        self.write(json.dumps(record, ensure_ascii=False))
+
+    def finish(self) -> int:
+        self.stream.flush()
+        return int(self.err_nums != 0)
+
+
+class JsonReporter(JsonlReporter):
+    """Writes results as one JSON document, records are written as soon as they are known."""
+
+    def __init__(self, print_warn: bool, print_all: bool, no_color: bool, stream: TextIO | None = None) -> None:
+        super().__init__(print_warn, print_all, no_color, stream)
+        self._separator = "\n"
+        self.write_header()
+
+    def write_header(self) -> None:
+        self.stream.write('{"results": [')
+
+    def write_footer(self) -> None:
+        summary = {status.name.lower(): count for status, count in self.counts.items()}
+        self.stream.write(f'], "summary": {json.dumps(summary)}}}\n')
+
+    def write_record(self, record: dict[str, Any]) -> None:
+        self.stream.write(self._separator)
+        self._separator = ",\n"
+        super().write_record(record)
+
+    def finish(self) -> int:
+        self.write_footer()
+        return super().finish()
+
+
+class SarifReporter(JsonReporter):
+    """Writes errors and warnings in SARIF format, supported by code scanning tools."""
+
+    RULE_ID = "dead-link"
+
+    def write_header(self) -> None:
+        tool_version = get_tool_version()
+        driver = {
+            "name": "md-dead-link-check",
+            "version": tool_version,
+            "informationUri": "https://github.com/AlexanderDokuchaev/md-dead-link-check",
+            "rules": [{"id": self.RULE_ID, "shortDescription": {"text": "Dead link"}}],
+        }
+        document = {"$schema": SARIF_SCHEMA, "version": "2.1.0", "runs": [{"tool": {"driver": driver}, "results": []}]}
+        # Results are written into the empty array
+        head, self._footer = json.dumps(document).rsplit("[]", 1)
+        self.stream.write(head + "[")
+
+    def write_footer(self) -> None:
+        self.stream.write(f"]{self._footer}\n")
+
+    def is_shown(self, x: StatusInfo) -> bool:
+        return x.status != Status.OK and super().is_shown(x)
+
+    def write_record(self, record: dict[str, Any]) -> None:
+        result = {
+            "ruleId": self.RULE_ID,
+            "level": record["status"],
+            "message": {"text": f"{record['link']}: {record['message']}"},
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {"uri": record["file"]},
+                        "region": {"startLine": record["line"]},
+                    }
+                }
+            ],
+            "properties": {"code": record["code"], "duration": record["duration"]},
+        }
+        super().write_record(result)
+
+
+REPORTERS: dict[str, type[StreamReporter]] = {
+    "text": StreamReporter,
+    "jsonl": JsonlReporter,
+    "json": JsonReporter,
+    "sarif": SarifReporter,
+}
+
+
+def summary(status: list[StatusInfo], print_warn: bool, print_all: bool, no_color: bool) -> int:
+    """Print summary.
+    Returns 0 if not found any error, otherwise 1.
+    """
+    reporter = StreamReporter(print_warn, print_all, no_color)
+    for x in status:
+        reporter.report(x)
+    return reporter.finish()
 
 
 def normalize_files(files: list[str], repo_dir: Path) -> list[str]:
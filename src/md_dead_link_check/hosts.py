@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import socket
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from md_dead_link_check.config import DEFAULT_CONNECTOR
+from md_dead_link_check.config import Config
+from md_dead_link_check.retry import RetryPolicy
+from md_dead_link_check.retry import RetryReason
+
+if TYPE_CHECKING:
+    from aiohttp.abc import AbstractResolver
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Host name and port
+HostKey = tuple[str, int]
+
+
+@dataclass
+class HostError:
+    """Reason why the host is unreachable, shared by all links to the host."""
+
+    msg: str
+    timeout: bool = False
+
+
+def get_host_key(link: str, proxies: dict[str, str]) -> HostKey | None:
+    """Returns host and port of the link, None if the host can not be probed directly
+    because of unknown scheme or proxy.
+    """
+    try:
+        split_result = urlsplit(link)
+        port = split_result.port
+    except ValueError:
+        return None
+    host = split_result.hostname
+    if host is None or split_result.scheme not in DEFAULT_PORTS:
+        return None
+    if split_result.scheme in proxies:
+        from urllib.request import proxy_bypass
+
+        if not proxy_bypass(host):
+            # Requests are sent through the proxy
+            return None
+    return host, port or DEFAULT_PORTS[split_result.scheme]
+
+
+def create_resolver(config: Config) -> AbstractResolver:
+    """Creates DNS resolver selected by `connector.resolver` option, should be called inside running event loop."""
+    from aiohttp import AsyncResolver
+    from aiohttp.resolver import DefaultResolver
+
+    if {**DEFAULT_CONNECTOR, **config.connector}["resolver"] == "async":
+        return AsyncResolver()
+    resolver: AbstractResolver = DefaultResolver()
+    return resolver
+
+
+async def _connect(host: str, port: int, resolver: AbstractResolver) -> HostError | None:
+    try:
+        addresses = await resolver.resolve(host, port, family=socket.AF_UNSPEC)
+    except OSError as e:
+        return HostError(f"Cannot resolve host {host}: {e.strerror or e}")
+    error = None
+    for address in addresses:
+        try:
+            _, writer = await asyncio.open_connection(
+                address["host"], address["port"], family=address["family"], flags=socket.AI_NUMERICHOST
+            )
+        except OSError as e:
+            error = HostError(f"Cannot connect to {host}:{port}: {e.strerror or e}")
+            continue
+        writer.close()
+        with contextlib.suppress(OSError):
+            await writer.wait_closed()
+        return None
+    return error
+
+
+async def probe_host(host: str, port: int, timeout: float, resolver: AbstractResolver) -> HostError | None:
+    """Resolve the host by the resolver and open TCP connection to it, returns None if the host is reachable."""
+    try:
+        return await asyncio.wait_for(_connect(host, port, resolver), timeout)
+    except asyncio.TimeoutError:
+        return HostError(f"Timeout of connection to {host}:{port}", timeout=True)
+    except ValueError:
+        # Invalid host is reported by the request
+        return None
+
+
+class HostChecker:
+    """Finds unreachable hosts before checks of links.
+
+    Every distinct host is resolved by the same kind of resolver as requests and probed by one TCP connection.
+    Failed probes are retried
+    by the retry policy. Links to unreachable hosts fail together without sending requests.
+    """
+
+    def __init__(self, config: Config, retry_policy: RetryPolicy) -> None:
+        # urllib.request is slow to import, it is needed only for the checks of hosts
+        from urllib.request import getproxies
+
+        self.config = config
+        self.retry_policy = retry_policy
+        self.proxies = getproxies()
+        self.dead_hosts: dict[HostKey, HostError] = {}
+        self.num_skipped_links = 0
+
+    async def _check_host(self, key: HostKey, resolver: AbstractResolver, semaphore: asyncio.Semaphore) -> None:
+        attempt = 0
+        while True:
+            async with semaphore:
+                error = await probe_host(*key, self.config.timeout, resolver)
+            if error is None:
+                return
+            attempt += 1
+            reason = RetryReason.TIMEOUT if error.timeout else RetryReason.CONNECTION
+            delay = self.retry_policy.get_delay(reason, attempt)
+            if delay is None:
+                self.dead_hosts[key] = error
+                return
+            await asyncio.sleep(delay)
+
+    async def check(self, links: Iterable[str]) -> None:
+        """Probe hosts of the links concurrently."""
+        keys = {key for key in (get_host_key(link, self.proxies) for link in links) if key is not None}
+        limit = {**DEFAULT_CONNECTOR, **self.config.connector}["limit"] or len(keys)
+        semaphore = asyncio.Semaphore(max(limit, 1))
+        resolver = create_resolver(self.config)
+        try:
+            await asyncio.gather(*[self._check_host(key, resolver, semaphore) for key in keys])
+        finally:
+            await resolver.close()
+
+    def get_error(self, link: str) -> HostError | None:
+        """Returns error of the host of the link, None if the host is reachable or was not probed."""
+        if not self.dead_hosts:
+            return None
+        key = get_host_key(link, self.proxies)
+        error = None if key is None else self.dead_hosts.get(key)
+        if error is not None:
+            self.num_skipped_links += 1
+        return error
+
+    def print_summary(self) -> None:
+        if self.dead_hosts:
+            print(
+                f"{len(self.dead_hosts)} hosts are unreachable, "
+                f"{self.num_skipped_links} links to them were not requested (see `precheck_hosts` option)."
+            )
@@ -1,22 +1,49 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import ssl
+import threading
+import time
 from collections import defaultdict
+from collections.abc import Callable
+from collections.abc import Coroutine
+from collections.abc import Iterable
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from dataclasses import field
 from enum import Enum
-from fnmatch import fnmatch
 from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import TypeVar
 from urllib.parse import urlsplit
 
-from aiohttp import ClientSession
-from aiohttp.client_exceptions import ClientConnectorError
-from aiohttp.client_exceptions import ClientResponseError
-
+from md_dead_link_check.cache import CacheEntry
+from md_dead_link_check.cache import LinkCache
+from md_dead_link_check.config import DEFAULT_CONNECTOR
 from md_dead_link_check.config import Config
+from md_dead_link_check.hosts import HostChecker
+from md_dead_link_check.hosts import create_resolver
 from md_dead_link_check.preprocess import LinkInfo
 from md_dead_link_check.preprocess import MarkdownInfo
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.retry import RetryPolicy
+from md_dead_link_check.retry import RetryReason
+from md_dead_link_check.retry import get_retry_reason
+from md_dead_link_check.stats import STATS
+from md_dead_link_check.throttle import Throttler
+from md_dead_link_check.throttle import parse_retry_after
+from md_dead_link_check.urls import canonicalize_link
+
+if TYPE_CHECKING:
+    # aiohttp is imported only to check web links, it takes a noticeable part of the startup time
+    from aiohttp import ClientResponse
+    from aiohttp import ClientSession
 
 TIMEOUT_RESPONSE_CODE = 408
+NOT_MODIFIED_RESPONSE_CODE = 304
 
 MSG_TIMEOUT = "408: Timeout"
 MSG_PATH_NOT_FOUND = "Path not found"
@@ -25,6 +52,10 @@ MSG_FRAGMENT_NOT_FOUND = "Fragment not found"
 MSG_UNKNOWN_ERROR = "Unknown error"
 MSG_PARSING_ERROR = "Error parsing link"
 IGNORED_PROTOCOLS = ("ftp", "sftp")
+# Bodies of GET responses up to this size are read to reuse the connection, larger bodies are not downloaded
+MAX_READ_BODY_SIZE = 64 * 1024
+
+T = TypeVar("T")
 
 
 class Status(int, Enum):
@@ -38,6 +69,10 @@ class StatusInfo:
     link_info: LinkInfo
     status: Status
     msg: str | None = None
+    # Response code of web links
+    code: int | None = field(default=None, compare=False)
+    # Time of the check in seconds, None for results from the cache
+    duration: float | None = field(default=None, compare=False)
 
     def __lt__(self, other: StatusInfo) -> bool:
         return self.status < other.status or (self.status == other.status and self.link_info < other.link_info)
@@ -48,106 +83,362 @@ class LinkStatus:
     link: str
     status: Status
     msg: str | None = None
+    code: int | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    duration: float | None = field(default=None, compare=False)
 
 
 @dataclass
-class LinkWithDelay:
+class LinkRequest:
     link: str
-    delay: int
+    headers: dict[str, str] | None = None
+    # Send GET request instead of HEAD
+    force_get: bool = False
 
 
-async def process_link(data: LinkWithDelay, session: ClientSession, config: Config) -> LinkStatus:
-    """Asynchronously processes a link to check its status and gather information.
-    Timeout is not interpolated as error, because timeout often occur due to temporary server issues and
-    retrying the request might be more appropriate than treating it as an immediate failure.
+@dataclass
+class TransferStats:
+    """Amount of data received from web servers during the run."""
+
+    num_responses: int = 0
+    header_bytes: int = 0
+    body_bytes: int = 0
+    # Size of response bodies that were not downloaded, by Content-Length header
+    skipped_bytes: int = 0
+
+    def add(self, response: ClientResponse) -> None:
+        self.num_responses += 1
+        # Status line and headers, approximately
+        self.header_bytes += len(response.reason or "") + 15
+        self.header_bytes += sum(len(k) + len(v) + 4 for k, v in response.raw_headers) + 2
+        self.body_bytes += response.content.total_bytes
+        if response.method != "HEAD" and response.content_length is not None:
+            self.skipped_bytes += max(response.content_length - response.content.total_bytes, 0)
+
+    def print_summary(self) -> None:
+        if not self.num_responses:
+            return
+        msg = (
+            f"Received {format_size(self.header_bytes + self.body_bytes)} in {self.num_responses} responses "
+            f"(headers: {format_size(self.header_bytes)}, bodies: {format_size(self.body_bytes)})"
+        )
+        if self.skipped_bytes:
+            msg += f", skipped download of {format_size(self.skipped_bytes)}"
+        print(msg)
+
+
+def format_size(num_bytes: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GiB"
+
+
+async def release_response(response: ClientResponse, stats: TransferStats) -> None:
+    """Return the connection of the response to the pool without downloading a large body.
+    Small bodies are read to keep the connection alive, otherwise the connection is closed
+    after the status line and headers.
+    """
+    from aiohttp import ClientError
+
+    if response.method != "HEAD":
+        if response.content_length is not None and response.content_length <= MAX_READ_BODY_SIZE:
+            with contextlib.suppress(ClientError, asyncio.TimeoutError):
+                await response.read()
+        else:
+            response.close()
+    stats.add(response)
+    response.release()
+
+
+class Cancellation:
+    """Allows to stop checks of web links from another thread."""
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._future: asyncio.Future[Any] | None = None
+
+    def attach(self, future: asyncio.Future[Any]) -> None:
+        """Set future to cancel, should be called inside running event loop."""
+        with self._lock:
+            if self.cancelled:
+                future.cancel()
+                return
+            self._loop = asyncio.get_running_loop()
+            self._future = future
+
+    def detach(self) -> None:
+        with self._lock:
+            self._loop = None
+            self._future = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._loop is not None and self._future is not None:
+                self._loop.call_soon_threadsafe(self._future.cancel)
+
+
+class _StopChecks(Exception):
+    """Raised to stop checks of internal links on the first error in fail fast mode."""
+
+
+async def request_link(
+    data: LinkRequest, session: ClientSession, config: Config, throttler: Throttler, stats: TransferStats
+) -> tuple[LinkStatus, RetryReason | None, float | None]:
+    """Make one attempt to check the link.
+    Returns status of the link, class of the failure that can be retried and time from Retry-After header.
     """
+    from aiohttp.client_exceptions import ClientConnectorError
+    from aiohttp.client_exceptions import ClientResponseError
+    from aiohttp.client_exceptions import ServerDisconnectedError
+
     link = data.link
-    delay = data.delay
+    limiter = throttler.get_limiter(link)
 
     kwargs = {
         "url": link,
         "allow_redirects": True,
         "timeout": config.timeout,
-        "ssl": config.validate_ssl,
     }
+    if data.headers:
+        # Conditional request to revalidate cached result
+        kwargs["headers"] = data.headers
 
+    duration: float | None = None
+    reason: RetryReason | None = None
+    retry_after: float | None = None
     try:
-        # Use delay to avoid rate limiting (429: Too Many Requests)
-        if delay:
-            await asyncio.sleep(delay)
-
-        if any(fnmatch(link, p) for p in config.force_get_requests_for_links):
-            response = await session.get(**kwargs)
-        else:
-            response = await session.head(**kwargs)
-            if response.status == 404:
-                # Some web sites are not supports head request and return 404 code
+        # Limit frequency of requests to avoid rate limiting (429: Too Many Requests)
+        sent_at = await limiter.acquire()
+        start = time.perf_counter()
+        try:
+            if data.force_get or config.force_get_requests_matcher.match(link):
                 response = await session.get(**kwargs)
+            else:
+                response = await session.head(**kwargs)
+                if response.status == 404:
+                    # Some web sites are not supports head request and return 404 code
+                    await release_response(response, stats)
+                    response = await session.get(**kwargs)
+            await release_response(response, stats)
+        finally:
+            limiter.release()
+            duration = time.perf_counter() - start
+            if STATS.enabled:
+                STATS.add_request(link, duration)
         response.raise_for_status()
     except ClientResponseError as e:
-        if not config.catch_response_codes or e.status in config.catch_response_codes:
-            return LinkStatus(link, Status.ERROR, f"{e.status}: {e.message}")
-        return LinkStatus(link, Status.WARNING, f"{e.status}: {e.message}")
+        retry_after = parse_retry_after(e.headers.get("Retry-After")) if e.headers else None
+        limiter.on_response(e.status, retry_after, sent_at)
+        status = (
+            Status.ERROR
+            if not config.catch_response_codes or e.status in config.catch_response_codes
+            else Status.WARNING
+        )
+        link_status = LinkStatus(link, status, f"{e.status}: {e.message}", e.status)
+        reason = get_retry_reason(e.status)
     except asyncio.CancelledError as e:
-        return LinkStatus(link, Status.ERROR, str(e))
-    except ClientConnectorError as e:
-        return LinkStatus(link, Status.ERROR, str(e))
+        link_status = LinkStatus(link, Status.ERROR, str(e))
+    except (ClientConnectorError, ServerDisconnectedError) as e:
+        link_status = LinkStatus(link, Status.ERROR, str(e) or MSG_UNKNOWN_ERROR)
+        reason = RetryReason.CONNECTION
     except asyncio.TimeoutError:
-        if TIMEOUT_RESPONSE_CODE in config.catch_response_codes:
-            return LinkStatus(link, Status.ERROR, MSG_TIMEOUT)
-        return LinkStatus(link, Status.WARNING, MSG_TIMEOUT)
+        status = Status.ERROR if TIMEOUT_RESPONSE_CODE in config.catch_response_codes else Status.WARNING
+        link_status = LinkStatus(link, status, MSG_TIMEOUT, TIMEOUT_RESPONSE_CODE)
+        reason = RetryReason.TIMEOUT
     except Exception as e:
         msg = str(e)
         if not msg:
             msg = MSG_UNKNOWN_ERROR
-        return LinkStatus(link, Status.ERROR, msg)
-    return LinkStatus(link, Status.OK)
-
-
-async def async_check_links(links: list[LinkWithDelay], config: Config) -> list[LinkStatus]:
-    async with ClientSession(trust_env=True) as session:
-        return await asyncio.gather(*[process_link(li, session, config) for li in links])
-
-
-def calculate_delay(counter: int, config: Config) -> int:
-    return int(min(counter // config.throttle_groups * config.throttle_delay, config.throttle_max_delay))
+        link_status = LinkStatus(link, Status.ERROR, msg)
+    else:
+        limiter.on_response(response.status, sent_at=sent_at)
+        link_status = LinkStatus(
+            link,
+            Status.OK,
+            code=response.status,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    link_status.duration = duration
+    return link_status, reason, retry_after
+
+
+async def process_link(
+    data: LinkRequest,
+    session: ClientSession,
+    config: Config,
+    throttler: Throttler,
+    retry_policy: RetryPolicy,
+    stats: TransferStats,
+) -> LinkStatus:
+    """Asynchronously processes a link to check its status and gather information.
+    Timeouts, connection errors and 5xx or 429 responses often occur due to temporary server issues,
+    so such requests are retried according to the retry policy. Waiting before the next attempt
+    does not block checks of other links.
+    """
+    attempts: dict[RetryReason, int] = defaultdict(int)
+    duration = 0.0
+    while True:
+        link_status, reason, retry_after = await request_link(data, session, config, throttler, stats)
+        # Duration of the check is the sum of durations of all attempts
+        duration += link_status.duration or 0.0
+        link_status.duration = duration
+        if reason is None:
+            return link_status
+        attempts[reason] += 1
+        delay = retry_policy.get_delay(reason, attempts[reason], retry_after)
+        if delay is None:
+            return link_status
+        if STATS.enabled:
+            STATS.retry_sleep += delay
+        await asyncio.sleep(delay)
+
+
+def create_session(config: Config) -> ClientSession:
+    """Creates session with connection pool, DNS resolver and SSL context from the config.
+    Should be called inside running event loop.
+    """
+    from aiohttp import ClientSession
+    from aiohttp import TCPConnector
+
+    settings = {**DEFAULT_CONNECTOR, **config.connector}
+    ssl_context: ssl.SSLContext | bool = ssl.create_default_context() if config.validate_ssl else False
+    connector = TCPConnector(
+        limit=settings["limit"],
+        limit_per_host=settings["limit_per_host"],
+        keepalive_timeout=settings["keepalive_timeout"],
+        use_dns_cache=settings["use_dns_cache"],
+        ttl_dns_cache=settings["ttl_dns_cache"],
+        resolver=create_resolver(config),
+        ssl=ssl_context,
+    )
+    return ClientSession(connector=connector, trust_env=True)
+
+
+def run_async(coro: Coroutine[Any, Any, T], config: Config) -> T:
+    """Run coroutine in the event loop selected in the config."""
+    if config.event_loop != "asyncio":
+        try:
+            import uvloop
+        except ImportError:
+            if config.event_loop == "uvloop":
+                raise
+        else:
+            return uvloop.run(coro)  # type: ignore[no-any-return]
+    return asyncio.run(coro)
+
+
+async def async_check_links(
+    links: list[LinkRequest],
+    config: Config,
+    on_done: Callable[[LinkStatus], None] | None = None,
+    cancellation: Cancellation | None = None,
+    session: ClientSession | None = None,
+) -> list[LinkStatus]:
+    """Check links concurrently, on_done is called for each link as soon as its check is finished.
+    If checks are cancelled, returns only results of finished checks.
+    If session is not passed, a new session is created for the checks.
+    """
+    if not links:
+        return []
+    throttler = Throttler(config)
+    retry_policy = RetryPolicy(config)
+    stats = TransferStats()
+    finished: list[LinkStatus] = []
+
+    host_checker = HostChecker(config, retry_policy) if config.precheck_hosts else None
+
+    async def check(li: LinkRequest) -> LinkStatus:
+        host_error = None if host_checker is None else host_checker.get_error(li.link)
+        if host_error is None:
+            link_status = await process_link(li, active_session, config, throttler, retry_policy, stats)
+        elif host_error.timeout:
+            status = Status.ERROR if TIMEOUT_RESPONSE_CODE in config.catch_response_codes else Status.WARNING
+            link_status = LinkStatus(li.link, status, host_error.msg, TIMEOUT_RESPONSE_CODE)
+        else:
+            link_status = LinkStatus(li.link, Status.ERROR, host_error.msg)
+        if cancellation is None or not cancellation.cancelled:
+            finished.append(link_status)
+            if on_done is not None:
+                on_done(link_status)
+        return link_status
+
+    session_context = create_session(config) if session is None else contextlib.nullcontext(session)
+
+    async def check_all() -> list[LinkStatus]:
+        if host_checker is not None:
+            await host_checker.check(li.link for li in links)
+        return await asyncio.gather(*[check(li) for li in links])
+
+    async with session_context as active_session:
+        checks = asyncio.ensure_future(check_all())
+        if cancellation is not None:
+            cancellation.attach(checks)
+        try:
+            ret = await checks
+        except asyncio.CancelledError:
+            if cancellation is None or not cancellation.cancelled:
+                raise
+            ret = finished
+        finally:
+            if cancellation is not None:
+                cancellation.detach()
+    if STATS.enabled:
+        for domain, limiter in throttler.limiters.items():
+            STATS.add_throttle_sleep(domain, limiter.sleep_time)
+    throttler.print_summary()
+    retry_policy.print_summary()
+    if host_checker is not None:
+        host_checker.print_summary()
+    stats.print_summary()
+    return ret
 
 
-def generate_delays_for_one_domain_links(links: list[str], config: Config) -> list[LinkWithDelay]:
-    domain_requests_counter: dict[str, int] = defaultdict(int)
-    ret: list[LinkWithDelay] = []
+def check_web_links(md_data: Mapping[str, MarkdownInfo], config: Config, files: list[str]) -> list[StatusInfo]:
+    ret: list[StatusInfo] = []
+    report_web_links(md_data, config, files, ret.append)
+    return ret
 
-    for link in links:
-        domain = urlsplit(link).netloc
-        delay = calculate_delay(domain_requests_counter[domain], config)
-        ret.append(LinkWithDelay(link, delay))
-        domain_requests_counter[domain] += 1
 
-    enabled_throttling = {d: num - 1 for d, num in domain_requests_counter.items() if num - 1 > config.throttle_groups}
-    if enabled_throttling:
-        print("Throttling applied to limit request frequency:")
-        for domain, num_request in enabled_throttling.items():
-            if num_request > config.throttle_groups:
-                max_delay = calculate_delay(num_request, config)
-                print(f" - Domain:         {domain}")
-                print(f"   Requests count: {num_request}")
-                if max_delay == config.throttle_max_delay:
-                    print(f"   Maximum delay:  {max_delay} seconds (reached throttle_max_delay)")
-                else:
-                    print(f"   Maximum delay:  {max_delay} seconds")
+def report_web_links(
+    md_data: Mapping[str, MarkdownInfo],
+    config: Config,
+    files: list[str],
+    report: Callable[[StatusInfo], None],
+    cancellation: Cancellation | None = None,
+) -> None:
+    """Check web links in the files, results for all occurrences of a link are reported
+    as soon as the check of the link is finished.
+    """
+    web_links = collect_web_links(md_data, config, files)
 
-    return ret
+    def on_done(li_status: LinkStatus) -> None:
+        for wl in web_links[li_status.link]:
+            report(StatusInfo(wl, li_status.status, li_status.msg, li_status.code, li_status.duration))
 
+    link_requests = [create_link_request(link, occurrences, config) for link, occurrences in web_links.items()]
+    if config.cache_file:
+        check_web_links_with_cache(link_requests, config, on_done, cancellation)
+    else:
+        run_async(async_check_links(link_requests, config, on_done, cancellation), config)
 
-def check_web_links(md_data: dict[str, MarkdownInfo], config: Config, files: list[str]) -> list[StatusInfo]:
-    ret: list[StatusInfo] = []
 
-    web_links: list[LinkInfo] = []
+def collect_web_links(
+    md_data: Mapping[str, MarkdownInfo], config: Config, files: Iterable[str]
+) -> dict[str, list[LinkInfo]]:
+    """Returns canonical web links to check in the files and all occurrences of the links."""
+    web_links: dict[str, list[LinkInfo]] = {}
     for md_file in files:
         if md_file not in md_data:
             continue
         md_file_info = md_data[md_file]
-        if any(fnmatch(md_file, p) for p in config.exclude_files):
+        if config.exclude_files_matcher.match(md_file):
             continue
         for li in md_file_info.links:
             try:
@@ -157,93 +448,240 @@ def check_web_links(md_data: dict[str, MarkdownInfo], config: Config, files: lis
                 continue
             if split_result.scheme in IGNORED_PROTOCOLS:
                 continue
-            if any(fnmatch(li.link, p) for p in config.exclude_links):
+            if config.exclude_links_matcher.match(li.link):
                 continue
             if split_result.netloc:
-                web_links.append(li)
+                # Check only unique links, links with the same canonical form are checked by one request
+                web_links.setdefault(canonicalize_link(li.link, config), []).append(li)
+    return web_links
 
-    # Check only unique links
-    unique_links = list(set(li.link for li in web_links))
-    links_with_delay = generate_delays_for_one_domain_links(unique_links, config)
-    links_status = asyncio.run(async_check_links(links_with_delay, config))
 
-    links_status_dict = {li.link: li for li in links_status}
+def create_link_request(link: str, occurrences: list[LinkInfo], config: Config) -> LinkRequest:
+    """Returns request of the canonical link, patterns of `force_get_requests_for_links` are matched
+    with the original links of all occurrences.
+    """
+    matcher = config.force_get_requests_matcher
+    force_get = matcher.match(link) or any(matcher.match(li.link) for li in occurrences)
+    return LinkRequest(link, force_get=force_get)
+
+
+def check_web_links_with_cache(
+    links: list[LinkRequest],
+    config: Config,
+    on_done: Callable[[LinkStatus], None] | None = None,
+    cancellation: Cancellation | None = None,
+) -> dict[str, LinkStatus]:
+    """Check web links using persistent cache of results.
+    Requests are sent only for links that are missing in the cache or expired,
+    expired entries with ETag or Last-Modified headers are revalidated by conditional requests.
+    """
+    ttl = {
+        Status.OK: config.cache_ttl_ok,
+        Status.WARNING: config.cache_ttl_warning,
+        Status.ERROR: config.cache_ttl_error,
+    }
+    with LinkCache(Path(config.cache_file), ttl, config.cache_max_entries) as cache:
+        entries = cache.get_many([li.link for li in links])
+        now = time.time()
+
+        ret: dict[str, LinkStatus] = {}
+        link_requests: list[LinkRequest] = []
+        for li in links:
+            entry = entries.get(li.link)
+            if entry is not None and cache.is_fresh(entry, now):
+                ret[li.link] = LinkStatus(
+                    li.link, Status(entry.status), entry.msg, entry.code, entry.etag, entry.last_modified
+                )
+                if on_done is not None:
+                    on_done(ret[li.link])
+            else:
+                link_requests.append(li)
 
-    for wl in web_links:
-        li_status = links_status_dict[wl.link]
-        ret.append(StatusInfo(wl, li_status.status, li_status.msg))
+        for li in link_requests:
+            entry = entries.get(li.link)
+            if entry is None or entry.status != Status.OK:
+                continue
+            headers = {}
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+            li.headers = headers or None
+
+        def on_checked(li_status: LinkStatus) -> None:
+            entry = entries.get(li_status.link)
+            if entry is not None and li_status.code == NOT_MODIFIED_RESPONSE_CODE:
+                # Resource is not changed since last check, keep the stored result
+                li_status = LinkStatus(
+                    li_status.link,
+                    Status(entry.status),
+                    entry.msg,
+                    entry.code,
+                    li_status.etag or entry.etag,
+                    li_status.last_modified or entry.last_modified,
+                    li_status.duration,
+                )
+            ret[li_status.link] = li_status
+            if on_done is not None:
+                on_done(li_status)
+
+        run_async(async_check_links(link_requests, config, on_checked, cancellation), config)
+
+        checked_at = time.time()
+        new_entries = [
+            CacheEntry(
+                li_status.link,
+                li_status.status,
+                li_status.msg,
+                li_status.code,
+                checked_at,
+                li_status.etag,
+                li_status.last_modified,
+            )
+            for li_status in (ret[li.link] for li in link_requests if li.link in ret)
+        ]
+        cache.put_many(new_entries)
     return ret
 
 
 def check_path_links(
-    md_data: dict[str, MarkdownInfo], root_dir: Path, config: Config, files_in_repo: list[Path]
+    md_data: Mapping[str, MarkdownInfo],
+    root_dir: Path,
+    config: Config,
+    files_in_repo: RepoFiles,
+    files: list[str] | None = None,
 ) -> list[StatusInfo]:
+    """Check internal links in the files, by default checks all markdown files."""
     ret: list[StatusInfo] = []
+    report_path_links(md_data, root_dir, config, files_in_repo, ret.append, files)
+    return ret
 
-    for md_file, md_file_info in md_data.items():
-        if any(fnmatch(md_file, p) for p in config.exclude_files):
+
+def report_path_links(
+    md_data: Mapping[str, MarkdownInfo],
+    root_dir: Path,
+    config: Config,
+    files_in_repo: RepoFiles,
+    report: Callable[[StatusInfo], None],
+    files: list[str] | None = None,
+) -> None:
+    """Check internal links in the files and report results one by one."""
+    for md_file in md_data if files is None else files:
+        if md_file not in md_data or config.exclude_files_matcher.match(md_file):
             continue
-        md_abs_path = root_dir / md_file_info.path
+        md_file_info = md_data[md_file]
         for md_link in md_file_info.links:
             if md_link.link == "#":
                 # Link on top of file
                 continue
-            if any(fnmatch(md_link.link, p) for p in config.exclude_links):
+            if config.exclude_links_matcher.match(md_link.link):
                 continue
 
-            try:
-                split_result = urlsplit(md_link.link)
-            except ValueError:
-                ret.append(StatusInfo(md_link, Status.ERROR, MSG_PARSING_ERROR))
-                continue
+            start = time.perf_counter()
+            status_info = check_path_link(md_link, md_file_info, md_data, root_dir, files_in_repo)
+            if status_info is not None:
+                status_info.duration = time.perf_counter() - start
+                report(status_info)
+
+
+def check_path_link(
+    md_link: LinkInfo,
+    md_file_info: MarkdownInfo,
+    md_data: Mapping[str, MarkdownInfo],
+    root_dir: Path,
+    files_in_repo: RepoFiles,
+) -> StatusInfo | None:
+    """Check internal link of the markdown file, returns None for web links."""
+    try:
+        split_result = urlsplit(md_link.link)
+    except ValueError:
+        return StatusInfo(md_link, Status.ERROR, MSG_PARSING_ERROR)
+
+    if split_result.scheme or split_result.netloc:
+        return None
+    fragment = split_result.fragment.lower()
+
+    if not split_result.path:
+        if fragment not in md_file_info.fragments:
+            return StatusInfo(md_link, Status.ERROR, MSG_FRAGMENT_NOT_FOUND)
+    else:
+        try:
+            if split_result.path.startswith("/"):
+                # path from git root dir
+                abs_path = root_dir / split_result.path[1:]
+                rel_path = Path(split_result.path[1:])
+            else:
+                abs_path = ((root_dir / md_file_info.path).parent / split_result.path).resolve()
+                rel_path = abs_path.relative_to(root_dir)
+        except ValueError:
+            return StatusInfo(md_link, Status.ERROR, MSG_PATH_NOT_FOUND)
 
-            if split_result.scheme or split_result.netloc:
-                continue
-            fragment = split_result.fragment.lower()
+        if abs_path.as_posix() != abs_path.resolve().as_posix():
+            return StatusInfo(md_link, Status.ERROR, MSG_PATH_NOT_FOUND)
 
-            if not split_result.path:
-                if fragment not in md_file_info.fragments:
-                    ret.append(StatusInfo(md_link, Status.ERROR, MSG_FRAGMENT_NOT_FOUND))
-                    continue
-            else:
-                try:
-                    if split_result.path.startswith("/"):
-                        # path from git root dir
-                        abs_path = root_dir / split_result.path[1:]
-                        rel_path = Path(split_result.path[1:])
-                    else:
-                        abs_path = (md_abs_path.parent / split_result.path).resolve()
-                        rel_path = abs_path.relative_to(root_dir)
-                except ValueError:
-                    ret.append(StatusInfo(md_link, Status.ERROR, MSG_PATH_NOT_FOUND))
-                    continue
-
-                if abs_path.as_posix() != abs_path.resolve().as_posix():
-                    ret.append(StatusInfo(md_link, Status.ERROR, MSG_PATH_NOT_FOUND))
-                    continue
-
-                if rel_path.as_posix() in md_data:
-                    # Markdowns in repository
-                    if fragment and fragment not in md_data[rel_path.as_posix()].fragments:
-                        ret.append(StatusInfo(md_link, Status.ERROR, MSG_FRAGMENT_NOT_FOUND))
-                        continue
-                else:
-                    if not any(f == rel_path or rel_path in f.parents for f in files_in_repo):
-                        if abs_path.exists():
-                            ret.append(StatusInfo(md_link, Status.ERROR, MSG_PATH_NOT_ADDED))
-                        else:
-                            ret.append(StatusInfo(md_link, Status.ERROR, MSG_PATH_NOT_FOUND))
-                        continue
-
-            ret.append(StatusInfo(md_link, Status.OK))
-    return ret
+        if rel_path.as_posix() in md_data:
+            # Markdowns in repository
+            if fragment and fragment not in md_data[rel_path.as_posix()].fragments:
+                return StatusInfo(md_link, Status.ERROR, MSG_FRAGMENT_NOT_FOUND)
+        elif rel_path.as_posix() not in files_in_repo:
+            msg = MSG_PATH_NOT_ADDED if abs_path.exists() else MSG_PATH_NOT_FOUND
+            return StatusInfo(md_link, Status.ERROR, msg)
+
+    return StatusInfo(md_link, Status.OK)
 
 
 def check_all_links(
-    md_data: dict[str, MarkdownInfo], config: Config, root_dir: Path, files: list[str], files_in_repo: list[Path]
+    md_data: Mapping[str, MarkdownInfo],
+    config: Config,
+    root_dir: Path,
+    files: list[str],
+    files_in_repo: RepoFiles,
+    path_files: list[str] | None = None,
+    fail_fast: bool = False,
 ) -> list[StatusInfo]:
+    """Check web links in the files and internal links in path_files, by default in all markdown files."""
     status_list: list[StatusInfo] = []
-    if config.check_web_links:
-        status_list.extend(check_web_links(md_data, config, files))
-    status_list.extend(check_path_links(md_data, root_dir, config, files_in_repo))
+    report_all_links(md_data, config, root_dir, files, files_in_repo, status_list.append, path_files, fail_fast)
     return sorted(status_list)
+
+
+def report_all_links(
+    md_data: Mapping[str, MarkdownInfo],
+    config: Config,
+    root_dir: Path,
+    files: list[str],
+    files_in_repo: RepoFiles,
+    report: Callable[[StatusInfo], None],
+    path_files: list[str] | None = None,
+    fail_fast: bool = False,
+) -> bool:
+    """Check links like `check_all_links`, but report results as soon as they are known without sorting.
+    Internal links are checked in a worker thread while the event loop waits for responses of web links.
+    In fail fast mode all checks are stopped on the first error in internal links.
+    Returns True if checks were stopped.
+    """
+    lock = threading.Lock()
+    cancellation = Cancellation()
+
+    def report_path(x: StatusInfo) -> None:
+        with lock:
+            report(x)
+        if fail_fast and x.status == Status.ERROR:
+            cancellation.cancel()
+            raise _StopChecks
+
+    def check_paths() -> None:
+        with contextlib.suppress(_StopChecks), STATS.phase("check internal links"):
+            report_path_links(md_data, root_dir, config, files_in_repo, report_path, path_files)
+
+    def report_web(x: StatusInfo) -> None:
+        with lock:
+            report(x)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        path_checks = executor.submit(check_paths)
+        if config.check_web_links:
+            with STATS.phase("check web links"):
+                report_web_links(md_data, config, files, report_web, cancellation)
+        path_checks.result()
+    return cancellation.cancelled
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import os
+import re
+import struct
+import subprocess
+from enum import Enum
+from pathlib import Path
+
+# Size of fixed fields of an entry of the git index before the object hash
+INDEX_ENTRY_STAT_SIZE = 40
+# Extensions of the git index that change meaning of entries
+UNSUPPORTED_INDEX_EXTENSIONS = {b"link": "Split index", b"sdir": "Sparse index"}
+FLAGS = struct.Struct(">H")
+RE_SHA256_FORMAT = re.compile(rb"^\s*objectformat\s*=\s*sha256\s*$", re.IGNORECASE | re.MULTILINE)
+
+
+class Backend(str, Enum):
+    """Backends to list files of the repository."""
+
+    # Output of `git ls-files -z`
+    GIT = "git"
+    # Read entries of `.git/index` without git process, untracked files are listed by git
+    INDEX = "index"
+    # Walk all files in the directory, works without git
+    SCANDIR = "scandir"
+
+
+class UnsupportedIndexError(Exception):
+    """The git index uses features that are not supported by the reader."""
+
+
+def find_git_root(path: Path) -> Path | None:
+    """Returns the nearest parent directory with `.git` directory or file."""
+    for parent in (path, *path.parents):
+        if (parent / ".git").exists():
+            return parent
+    return None
+
+
+def get_root_dir(backend: Backend) -> Path:
+    """Returns the root directory of the repository, for scandir backend the current directory is used
+    if it is not in a git repository.
+    """
+    cwd = Path.cwd()
+    root_dir = find_git_root(cwd)
+    if root_dir is not None:
+        return root_dir
+    if backend == Backend.SCANDIR:
+        return cwd
+    msg = f"Not a git repository: {cwd}, use `--file-backend scandir` to check files without git"
+    raise ValueError(msg)
+
+
+def run_git(root_dir: Path, *args: str) -> bytes:
+    try:
+        result = subprocess.run(["git", *args], cwd=root_dir, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        msg = f"git {' '.join(args)} failed: {e.stderr.decode(errors='replace').strip()}"
+        raise ValueError(msg) from e
+    return result.stdout
+
+
+def split_paths(output: bytes) -> list[str]:
+    """Split NUL separated paths."""
+    return [os.fsdecode(path) for path in output.split(b"\0") if path]
+
+
+def git_ls_files(root_dir: Path, untracked_files: bool) -> list[str]:
+    """List tracked and optionally untracked files by one git process."""
+    args = ["ls-files", "-z", "--cached"]
+    if untracked_files:
+        args += ["--others", "--exclude-standard"]
+    return split_paths(run_git(root_dir, *args))
+
+
+def get_git_dir(root_dir: Path) -> Path:
+    """Returns git directory, `.git` is a file with the path to the git directory in worktrees and submodules."""
+    git_path = root_dir / ".git"
+    if git_path.is_file():
+        content = git_path.read_text(encoding="utf8").strip()
+        if not content.startswith("gitdir:"):
+            msg = f"Unknown format of {git_path}"
+            raise UnsupportedIndexError(msg)
+        return (root_dir / content[len("gitdir:") :].strip()).resolve()
+    return git_path
+
+
+def get_hash_size(git_dir: Path) -> int:
+    """Returns size of object hashes, 32 bytes for repositories with SHA-256 objects."""
+    common_dir = git_dir
+    if (git_dir / "commondir").is_file():
+        # Worktrees share the config of the main repository
+        common_dir = git_dir / (git_dir / "commondir").read_text(encoding="utf8").strip()
+    config_path = common_dir / "config"
+    if config_path.is_file() and RE_SHA256_FORMAT.search(config_path.read_bytes()):
+        return 32
+    return 20
+
+
+def read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    """Read variable length integer of the index version 4, returns the value and the new offset."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def parse_git_index(data: bytes, hash_size: int = 20) -> list[str]:
+    """Returns paths of entries of the git index, supported versions are 2, 3 and 4.
+    See https://git-scm.com/docs/index-format
+    """
+    if data[:4] != b"DIRC":
+        msg = "Not a git index"
+        raise UnsupportedIndexError(msg)
+    version = int.from_bytes(data[4:8], "big")
+    if version not in (2, 3, 4):
+        msg = f"Unsupported version of git index: {version}"
+        raise UnsupportedIndexError(msg)
+    num_entries = int.from_bytes(data[8:12], "big")
+
+    names: list[bytes] = []
+    offset = 12
+    name = b""
+    # Offset of flags from the start of the entry
+    flags_offset = INDEX_ENTRY_STAT_SIZE + hash_size
+    for _ in range(num_entries):
+        entry_start = offset
+        (flags,) = FLAGS.unpack_from(data, offset + flags_offset)
+        offset += flags_offset + 2
+        if flags & 0x4000:
+            # Extended flags of version 3
+            offset += 2
+        if version == 4:
+            strip_len, offset = read_varint(data, offset)
+            end = data.index(b"\0", offset)
+            name = name[: len(name) - strip_len] + data[offset:end]
+            offset = end + 1
+        else:
+            name_len = flags & 0xFFF
+            # Length is stored only for names shorter than 4095 bytes
+            end = offset + name_len if name_len < 0xFFF else data.index(b"\0", offset)
+            name = data[offset:end]
+            # Entries are padded by 1-8 NUL bytes to a multiple of 8 bytes
+            offset = entry_start + ((end - entry_start + 8) & ~7)
+        if not names or names[-1] != name:
+            # Unmerged files have several entries with different stages
+            names.append(name)
+
+    while offset + 8 <= len(data) - hash_size:
+        signature = data[offset : offset + 4]
+        if signature in UNSUPPORTED_INDEX_EXTENSIONS:
+            msg = f"{UNSUPPORTED_INDEX_EXTENSIONS[signature]} is not supported"
+            raise UnsupportedIndexError(msg)
+        offset += 8 + int.from_bytes(data[offset + 4 : offset + 8], "big")
+    if not names:
+        return []
+    # Decode all names at once, NUL can not be a part of a name
+    return os.fsdecode(b"\0".join(names)).split("\0")
+
+
+def read_git_index(root_dir: Path, untracked_files: bool) -> list[str]:
+    """List files from the git index, falls back to git for unsupported formats of the index."""
+    try:
+        git_dir = get_git_dir(root_dir)
+        files = parse_git_index((git_dir / "index").read_bytes(), get_hash_size(git_dir))
+    except (OSError, UnsupportedIndexError):
+        return git_ls_files(root_dir, untracked_files)
+    if untracked_files:
+        files += split_paths(run_git(root_dir, "ls-files", "-z", "--others", "--exclude-standard"))
+    return files
+
+
+def scandir_files(root_dir: Path) -> list[str]:
+    """List all files in the directory and subdirectories except `.git`, symlinks to directories are not followed."""
+    files: list[str] = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = os.scandir(root_dir / rel_dir)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != ".git":
+                        stack.append(rel_path)
+                else:
+                    files.append(rel_path)
+    files.sort()
+    return files
+
+
+def list_files(root_dir: Path, backend: Backend, untracked_files: bool) -> list[str]:
+    """Returns posix paths of files in the repository relative to the root directory."""
+    if backend == Backend.INDEX:
+        return read_git_index(root_dir, untracked_files)
+    if backend == Backend.SCANDIR:
+        return scandir_files(root_dir)
+    return git_ls_files(root_dir, untracked_files)
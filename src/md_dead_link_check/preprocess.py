@@ -1,11 +1,34 @@
 from __future__ import annotations
 
+import os
+import posixpath
 import re
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from dataclasses import field
+from enum import Enum
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
-
-from git import Repo
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from md_dead_link_check.cache import CompactMarkdownInfo
+from md_dead_link_check.cache import IndexedLink
+from md_dead_link_check.cache import LinkIndex
+from md_dead_link_check.cache import ParseCache
+from md_dead_link_check.config import get_tool_version
+from md_dead_link_check.listing import Backend
+from md_dead_link_check.listing import get_root_dir
+from md_dead_link_check.listing import list_files
+from md_dead_link_check.stats import STATS
+
+if TYPE_CHECKING:
+    # GitPython is imported only for the parse cache and the link index, it slows down startup
+    from git import Repo
 
 RE_HEADER = r"^(?:\s*[-+*]\s+|)[#]{1,6}\s*(.*?)\s*[#]*$"
 RE_URL = r"(http[s]?://[^>)\]\s\"]+)"
@@ -20,6 +43,13 @@ MD_TAG_DISABLE = "<!-- md-dead-link-check: off -->"
 MD_TAG_ENABLE = "<!-- md-dead-link-check: on -->"
 PLACEHOLDER = "MD_DEAD_LINK_CHECK_PLACEHOLDER"
 
+# Increase the version if the parsing rules are changed to invalidate the parse cache
+PARSER_VERSION = 2
+
+# Parallel parsing is used only for repositories with enough number of markdown files
+PARALLEL_MIN_FILES = 200
+PARALLEL_MIN_FILES_PER_JOB = 50
+
 
 @dataclass
 class LinkInfo:
@@ -35,11 +65,100 @@ class LinkInfo:
         return self.location < other.location or (self.location == other.location and self.line_num < other.line_num)
 
 
+class AnchorIndex:
+    """Ordered collection of fragments of a markdown file.
+    Uses a set to check existence of fragments and counters of repeated headers to generate
+    unique fragments like `header-1`, `header-2` without scanning of all previous fragments.
+    """
+
+    __slots__ = ["_fragments", "_lookup", "_repeats"]
+
+    def __init__(self, fragments: Iterable[str] = ()) -> None:
+        self._fragments: list[str] = []
+        self._lookup: set[str] = set()
+        self._repeats: dict[str, int] = {}
+        for fragment in fragments:
+            self.add(fragment)
+
+    def add(self, fragment: str) -> None:
+        self._fragments.append(fragment)
+        self._lookup.add(fragment)
+
+    def add_header(self, fragment: str) -> str:
+        """Add fragment of header, repeated fragments get numeric suffix. Returns added fragment."""
+        repeat = self._repeats.get(fragment, 0)
+        unique_fragment = f"{fragment}-{repeat}" if repeat else fragment
+        while unique_fragment in self._lookup:
+            repeat += 1
+            unique_fragment = f"{fragment}-{repeat}"
+        self._repeats[fragment] = repeat
+        self.add(unique_fragment)
+        return unique_fragment
+
+    def __contains__(self, fragment: object) -> bool:
+        return fragment in self._lookup
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fragments)
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, AnchorIndex):
+            return self._fragments == other._fragments
+        if isinstance(other, list):
+            return self._fragments == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AnchorIndex({self._fragments!r})"
+
+
 @dataclass
 class MarkdownInfo:
     path: Path
-    fragments: list[str] = field(default_factory=lambda: [])
+    fragments: AnchorIndex = field(default_factory=AnchorIndex)
     links: list[LinkInfo] = field(default_factory=lambda: [])
+    # Number of lines of the parsed file, 0 if the data is loaded from the cache
+    num_lines: int = field(default=0, compare=False)
+
+
+class RepoFiles:
+    """Index of files in the repository.
+    Stores posix paths of files and all their parent directories to check existence of path in constant time.
+    """
+
+    __slots__ = ["files", "dirs"]
+
+    def __init__(self, files: Iterable[str]) -> None:
+        self.files: set[str] = set()
+        self.dirs: set[str] = set()
+        for file_path in files:
+            self.add(file_path)
+
+    def add(self, file_path: str) -> None:
+        self.files.add(file_path)
+        if not file_path:
+            return
+        self.dirs.add(".")
+        while "/" in file_path:
+            file_path = file_path.rsplit("/", 1)[0]
+            if file_path in self.dirs:
+                # All parents are already added
+                break
+            self.dirs.add(file_path)
+
+    def discard(self, file_path: str) -> None:
+        """Remove the file from the index, parent directories are kept."""
+        self.files.discard(file_path)
+
+    def __contains__(self, path: str) -> bool:
+        """Check that path is a file or a directory with files in the repository."""
+        return path in self.files or path in self.dirs
+
+    def __len__(self) -> int:
+        return len(self.files)
 
 
 def find_all_markdowns(all_files: list[str]) -> list[Path]:
@@ -52,6 +171,7 @@ def find_all_markdowns(all_files: list[str]) -> list[Path]:
     return ret
 
 
+@lru_cache(maxsize=4096)
 def process_header_to_fragment(header: str) -> str:
     """Converts a Markdown header to a URL fragment."""
     fragment = header.strip()
@@ -74,8 +194,8 @@ def process_header_to_fragment(header: str) -> str:
     return "".join(filter(filter_header_symbols, fragment))
 
 
-def detect_headers(line: str, fragments: list[str]) -> None:
-    """Detect headers in a line and add to the list."""
+def detect_headers(line: str, fragments: AnchorIndex) -> None:
+    """Detect headers in a line and add to the index."""
 
     # Keep text in \< \>
     # Example:
@@ -90,13 +210,7 @@ def detect_headers(line: str, fragments: list[str]) -> None:
 
     res = re.match(RE_HEADER, line)
     if res:
-        _fragment = process_header_to_fragment(res.group(1))
-        fragment = _fragment
-        repeat = 0
-        while fragment in fragments:
-            repeat += 1
-            fragment = f"{_fragment}-{repeat}"
-        fragments.append(fragment)
+        fragments.add_header(process_header_to_fragment(res.group(1)))
 
     # Skip $ and ` tags
     line = re.sub(RE_SUB, "", line)
@@ -104,7 +218,7 @@ def detect_headers(line: str, fragments: list[str]) -> None:
     # Detect id under a tag <a id="introduction"></a>
     matches = re.findall(RE_HTML_TAG_ID, line)
     for _, id in matches:
-        fragments.append(id.lower())
+        fragments.add(id.lower())
 
 
 def detect_links(line: str) -> list[str]:
@@ -146,38 +260,197 @@ def detect_links(line: str) -> list[str]:
     return ret
 
 
-def process_md_file(path: Path, root_dir: Path) -> MarkdownInfo:
-    fragments: list[str] = []
+class Engine(str, Enum):
+    """Implementation of detection of headers and links in lines of markdown files."""
+
+    # Single pass scanner
+    SCANNER = "scanner"
+    # Reference implementation based on detect_headers and detect_links
+    REGEX = "regex"
+
+
+RE_LINK_TARGET = r"<[^>]*>|[^()\s]+(?:\([^()\s]*\))*"
+RE_INNER_LINK = rf"!?\[[^\]!]*\]\((?:{RE_LINK_TARGET})\s*.*?\)"
+RE_SCAN_HEADER_PREFIX = re.compile(r"\s*(?:[-+*]\s+)?#")
+RE_SCAN_BRACKET_URL = re.compile(r"<(http[s]?://[^>\s]+)>")
+RE_SCAN_TAG_ID = re.compile(RE_HTML_TAG_ID)
+RE_SCAN_TAG_HREF = re.compile(RE_HTML_TAG_HREF)
+RE_SCAN_URL_TAG_NAME = re.compile(r"<\w+$")
+RE_SCAN = re.compile(
+    # Link in angle brackets <http://link>
+    r"<(?P<bracket>http[s]?://[^>\s]+)>"
+    # Link or image [text](link "title")
+    rf"|!?\[(?P<text>[^\]!]*)\]\((?P<target>{RE_LINK_TARGET})\s*(?P<title>.*?)\)"
+    # Link with nested images [![text](img)](link)
+    rf"|\[(?P<nested_text>(?:{RE_INNER_LINK}|[^\]!])*)\]\((?P<nested_target>{RE_LINK_TARGET})\s*(?P<nested_title>.*?)\)"
+    # Html tag with attributes <a href="link" id="id">, quoted values of attributes can contain `>` and `<`
+    r"""|(?P<tag><\w+\s(?:"[^"]*"|'[^']*'|[^<>])*)"""
+    # Simple url
+    r"|(?P<url>http[s]?://[^>)\]\s\"]+)"
+)
+
+
+@dataclass
+class ScannedLine:
+    header: str | None = None
+    ids: list[str] = field(default_factory=lambda: [])
+    links: list[str] = field(default_factory=lambda: [])
+    disable: bool = False
+    enable: bool = False
+
+
+@dataclass
+class _ScanTokens:
+    """Links grouped by kind in the same order as they are returned by detect_links."""
+
+    brackets: list[str] = field(default_factory=lambda: [])
+    links: list[str] = field(default_factory=lambda: [])
+    # Targets of links with nested images as they are written in the line
+    nested_targets: list[str] = field(default_factory=lambda: [])
+    hrefs: list[str] = field(default_factory=lambda: [])
+    # Simple urls and the text from the start of the url to the end of the line
+    urls: list[tuple[str, str]] = field(default_factory=lambda: [])
+    ids: list[str] = field(default_factory=lambda: [])
+    # Targets of other links, simple urls that start with them are not detected as in detect_links
+    skip_urls: set[str] = field(default_factory=lambda: set())
+    # Targets of other links as they are written in the line
+    link_targets: set[str] = field(default_factory=lambda: set())
+
+    @staticmethod
+    def get_link(target: str) -> str:
+        return target[1:-1] if target.startswith("<") and target.endswith(">") else target
+
+    def add_target(self, target: str, links: list[str]) -> None:
+        if RE_SCAN_BRACKET_URL.fullmatch(target):
+            self.brackets.append(target[1:-1])
+        else:
+            links.append(self.get_link(target))
+        self.skip_urls.add(target)
+
+
+def _scan(line: str, tokens: _ScanTokens, start: int = 0, end: int | None = None) -> None:
+    """Scan the part of the line from start to end, parts of links are scanned recursively."""
+    pos = start
+    endpos = len(line) if end is None else end
+    # Span of the value of the last href, simple urls in it are not detected
+    href_start, href_end = 0, 0
+    while True:
+        match = RE_SCAN.search(line, pos, endpos)
+        if match is None:
+            return
+        pos = match.end()
+        if match["bracket"] is not None:
+            tokens.brackets.append(match["bracket"])
+        elif match["target"] is not None:
+            tokens.add_target(match["target"], tokens.links)
+            tokens.link_targets.add(match["target"])
+            _scan(line, tokens, *match.span("text"))
+            _scan(line, tokens, *match.span("title"))
+        elif match["nested_target"] is not None:
+            target = match["nested_target"]
+            if RE_SCAN_BRACKET_URL.fullmatch(target):
+                tokens.add_target(target, tokens.links)
+            else:
+                tokens.nested_targets.append(target)
+                tokens.skip_urls.add(target)
+            _scan(line, tokens, *match.span("nested_text"))
+            _scan(line, tokens, *match.span("nested_title"))
+        elif match["tag"] is not None:
+            tag = match["tag"]
+            res = RE_SCAN_TAG_ID.match(tag)
+            if res:
+                tokens.ids.append(res.group(2))
+            res = RE_SCAN_TAG_HREF.match(tag)
+            if res:
+                tokens.hrefs.append(res.group(2))
+                tokens.skip_urls.add(res.group(2))
+                href_start, href_end = match.start() + res.start(2), match.start() + res.end(2)
+            # Links in other attributes of the tag and after it are scanned from the name of the tag
+            pos = match.start() + 1
+        elif not href_start < match.start() < href_end:
+            # Text from the start of the url is kept to compare it with targets of other links
+            tokens.urls.append((match["url"].rstrip(",.:"), line[match.start() :]))
+            # Name of html tag that follows the url without space is a part of the url
+            res = RE_SCAN_URL_TAG_NAME.search(match["url"])
+            if res:
+                pos = match.start() + res.start()
+
+
+def scan_line(line: str) -> ScannedLine:
+    """Detect headers, ids of html tags and links in a line by one pass of the scanner.
+    Returns the same results as detect_headers and detect_links.
+    """
+    ret = ScannedLine()
+    if "#" in line and RE_SCAN_HEADER_PREFIX.match(line):
+        header_line = re.sub(r"\\<(.*?)\\>", r"\1", line)
+        header_line = re.sub(r"(?<!\\)<(http[s]?://[^>\s]+)(?<!\\)>", r"\1", header_line)
+        res = re.match(RE_HEADER, header_line)
+        if res:
+            ret.header = res.group(1)
+
+    if "`" in line or "$" in line:
+        # Skip $ and ` tags
+        line = re.sub(RE_SUB, "", line)
+    if "<" not in line and "[" not in line and "://" not in line:
+        return ret
+
+    ret.disable = MD_TAG_DISABLE in line
+    ret.enable = MD_TAG_ENABLE in line
+
+    tokens = _ScanTokens()
+    _scan(line, tokens)
+    ret.ids = tokens.ids
+    # Targets of nested links are replaced by detect_links if they are the same as targets of other links
+    nested = [tokens.get_link(t) for t in tokens.nested_targets if t not in tokens.link_targets]
+    ret.links = tokens.brackets + tokens.links + nested + tokens.hrefs
+    skip_prefixes = tuple(target for target in tokens.skip_urls if target)
+    ret.links.extend(url for url, rest in tokens.urls if not rest.startswith(skip_prefixes))
+    return ret
+
+
+def process_md_file(path: Path, root_dir: Path, engine: Engine = Engine.SCANNER) -> MarkdownInfo:
+    fragments = AnchorIndex()
     links: list[LinkInfo] = []
     with (root_dir / path).open(encoding="utf8") as stream:
+        lines = stream.readlines()
         in_code_block = ""
         disable_detection_links = False
-        for line_num, line in enumerate(stream.readlines(), 1):
+        for line_num, line in enumerate(lines, 1):
             striped_line = line.strip()
             # Skip code blocks that can be start ``` or ````
-            res = re.match(r"^(`{3,4})(.+)`{3,4}\s*$", striped_line)
-            if res:
-                continue
-            res = re.match(r"^(`{3,4})", striped_line)
-            if res and not in_code_block:
-                in_code_block = res.group(1)
-                continue
+            if striped_line.startswith("```"):
+                res = re.match(r"^(`{3,4})(.+)`{3,4}\s*$", striped_line)
+                if res:
+                    continue
+                res = re.match(r"^(`{3,4})", striped_line)
+                if res and not in_code_block:
+                    in_code_block = res.group(1)
+                    continue
             if striped_line.startswith(in_code_block):
                 in_code_block = ""
             if in_code_block:
                 continue
 
-            # Detect headers
-            detect_headers(line, fragments)
-
-            # Skip $ and ` tags
-            line = re.sub(RE_SUB, "", line)
-
-            if MD_TAG_DISABLE in line:
+            if engine == Engine.SCANNER:
+                scanned_line = scan_line(line)
+                if scanned_line.header is not None:
+                    fragments.add_header(process_header_to_fragment(scanned_line.header))
+                for id in scanned_line.ids:
+                    fragments.add(id.lower())
+                disable_tag, enable_tag = scanned_line.disable, scanned_line.enable
+            else:
+                # Detect headers
+                detect_headers(line, fragments)
+
+                # Skip $ and ` tags
+                line = re.sub(RE_SUB, "", line)
+                disable_tag, enable_tag = MD_TAG_DISABLE in line, MD_TAG_ENABLE in line
+
+            if disable_tag:
                 disable_detection_links = True
                 continue
 
-            if MD_TAG_ENABLE in line:
+            if enable_tag:
                 disable_detection_links = False
                 continue
 
@@ -185,25 +458,257 @@ def process_md_file(path: Path, root_dir: Path) -> MarkdownInfo:
                 continue
 
             # Detect links
-            links_in_line = detect_links(line)
+            links_in_line = scanned_line.links if engine == Engine.SCANNER else detect_links(line)
             links.extend(LinkInfo(link, path, line_num) for link in links_in_line)
 
-    return MarkdownInfo(path=path, fragments=fragments, links=links)
+    return MarkdownInfo(path=path, fragments=fragments, links=links, num_lines=len(lines))
+
+
+def compress_md_info(md_info: MarkdownInfo) -> CompactMarkdownInfo:
+    """Converts MarkdownInfo to compact representation without repeated paths."""
+    return list(md_info.fragments), [(li.link, li.line_num) for li in md_info.links]
+
+
+def decompress_md_info(path: Path, data: CompactMarkdownInfo) -> MarkdownInfo:
+    """Restores MarkdownInfo from compact representation."""
+    fragments, links = data
+    return MarkdownInfo(path, AnchorIndex(fragments), [LinkInfo(link, path, line_num) for link, line_num in links])
+
 
+def _process_md_file_compact(path: str, root_dir: Path) -> tuple[CompactMarkdownInfo, int]:
+    """Entry point for worker processes, returns compact data and number of lines of the file."""
+    md_info = process_md_file(Path(path), root_dir)
+    return compress_md_info(md_info), md_info.num_lines
+
+
+def get_num_jobs(jobs: int, num_files: int) -> int:
+    """Returns number of processes to parse files, parallel parsing is disabled for small repositories."""
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    if num_files < PARALLEL_MIN_FILES:
+        return 1
+    return max(min(jobs, num_files // PARALLEL_MIN_FILES_PER_JOB), 1)
+
+
+def process_md_files(md_files: list[Path], root_dir: Path, jobs: int = 1) -> dict[str, MarkdownInfo]:
+    """Parse markdown files, uses pool of processes if jobs is not equal to 1.
+    Set jobs to 0 to use all available CPU cores.
+    """
+    jobs = get_num_jobs(jobs, len(md_files))
+    md_data: dict[str, MarkdownInfo] = {}
+    if jobs == 1:
+        md_data = {md_file.as_posix(): process_md_file(md_file, root_dir) for md_file in md_files}
+    else:
+        # Split files into several chunks per process to balance load of processes
+        chunksize = max(len(md_files) // (jobs * 4), 1)
+        posix_paths = [md_file.as_posix() for md_file in md_files]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = executor.map(_process_md_file_compact, posix_paths, repeat(root_dir), chunksize=chunksize)
+            for posix_path, md_file, (data, num_lines) in zip(posix_paths, md_files, results, strict=True):
+                md_info = decompress_md_info(md_file, data)
+                md_info.num_lines = num_lines
+                md_data[posix_path] = md_info
+
+    if STATS.enabled:
+        STATS.num_files += len(md_data)
+        STATS.num_lines += sum(md_info.num_lines for md_info in md_data.values())
+    return md_data
+
+
+def get_parse_cache_version() -> str:
+    return f"{get_tool_version()}:{PARSER_VERSION}"
+
+
+def open_repo(root_dir: Path) -> Repo:
+    """Open the git repository, GitPython is imported on first use."""
+    from git import Repo
+
+    return Repo(root_dir)
+
+
+def get_parse_cache_keys(repo: Repo, md_files: list[Path]) -> dict[str, str]:
+    """Returns keys of markdown files for the parse cache.
+    Git blob hash is used for files that are not modified in the working tree,
+    otherwise key contains path, modification time and size of the file.
+    """
+    blob_hashes: dict[str, str] = {}
+    for line in repo.git.ls_files("--stage").splitlines():
+        info, file_path = line.split("\t", 1)
+        _mode, blob_hash, stage = info.split()
+        if stage == "0":
+            blob_hashes[file_path] = blob_hash
+    for file_path in repo.git.ls_files("--modified").splitlines():
+        blob_hashes.pop(file_path, None)
 
-def preprocess_repository(untracked_files: bool) -> tuple[dict[str, MarkdownInfo], Path, list[Path]]:
-    repo = Repo(search_parent_directories=True)
     root_dir = Path(repo.working_dir)
+    ret: dict[str, str] = {}
+    for md_file in md_files:
+        posix_path = md_file.as_posix()
+        if posix_path in blob_hashes:
+            ret[posix_path] = f"blob:{blob_hashes[posix_path]}"
+        else:
+            stat = (root_dir / md_file).stat()
+            ret[posix_path] = f"stat:{posix_path}:{stat.st_mtime_ns}:{stat.st_size}"
+    return ret
 
-    all_files: list[str] = repo.git.ls_files().splitlines()
-    if untracked_files:
-        all_files += repo.untracked_files
 
-    list_md_files = find_all_markdowns(all_files)
-    md_data = {}
-    for md_file in list_md_files:
-        md_info = process_md_file(md_file, root_dir)
-        md_data[md_file.as_posix()] = md_info
+def process_md_files_with_cache(
+    md_files: list[Path], repo: Repo, jobs: int, parse_cache: Path
+) -> dict[str, MarkdownInfo]:
+    """Parse only markdown files that are changed since the previous run."""
+    cache = ParseCache(parse_cache, get_parse_cache_version())
+    keys = get_parse_cache_keys(repo, md_files)
 
-    files_in_repo = [Path(x) for x in all_files]
+    md_data: dict[str, MarkdownInfo] = {}
+    files_to_parse: list[Path] = []
+    for md_file in md_files:
+        data = cache.get(keys[md_file.as_posix()])
+        if data is None:
+            files_to_parse.append(md_file)
+        else:
+            md_data[md_file.as_posix()] = decompress_md_info(md_file, data)
+
+    if STATS.enabled:
+        STATS.num_cached_files += len(md_data)
+    parsed_data = process_md_files(files_to_parse, Path(repo.working_dir), jobs)
+    for posix_path, md_info in parsed_data.items():
+        cache.set(keys[posix_path], compress_md_info(md_info))
+    cache.save()
+
+    md_data.update(parsed_data)
+    # Keep order of files
+    return {md_file.as_posix(): md_data[md_file.as_posix()] for md_file in md_files}
+
+
+def resolve_link_target(link: str, source: str) -> str | None:
+    """Returns normalized path of the file that the internal link points to, relative to the repository root.
+    Returns None for web links and links that can not be parsed.
+    """
+    try:
+        split_result = urlsplit(link)
+    except ValueError:
+        return None
+    if split_result.scheme or split_result.netloc:
+        return None
+    if not split_result.path:
+        return source
+    if split_result.path.startswith("/"):
+        return posixpath.normpath(split_result.path[1:])
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), split_result.path))
+
+
+def refresh_link_index(index: LinkIndex, md_files: list[Path], repo: Repo, jobs: int) -> dict[str, MarkdownInfo]:
+    """Parse markdown files changed since the previous update of the index and remove deleted files.
+    Returns parsed data of changed files.
+    """
+    keys = get_parse_cache_keys(repo, md_files)
+    stored_keys = index.get_keys()
+    stale_files = [md_file for md_file in md_files if stored_keys.get(md_file.as_posix()) != keys[md_file.as_posix()]]
+    index.remove_many(stored_keys.keys() - keys.keys())
+
+    parsed_data = process_md_files(stale_files, Path(repo.working_dir), jobs)
+    index.put_many(
+        (
+            posix_path,
+            keys[posix_path],
+            compress_md_info(md_info),
+            [resolve_link_target(li.link, posix_path) for li in md_info.links],
+        )
+        for posix_path, md_info in parsed_data.items()
+    )
+    return parsed_data
+
+
+def process_md_files_with_index(
+    md_files: list[Path], repo: Repo, jobs: int, link_index: Path
+) -> dict[str, MarkdownInfo]:
+    """Load markdown files from the link index, only changed files are parsed."""
+    with LinkIndex(link_index, get_parse_cache_version()) as index:
+        parsed_data = refresh_link_index(index, md_files, repo, jobs)
+        stored_data = index.load()
+    if STATS.enabled:
+        STATS.num_cached_files += len(md_files) - len(parsed_data)
+    return {
+        md_file.as_posix(): parsed_data.get(md_file.as_posix())
+        or decompress_md_info(md_file, stored_data[md_file.as_posix()])
+        for md_file in md_files
+    }
+
+
+class LazyMarkdownData(Mapping[str, MarkdownInfo]):
+    """Mapping of markdown files in the repository to parsed data, files are parsed on first access."""
+
+    def __init__(self, md_files: list[Path], root_dir: Path) -> None:
+        self.root_dir = root_dir
+        self._paths = {md_file.as_posix(): md_file for md_file in md_files}
+        self._parsed: dict[str, MarkdownInfo] = {}
+
+    def __getitem__(self, key: str) -> MarkdownInfo:
+        md_info = self._parsed.get(key)
+        if md_info is None:
+            md_info = process_md_file(self._paths[key], self.root_dir)
+            self._parsed[key] = md_info
+        return md_info
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    @property
+    def parsed_files(self) -> list[str]:
+        """Returns list of files that have been parsed."""
+        return list(self._parsed)
+
+
+def update_link_index(untracked_files: bool, jobs: int, link_index: Path, backend: Backend = Backend.GIT) -> LinkIndex:
+    """Update the link index of the repository without loading parsed data, returns the opened index."""
+    root_dir = get_root_dir(backend)
+    md_files = find_all_markdowns(list_files(root_dir, backend, untracked_files))
+    index = LinkIndex(link_index, get_parse_cache_version())
+    refresh_link_index(index, md_files, open_repo(root_dir), jobs)
+    return index
+
+
+def find_links_to(index: LinkIndex, target: str) -> list[IndexedLink]:
+    """Returns links to the path relative to the repository root, the path can contain a fragment after `#`."""
+    path, _, fragment = target.partition("#")
+    links: list[IndexedLink] = index.links_to(posixpath.normpath(path.lstrip("/")), fragment or None)
+    return links
+
+
+def preprocess_repository(
+    untracked_files: bool,
+    jobs: int = 1,
+    parse_cache: Path | None = None,
+    lazy: bool = False,
+    link_index: Path | None = None,
+    backend: Backend = Backend.GIT,
+) -> tuple[Mapping[str, MarkdownInfo], Path, RepoFiles]:
+    """Collect files of the repository and parse markdown files.
+    If lazy is True, markdown files are parsed only on access to the data of the file.
+    If the link index is set, data of unchanged files is loaded from the index.
+    Parse cache and link index require a git repository to detect changed files.
+    """
+    root_dir = get_root_dir(backend)
+
+    with STATS.phase("list files"):
+        all_files = list_files(root_dir, backend, untracked_files)
+        list_md_files = find_all_markdowns(all_files)
+        files_in_repo = RepoFiles(all_files)
+
+    md_data: Mapping[str, MarkdownInfo]
+    with STATS.phase("parse markdown"):
+        if lazy:
+            md_data = LazyMarkdownData(list_md_files, root_dir)
+        elif link_index is not None:
+            md_data = process_md_files_with_index(list_md_files, open_repo(root_dir), jobs, link_index)
+        elif parse_cache is not None:
+            md_data = process_md_files_with_cache(list_md_files, open_repo(root_dir), jobs, parse_cache)
+        else:
+            md_data = process_md_files(list_md_files, root_dir, jobs)
     return md_data, root_dir, files_in_repo
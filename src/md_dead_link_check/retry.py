@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import random
+from enum import Enum
+
+from md_dead_link_check.config import DEFAULT_RETRY_ATTEMPTS
+from md_dead_link_check.config import Config
+
+
+class RetryReason(str, Enum):
+    """Classes of transient failures that can be retried, keys of `retry_attempts` option."""
+
+    TIMEOUT = "timeout"
+    CONNECTION = "connection"
+    SERVER_ERROR = "server_error"
+    TOO_MANY_REQUESTS = "too_many_requests"
+
+
+def get_retry_reason(status_code: int) -> RetryReason | None:
+    """Returns class of the failure by status code of the response."""
+    if status_code == 429:
+        return RetryReason.TOO_MANY_REQUESTS
+    if status_code >= 500:
+        return RetryReason.SERVER_ERROR
+    return None
+
+
+class RetryPolicy:
+    """Decides whether to retry failed requests.
+
+    Number of attempts is limited for each class of failures, and the total number of retries
+    in the run is limited by the budget, except retries of 429 responses. Delays grow exponentially
+    with random jitter, so retries of many links are spread in time.
+    """
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.attempts = {**DEFAULT_RETRY_ATTEMPTS, **config.retry_attempts}
+        self.num_retries = 0
+        self.exhausted = False
+
+    def get_delay(self, reason: RetryReason, attempt: int, retry_after: float | None = None) -> float | None:
+        """Returns delay before the next attempt or None if the request should not be retried.
+        Attempt is number of the failed attempts with the same reason.
+        """
+        if attempt > self.attempts[reason.value]:
+            return None
+        if retry_after is not None and retry_after > self.config.retry_max_backoff:
+            # Server asks to wait longer than allowed
+            return None
+        if reason != RetryReason.TOO_MANY_REQUESTS:
+            # Retries of 429 responses are paced by the limiter of the domain, so one rate limited domain
+            # does not use the budget of retries of other domains
+            if self.num_retries >= self.config.retry_budget:
+                self.exhausted = True
+                return None
+            self.num_retries += 1
+
+        backoff: float = min(self.config.retry_backoff * 2.0 ** (attempt - 1), self.config.retry_max_backoff)
+        delay = backoff / 2 + random.uniform(0, backoff / 2)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def print_summary(self) -> None:
+        if self.exhausted:
+            print(
+                f"Retry budget exhausted: {self.num_retries} failed requests were retried, "
+                "other failures are reported without retries (see `retry_budget` option)."
+            )
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from urllib.parse import urlsplit
+
+# Number of the slowest links in the report
+NUM_SLOWEST_LINKS = 10
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Returns percentile of sorted values by nearest-rank method."""
+    if not values:
+        return 0.0
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+@dataclass
+class DomainStats:
+    latencies: list[float] = field(default_factory=lambda: [])
+    throttle_sleep: float = 0.0
+
+
+class Stats:
+    """Collector of timings of phases and web requests for the `--stats` report.
+
+    Collection is disabled by default, instrumented code checks the `enabled` flag before
+    measurements, so the cost of disabled statistics is one attribute lookup.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.reset()
+
+    def reset(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.num_files = 0
+        self.num_lines = 0
+        self.num_cached_files = 0
+        self.retry_sleep = 0.0
+        self.domains: dict[str, DomainStats] = {}
+        self.slowest: list[tuple[float, str]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measure wall time of the phase, time of repeated phases is summed up."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_request(self, link: str, duration: float) -> None:
+        domain = urlsplit(link).netloc
+        self.domains.setdefault(domain, DomainStats()).latencies.append(duration)
+        self.slowest.append((duration, link))
+        if len(self.slowest) > 4 * NUM_SLOWEST_LINKS:
+            self.slowest = sorted(self.slowest, reverse=True)[:NUM_SLOWEST_LINKS]
+
+    def add_throttle_sleep(self, domain: str, duration: float) -> None:
+        self.domains.setdefault(domain, DomainStats()).throttle_sleep += duration
+
+    def print_report(self) -> None:
+        print("\nStatistics:")
+        print(f"{'Phase':<24} {'Time, s':>9}")
+        for name, duration in self.phases.items():
+            line = f"{name:<24} {duration:>9.3f}"
+            if name == "parse markdown" and duration > 0:
+                line += (
+                    f"  ({self.num_files} files parsed, {self.num_files / duration:.0f} files/s, "
+                    f"{self.num_lines / duration:.0f} lines/s"
+                )
+                line += f", {self.num_cached_files} files from cache)" if self.num_cached_files else ")"
+            print(line)
+        if self.retry_sleep:
+            print(f"{'retry backoff':<24} {self.retry_sleep:>9.3f}  (sum over requests)")
+
+        if self.domains:
+            print(f"\n{'Domain':<32} {'Requests':>8} {'p50, s':>8} {'p95, s':>8} {'max, s':>8} {'Sleep, s':>9}")
+            for domain, domain_stats in sorted(self.domains.items(), key=lambda x: -len(x[1].latencies)):
+                latencies = sorted(domain_stats.latencies)
+                print(
+                    f"{domain:<32} {len(latencies):>8} {percentile(latencies, 50):>8.3f} "
+                    f"{percentile(latencies, 95):>8.3f} {percentile(latencies, 100):>8.3f} "
+                    f"{domain_stats.throttle_sleep:>9.3f}"
+                )
+        if self.slowest:
+            print("\nSlowest links:")
+            for duration, link in sorted(self.slowest, reverse=True)[:NUM_SLOWEST_LINKS]:
+                print(f"{duration:>8.3f} s  {link}")
+
+
+# Statistics of the current run, enabled by `--stats` argument
+STATS = Stats()
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from fnmatch import fnmatch
+from urllib.parse import urlsplit
+
+from md_dead_link_check.config import Config
+
+# Rate is multiplied by the factor after response with 429 status
+DECREASE_FACTOR = 0.5
+TOKEN_TOLERANCE = 1e-9
+# Minimal time in seconds between decreases of the rate, 429 responses in one burst decrease the rate once
+DECREASE_WINDOW = 1.0
+# Part of the configured rate that is added to the rate after successful response
+INCREASE_STEP = 0.1
+# Minimal rate as a part of the configured rate
+MIN_RATE_FACTOR = 0.05
+# Default maximal rate as a multiple of the configured rate
+MAX_RATE_FACTOR = 4.0
+
+
+@dataclass
+class ThrottleSettings:
+    # Requests per second, `inf` to disable throttling
+    rate: float
+    # Number of requests that can be sent without delay
+    burst: int
+    # Limit of the rate after increasing on successful responses
+    max_rate: float
+    # Maximum number of simultaneous requests to the domain, 0 means no limit
+    max_concurrency: int
+    # Maximum delay of a request from the start of checks
+    max_delay: float
+
+
+def get_throttle_settings(domain: str, config: Config) -> ThrottleSettings:
+    """Returns settings for the domain from the first matched pattern in `throttle_domains`,
+    otherwise default settings based on `throttle_*` options.
+    """
+    rate = config.throttle_groups / config.throttle_delay if config.throttle_delay else math.inf
+    settings = ThrottleSettings(
+        rate=rate,
+        burst=config.throttle_groups,
+        max_rate=rate * MAX_RATE_FACTOR,
+        max_concurrency=config.throttle_max_concurrency,
+        max_delay=config.throttle_max_delay,
+    )
+    for pattern, overrides in config.throttle_domains.items():
+        if fnmatch(domain, pattern):
+            for key, value in overrides.items():
+                setattr(settings, key, value)
+            if "rate" in overrides and "max_rate" not in overrides:
+                settings.max_rate = settings.rate * MAX_RATE_FACTOR
+            break
+    settings.max_rate = max(settings.max_rate, settings.rate)
+    return settings
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Returns number of seconds from Retry-After header, that can be set by number or by date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_date.timestamp() - time.time(), 0.0)
+
+
+class DomainLimiter:
+    """Adaptive limiter of requests to one domain.
+
+    Uses a token bucket with the capacity of `burst` requests that is refilled with the current rate.
+    Waiting requests are admitted in FIFO order and time to wait is computed again after every wake-up,
+    so changes of the rate apply to requests that are already waiting. The rate is adapted by AIMD:
+    it is decreased multiplicatively on 429 responses at most once per window, requests are paused
+    for time from Retry-After header, and the rate is increased additively on successful responses.
+    """
+
+    def __init__(
+        self,
+        settings: ThrottleSettings,
+        start_time: float,
+        clock: Callable[[], float] | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.settings = settings
+        self.rate = settings.rate
+        self.deadline = start_time + settings.max_delay
+        self.paused_until = 0.0
+        self.tokens = float(settings.burst)
+        self._updated = start_time
+        self._decreased_at = -math.inf
+        self._clock = clock if clock is not None else asyncio.get_running_loop().time
+        self._sleep = sleep
+        self._queue = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(settings.max_concurrency) if settings.max_concurrency else None
+        self.num_requests = 0
+        self.num_429 = 0
+        self.sleep_time = 0.0
+        self.max_wait = 0.0
+        self.min_rate = self.rate
+        self.start_time = start_time
+
+    def _refill(self, now: float) -> None:
+        if now <= self._updated:
+            return
+        if not math.isinf(self.rate):
+            self.tokens = min(self.tokens + (now - self._updated) * self.rate, float(self.settings.burst))
+        self._updated = now
+
+    def _get_wait(self, now: float) -> float:
+        """Returns time to wait for the next request, takes a token if the request can be sent now."""
+        if now >= self.deadline:
+            # Requests are not delayed longer than max_delay
+            return 0.0
+        if self.paused_until > now:
+            return min(self.paused_until, self.deadline) - now
+        self._refill(now)
+        if math.isinf(self.rate):
+            return 0.0
+        # Tolerance for rounding errors of the refill after waiting
+        if self.tokens >= 1 - TOKEN_TOLERANCE:
+            self.tokens = max(self.tokens - 1, 0.0)
+            return 0.0
+        return min((1 - self.tokens) / self.rate, self.deadline - now)
+
+    async def acquire(self) -> float:
+        """Wait for the slot of the request, returns time when the request is allowed."""
+        enter_time = self._clock()
+        async with self._queue:
+            while True:
+                wait = self._get_wait(self._clock())
+                if wait <= 0:
+                    break
+                await self._sleep(wait)
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        now = self._clock()
+        self.sleep_time += now - enter_time
+        self.num_requests += 1
+        self.max_wait = max(self.max_wait, now - self.start_time)
+        return now
+
+    def release(self) -> None:
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+    def on_response(self, status: int | None, retry_after: float | None = None, sent_at: float | None = None) -> None:
+        """Adapt the rate of requests depending on the response status, sent_at is the time returned by `acquire`.
+        Without throttling of the domain (infinite rate) only Retry-After header is used.
+        """
+        now = self._clock()
+        self._refill(now)
+        if status == 429:
+            self.num_429 += 1
+            # Responses to requests that were sent before the previous decrease were caused by the old rate
+            if now - self._decreased_at >= DECREASE_WINDOW and (sent_at is None or sent_at >= self._decreased_at):
+                self.rate = max(self.rate * DECREASE_FACTOR, self.settings.rate * MIN_RATE_FACTOR)
+                self._decreased_at = now
+                # Do not send the rest of the burst after the limit of the server is reached
+                self.tokens = min(self.tokens, 1.0)
+            if retry_after is not None:
+                self.paused_until = max(self.paused_until, now + retry_after)
+                # Tokens are not accumulated while requests are paused
+                self._updated = max(self._updated, self.paused_until)
+        elif status is not None and status < 400 and not math.isinf(self.rate):
+            self.rate = min(self.rate + self.settings.rate * INCREASE_STEP, self.settings.max_rate)
+        self.min_rate = min(self.min_rate, self.rate)
+
+
+class Throttler:
+    """Collection of limiters for domains of links."""
+
+    def __init__(self, config: Config) -> None:
+        self.config = config
+        self.start_time = asyncio.get_running_loop().time()
+        self.limiters: dict[str, DomainLimiter] = {}
+
+    def get_limiter(self, link: str) -> DomainLimiter:
+        domain = urlsplit(link).netloc
+        limiter = self.limiters.get(domain)
+        if limiter is None:
+            limiter = DomainLimiter(get_throttle_settings(domain, self.config), self.start_time)
+            self.limiters[domain] = limiter
+        return limiter
+
+    def print_summary(self) -> None:
+        throttled = {d: lim for d, lim in self.limiters.items() if lim.sleep_time > 0 or lim.num_429}
+        if not throttled:
+            return
+        print("Throttling applied to limit request frequency:")
+        for domain, limiter in throttled.items():
+            print(f" - Domain:         {domain}")
+            print(f"   Requests count: {limiter.num_requests}")
+            if limiter.max_wait >= limiter.settings.max_delay:
+                print(f"   Maximum delay:  {limiter.max_wait:.0f} seconds (reached max_delay)")
+            else:
+                print(f"   Maximum delay:  {limiter.max_wait:.0f} seconds")
+            if limiter.num_429:
+                print(f"   429 responses:  {limiter.num_429}")
+                print(f"   Minimal rate:   {limiter.min_rate:.2f} requests per second")
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import re
+from urllib.parse import SplitResult
+from urllib.parse import quote
+from urllib.parse import urlsplit
+from urllib.parse import urlunsplit
+
+from md_dead_link_check.config import Config
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+RE_PERCENT_ENCODED = re.compile(r"%[0-9A-Fa-f]{2}")
+UNRESERVED_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+# Reserved characters of RFC 3986 and `%` are kept as is, other characters are percent-encoded
+SAFE_PATH_CHARS = "/%:@!$&'()*+,;="
+SAFE_QUERY_CHARS = SAFE_PATH_CHARS + "?"
+
+
+def _normalize_escape(match: re.Match[str]) -> str:
+    char = chr(int(match.group(0)[1:], 16))
+    return char if char in UNRESERVED_CHARS else match.group(0).upper()
+
+
+def normalize_percent_encoding(value: str, safe: str) -> str:
+    """Encode characters that are not allowed in URL, decode escaped unreserved characters
+    and use upper case hex digits in other escapes.
+    """
+    return RE_PERCENT_ENCODED.sub(_normalize_escape, quote(value, safe=safe))
+
+
+def normalize_netloc(split_result: SplitResult) -> str:
+    """Lower case host and remove default port, user info is kept unchanged."""
+    # Raises ValueError for invalid port
+    port = split_result.port
+    user_info, _, host_port = split_result.netloc.rpartition("@")
+    host_port = host_port.lower()
+    if port is None or port == DEFAULT_PORTS.get(split_result.scheme.lower()):
+        # Remove default or empty port, IPv6 addresses are enclosed in brackets
+        host_port = host_port[: host_port.rfind(":")] if host_port.rfind(":") > host_port.rfind("]") else host_port
+    return f"{user_info}@{host_port}" if user_info else host_port
+
+
+def canonicalize_link(link: str, config: Config) -> str:
+    """Returns canonical form of the web link, links with the same canonical form are checked by one request.
+
+    Fragment is removed, scheme and host are lower cased, default port is removed and percent-encoding
+    is normalized. Trailing slash of the path and query parameters are removed if configured.
+    Link is returned unchanged if it can not be parsed.
+    """
+    if not config.canonicalize_links:
+        return link
+    try:
+        split_result = urlsplit(link)
+        netloc = normalize_netloc(split_result)
+    except ValueError:
+        return link
+    scheme = split_result.scheme.lower()
+
+    path = normalize_percent_encoding(split_result.path, SAFE_PATH_CHARS)
+    if scheme in DEFAULT_PORTS:
+        if config.strip_trailing_slash:
+            path = path[:-1] if path.endswith("/") else path
+        # Empty path and `/` are equivalent for http
+        path = path or "/"
+
+    query = split_result.query
+    if query and config.strip_query_params_matcher.patterns:
+        query = "&".join(
+            param for param in query.split("&") if not config.strip_query_params_matcher.match(param.split("=", 1)[0])
+        )
+    query = normalize_percent_encoding(query, SAFE_QUERY_CHARS)
+
+    return urlunsplit((scheme, netloc, path, query, ""))
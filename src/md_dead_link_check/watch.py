@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.graph import LinkGraph
+from md_dead_link_check.helpers import StreamReporter
+from md_dead_link_check.link_checker import LinkStatus
+from md_dead_link_check.link_checker import Status
+from md_dead_link_check.link_checker import StatusInfo
+from md_dead_link_check.link_checker import async_check_links
+from md_dead_link_check.link_checker import collect_web_links
+from md_dead_link_check.link_checker import create_link_request
+from md_dead_link_check.link_checker import create_session
+from md_dead_link_check.link_checker import report_path_links
+from md_dead_link_check.link_checker import run_async
+from md_dead_link_check.preprocess import MarkdownInfo
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.preprocess import process_md_file
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+
+# Events of inotify, see `man 7 inotify`
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+# Header of inotify event: watch descriptor, mask, cookie and length of the name
+EVENT_HEADER = struct.Struct("iIII")
+
+# Time to collect all events of one save, editors often write a temporary file and rename it
+DEBOUNCE_DELAY = 0.1
+POLL_INTERVAL = 1.0
+
+
+class InotifyWatcher:
+    """Watcher of changes of markdown files in the directories by inotify, available on Linux.
+    New directories are watched automatically, watches of removed and moved out directories are removed
+    and the directories are reported in `removed_dirs`.
+    """
+
+    name = "inotify"
+
+    def __init__(self, root_dir: Path, dirs: Iterable[str]) -> None:
+        self.root_dir = root_dir
+        self.overflow = False
+        self.removed_dirs: set[str] = set()
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._dirs: dict[int, str] = {}
+        try:
+            for rel_dir in dirs:
+                self.add_dir(rel_dir)
+        except OSError:
+            self.close()
+            raise
+
+    def add_dir(self, rel_dir: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(self.root_dir / rel_dir), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                # Directory was removed
+                return
+            raise OSError(err, os.strerror(err), rel_dir)
+        self._dirs[wd] = rel_dir
+
+    def remove_tree(self, rel_dir: str) -> None:
+        """Stop watching the directory and its subdirectories.
+        Watches follow moved directories, so they would report changes with old paths.
+        """
+        prefix = f"{rel_dir}/"
+        for wd, watched_dir in list(self._dirs.items()):
+            if watched_dir == rel_dir or watched_dir.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+        self.removed_dirs.add(rel_dir)
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+    async def wait(self) -> set[str]:
+        """Wait for changes, returns relative paths of changed markdown files."""
+        loop = asyncio.get_running_loop()
+        while True:
+            ready = asyncio.Event()
+            loop.add_reader(self.fd, ready.set)
+            try:
+                await ready.wait()
+            finally:
+                loop.remove_reader(self.fd)
+            await asyncio.sleep(DEBOUNCE_DELAY)
+            changes = self.read_events()
+            if changes or self.overflow or self.removed_dirs:
+                return changes
+
+    def read_events(self) -> set[str]:
+        changes: set[str] = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changes
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    self.overflow = True
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                rel_dir = self._dirs.get(wd)
+                if rel_dir is None:
+                    continue
+                rel_path = name if rel_dir == "." else f"{rel_dir}/{name}"
+                if mask & IN_ISDIR:
+                    if mask & IN_MOVED_FROM:
+                        self.remove_tree(rel_path)
+                    elif mask & (IN_CREATE | IN_MOVED_TO):
+                        changes.update(self.add_tree(rel_path))
+                elif name.endswith(".md"):
+                    changes.add(rel_path)
+
+    def add_tree(self, rel_dir: str) -> set[str]:
+        """Watch new directory and its subdirectories, returns markdown files in them."""
+        md_files: set[str] = set()
+        for dir_path, dir_names, file_names in os.walk(self.root_dir / rel_dir):
+            rel_path = Path(dir_path).relative_to(self.root_dir).as_posix()
+            self.add_dir(rel_path)
+            dir_names[:] = [d for d in dir_names if d != ".git"]
+            md_files.update(f"{rel_path}/{f}" for f in file_names if f.endswith(".md"))
+        return md_files
+
+
+class PollingWatcher:
+    """Watcher of changes of markdown files by periodic scan of the directories.
+    Used if inotify is not available, new directories are not watched.
+    """
+
+    name = "polling"
+
+    def __init__(self, root_dir: Path, dirs: Iterable[str], interval: float = POLL_INTERVAL) -> None:
+        self.root_dir = root_dir
+        self.dirs = set(dirs)
+        self.interval = interval
+        self.overflow = False
+        # Files of removed directories are found by scans
+        self.removed_dirs: set[str] = set()
+        self._snapshot = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        snapshot: dict[str, tuple[int, int]] = {}
+        for rel_dir in self.dirs:
+            try:
+                entries = os.scandir(self.root_dir / rel_dir)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.name.endswith(".md") and entry.is_file():
+                        stat = entry.stat()
+                        rel_path = entry.name if rel_dir == "." else f"{rel_dir}/{entry.name}"
+                        snapshot[rel_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def close(self) -> None:
+        pass
+
+    async def wait(self) -> set[str]:
+        """Wait for changes, returns relative paths of changed markdown files."""
+        while True:
+            await asyncio.sleep(self.interval)
+            snapshot = self.scan()
+            changes = {p for p in snapshot.keys() | self._snapshot.keys() if snapshot.get(p) != self._snapshot.get(p)}
+            self._snapshot = snapshot
+            if changes:
+                return changes
+
+
+def create_watcher(root_dir: Path, dirs: Iterable[str]) -> InotifyWatcher | PollingWatcher:
+    """Returns inotify watcher if available, otherwise polling watcher."""
+    dirs = list(dirs)
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root_dir, dirs)
+        except (OSError, AttributeError):
+            # Limit of watches is reached or libc does not support inotify
+            pass
+    return PollingWatcher(root_dir, dirs)
+
+
+class WatchSession:
+    """State of the watch mode: parsed markdown files, graph of internal links and results of checks.
+
+    On changes only modified markdown files are parsed again, internal links are checked again
+    in changed files and in files with links to them, web links are checked only if they are new.
+    """
+
+    def __init__(
+        self,
+        md_data: dict[str, MarkdownInfo],
+        root_dir: Path,
+        files_in_repo: RepoFiles,
+        config: Config,
+        files: list[str],
+        untracked_files: bool,
+    ) -> None:
+        self.md_data = md_data
+        self.root_dir = root_dir
+        self.files_in_repo = files_in_repo
+        self.config = config
+        # Files to check web links
+        self.files = set(files)
+        self.untracked_files = untracked_files
+        self.graph = LinkGraph.from_md_data(md_data)
+        self.web_results: dict[str, LinkStatus] = {}
+        # Results of checks of internal and web links for each file
+        self.path_results: dict[str, list[StatusInfo]] = {}
+        self.web_file_results: dict[str, list[StatusInfo]] = {}
+
+    def apply_changes(self, changes: set[str]) -> tuple[set[str], set[str]]:
+        """Update parsed data of changed files.
+        Returns files to check internal links and files to check web links.
+        """
+        changed: set[str] = set()
+        for md_file in changes:
+            if (self.root_dir / md_file).is_file():
+                if md_file not in self.md_data and not self.untracked_files:
+                    # New files are checked only with `--untrack` argument
+                    continue
+                md_info = process_md_file(Path(md_file), self.root_dir)
+                self.md_data[md_file] = md_info
+                self.files_in_repo.add(md_file)
+                self.graph.update(md_file, md_info)
+                if self.untracked_files:
+                    self.files.add(md_file)
+            elif md_file in self.md_data:
+                del self.md_data[md_file]
+                self.files_in_repo.discard(md_file)
+                self.graph.update(md_file, None)
+                self.path_results.pop(md_file, None)
+                self.web_file_results.pop(md_file, None)
+            else:
+                continue
+            changed.add(md_file)
+
+        path_files = {f for f in changed if f in self.md_data}
+        for md_file in changed:
+            path_files.update(f for f in self.graph.linked_from(md_file) if f in self.md_data)
+        return path_files, path_files & changed & self.files
+
+    async def check(self, path_files: set[str], web_files: set[str], session: ClientSession) -> None:
+        for md_file in path_files:
+            self.path_results[md_file] = []
+
+        def report(x: StatusInfo) -> None:
+            self.path_results[x.link_info.location.as_posix()].append(x)
+
+        report_path_links(self.md_data, self.root_dir, self.config, self.files_in_repo, report, sorted(path_files))
+
+        if not self.config.check_web_links:
+            return
+        for md_file in web_files:
+            self.web_file_results[md_file] = []
+        web_links = collect_web_links(self.md_data, self.config, web_files)
+        new_links = [
+            create_link_request(link, occurrences, self.config)
+            for link, occurrences in web_links.items()
+            if link not in self.web_results
+        ]
+        if new_links:
+            for li_status in await async_check_links(new_links, self.config, session=session):
+                self.web_results[li_status.link] = li_status
+        for link, occurrences in web_links.items():
+            li_status = self.web_results[link]
+            for li in occurrences:
+                self.web_file_results[li.location.as_posix()].append(
+                    StatusInfo(li, li_status.status, li_status.msg, li_status.code, li_status.duration)
+                )
+
+    def get_results(self, md_file: str) -> list[StatusInfo]:
+        return sorted(self.path_results.get(md_file, []) + self.web_file_results.get(md_file, []))
+
+    def num_errors(self) -> int:
+        return sum(
+            x.status == Status.ERROR
+            for results in (*self.path_results.values(), *self.web_file_results.values())
+            for x in results
+        )
+
+    def print_results(self, md_files: Iterable[str], reporter: StreamReporter) -> None:
+        for md_file in sorted(md_files):
+            for x in self.get_results(md_file):
+                reporter.report(x)
+        reporter.finish()
+
+    async def run(self, print_warn: bool, print_all: bool, no_color: bool) -> None:
+        async with create_session(self.config) as session:
+            await self.check(set(self.md_data), set(self.md_data) & self.files, session)
+            self.print_results(self.md_data, StreamReporter(print_warn, print_all, no_color))
+
+            watcher = create_watcher(self.root_dir, self.files_in_repo.dirs)
+            print(f"Watching {len(self.md_data)} markdown files for changes ({watcher.name}), press Ctrl+C to stop")
+            try:
+                while True:
+                    changes = await watcher.wait()
+                    if watcher.overflow:
+                        # Some events were lost, check all files
+                        watcher.overflow = False
+                        changes |= set(self.md_data)
+                    if watcher.removed_dirs:
+                        prefixes = tuple(f"{rel_dir}/" for rel_dir in watcher.removed_dirs)
+                        watcher.removed_dirs.clear()
+                        changes |= {md_file for md_file in self.md_data if md_file.startswith(prefixes)}
+                    path_files, web_files = self.apply_changes(changes)
+                    if not path_files:
+                        continue
+                    print(f"\n[{time.strftime('%H:%M:%S')}] Changed: {', '.join(sorted(changes))}")
+                    await self.check(path_files, web_files, session)
+                    self.print_results(path_files, StreamReporter(print_warn, print_all, no_color))
+                    print(f"Total: {self.num_errors()} dead links in {len(self.md_data)} files")
+            finally:
+                watcher.close()
+
+
+def watch_links(
+    session: WatchSession,
+    print_warn: bool,
+    print_all: bool,
+    no_color: bool,
+) -> None:
+    """Check links and check them again on changes of markdown files until interrupted."""
+    with contextlib.suppress(KeyboardInterrupt):
+        run_async(session.run(print_warn, print_all, no_color), session.config)
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from md_dead_link_check.cache import CacheEntry
+from md_dead_link_check.cache import LinkCache
+from md_dead_link_check.cache import LinkIndex
+from md_dead_link_check.cache import ParseCache
+
+TTL = {0: 100, 1: 10, 2: 1}
+
+
+def test_get_put(tmp_path: Path):
+    entries = [
+        CacheEntry("https://a", 0, None, 200, 1.0, '"etag"', None),
+        CacheEntry("https://b", 2, "404: Not Found", 404, 2.0),
+    ]
+    with LinkCache(tmp_path / "cache.sqlite", TTL, 10) as cache:
+        cache.put_many(entries)
+
+    with LinkCache(tmp_path / "cache.sqlite", TTL, 10) as cache:
+        ret = cache.get_many(["https://a", "https://b", "https://c"])
+    assert ret == {e.link: e for e in entries}
+
+
+def test_is_fresh(tmp_path: Path):
+    with LinkCache(tmp_path / "cache.sqlite", TTL, 10) as cache:
+        assert cache.is_fresh(CacheEntry("https://a", 0, None, 200, 0.0), now=99.0)
+        assert not cache.is_fresh(CacheEntry("https://a", 0, None, 200, 0.0), now=100.0)
+        assert cache.is_fresh(CacheEntry("https://a", 2, None, 404, 0.0), now=0.5)
+        assert not cache.is_fresh(CacheEntry("https://a", 2, None, 404, 0.0), now=1.0)
+
+
+def test_eviction(tmp_path: Path):
+    with LinkCache(tmp_path / "cache.sqlite", TTL, 2) as cache:
+        cache.put_many(CacheEntry(f"https://{idx}", 0, None, 200, float(idx)) for idx in range(4))
+        ret = cache.get_many(f"https://{idx}" for idx in range(4))
+    assert list(ret) == ["https://2", "https://3"]
+
+
+def test_parse_cache(tmp_path: Path):
+    data = (["header", "header-1"], [("https://github.com", 3), ("b.md", 5)])
+    cache = ParseCache(tmp_path / "parse_cache", "1.0:1")
+    assert cache.get("blob:1") is None
+    cache.set("blob:1", data)
+    cache.save()
+
+    cache = ParseCache(tmp_path / "parse_cache", "1.0:1")
+    assert cache.get("blob:1") == data
+    assert cache.get("blob:2") is None
+
+    # Cache of other version is ignored
+    cache = ParseCache(tmp_path / "parse_cache", "1.0:2")
+    assert cache.get("blob:1") is None
+
+
+def test_parse_cache_corrupted(tmp_path: Path):
+    (tmp_path / "parse_cache").write_bytes(b"\x00\x01")
+    cache = ParseCache(tmp_path / "parse_cache", "1.0:1")
+    assert cache.get("blob:1") is None
+
+
+def test_link_index(tmp_path: Path):
+    a_data = (["header"], [("b.md#Header", 1), ("https://docs.example.com/x", 2), ("https://example.org", 3)])
+    b_data = (["header"], [("a.md", 1), ("#header", 2), ("https://example.com", 3)])
+    with LinkIndex(tmp_path / "index.sqlite", "1.0:1") as index:
+        index.put_many(
+            [
+                ("a.md", "blob:1", a_data, ["b.md", None, None]),
+                ("b.md", "blob:2", b_data, ["a.md", "b.md", None]),
+            ]
+        )
+
+    with LinkIndex(tmp_path / "index.sqlite", "1.0:1") as index:
+        assert index.get_keys() == {"a.md": "blob:1", "b.md": "blob:2"}
+        assert index.load() == {"a.md": a_data, "b.md": b_data}
+        assert index.links_to("b.md") == [("a.md", 1, "b.md#Header"), ("b.md", 2, "#header")]
+        assert index.links_to("b.md", "HEADER") == [("a.md", 1, "b.md#Header"), ("b.md", 2, "#header")]
+        assert index.links_to("b.md", "other") == []
+        assert index.links_to_domain("example.com") == [
+            ("a.md", 2, "https://docs.example.com/x"),
+            ("b.md", 3, "https://example.com"),
+        ]
+
+        index.remove_many(["a.md"])
+        assert index.links_to("b.md") == [("b.md", 2, "#header")]
+        assert index.get_keys() == {"b.md": "blob:2"}
+
+    # Index of other version is cleared
+    with LinkIndex(tmp_path / "index.sqlite", "1.0:2") as index:
+        assert index.get_keys() == {}
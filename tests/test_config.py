@@ -0,0 +1,112 @@
+from fnmatch import fnmatch
+from pathlib import Path
+
+import pytest
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.config import PatternMatcher
+from md_dead_link_check.config import get_config
+
+PATTERNS = [
+    "https://github.com/AlexanderDokuchaev/FAILED",
+    "https://github.com/AlexanderDokuchaev/*",
+    "*.md1",
+    "https://example.com/?",
+    "https://example.com/[ab]/*",
+    "tests/*",
+]
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        "https://github.com/AlexanderDokuchaev/FAILED",
+        "https://github.com/AlexanderDokuchaev/",
+        "https://github.com/AlexanderDokuchaev",
+        "https://github.com/Alexander",
+        "fail.md1",
+        "fail.md",
+        "https://example.com/1",
+        "https://example.com/12",
+        "https://example.com/a/b",
+        "https://example.com/c/b",
+        "tests/a.md",
+        "test/a.md",
+    ),
+)
+def test_pattern_matcher(value):
+    matcher = PatternMatcher(PATTERNS)
+    ref = any(fnmatch(value, p) for p in PATTERNS)
+    assert matcher.match(value) == ref
+    # Cached result
+    assert matcher.match(value) == ref
+
+
+def test_empty_pattern_matcher():
+    assert not PatternMatcher([]).match("https://github.com")
+    assert PatternMatcher(["*"]).match("https://github.com")
+
+
+def test_config_matchers(tmp_path: Path):
+    config_path = tmp_path / "pyproject.toml"
+    config_path.write_text('[tool.md_dead_link_check]\nexclude_links = ["https://github.com/*"]\n')
+    config = get_config(tmp_path, config_path)
+    assert config.exclude_links_matcher.match("https://github.com/AlexanderDokuchaev")
+    assert not config.exclude_files_matcher.match("README.md")
+    assert Config(exclude_files=["README.md"]).exclude_files_matcher.match("README.md")
+
+
+def test_config_matchers_follow_changed_patterns():
+    config = Config(exclude_links=["https://a.com/*"])
+    matcher = config.exclude_links_matcher
+    assert config.exclude_links_matcher is matcher
+    config.exclude_links.append("https://b.com/*")
+    assert config.exclude_links_matcher.match("https://b.com/x")
+    config.force_get_requests_for_links = ["https://c.com/*"]
+    assert config.force_get_requests_matcher.match("https://c.com/x")
+    config.strip_query_params = ["utm_*"]
+    assert config.strip_query_params_matcher.match("utm_source")
+
+
+def test_config_unexpected_key(tmp_path: Path):
+    config_path = tmp_path / "pyproject.toml"
+    config_path.write_text("[tool.md_dead_link_check]\nexclude_links_matcher = []\n")
+    with pytest.raises(ValueError, match="Unexpected config key `exclude_links_matcher`"):
+        get_config(tmp_path, config_path)
+
+
+@pytest.mark.parametrize(
+    "toml, msg",
+    (
+        ('throttle_domains = {"github.com" = {delay = 1}}', "Unexpected key `delay`"),
+        ('throttle_domains = {"github.com" = {rate = 0}}', "must be a positive number"),
+        ('throttle_domains = {"github.com" = 1}', "must be a table"),
+    ),
+)
+def test_config_throttle_domains(tmp_path: Path, toml, msg):
+    config_path = tmp_path / "pyproject.toml"
+    config_path.write_text(f"[tool.md_dead_link_check]\n{toml}\n")
+    with pytest.raises(ValueError, match=msg):
+        get_config(tmp_path, config_path)
+
+
+@pytest.mark.parametrize(
+    "toml, msg",
+    (
+        ("connector = {limits = 1}", "Unexpected key `limits` in `connector`"),
+        ("connector = {limit = -1}", "must be a non-negative number"),
+        ('connector = {resolver = "dns"}', "must be one of"),
+        ('event_loop = "trio"', "must be one of"),
+        ("retry_attempts = {http = 1}", "Unexpected key `http` in `retry_attempts`"),
+        ("retry_attempts = {timeout = -1}", "must be a non-negative integer"),
+        ("retry_backoff = -1", "must be a non-negative number"),
+        ("retry_budget = 1.5", "must be a non-negative integer"),
+        ("precheck_hosts = 1", "must be a boolean"),
+        ("strip_query_params = 'utm_*'", "must be a list of strings"),
+    ),
+)
+def test_config_connector(tmp_path: Path, toml, msg):
+    config_path = tmp_path / "pyproject.toml"
+    config_path.write_text(f"[tool.md_dead_link_check]\n{toml}\n")
+    with pytest.raises(ValueError, match=msg):
+        get_config(tmp_path, config_path)
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from git import Repo
+
+from md_dead_link_check.diff import RepoDiff
+from md_dead_link_check.diff import get_repo_diff
+from md_dead_link_check.diff import parse_changed_lines
+from md_dead_link_check.diff import parse_name_status
+from md_dead_link_check.diff import select_affected_links
+from md_dead_link_check.diff import unquote_path
+from md_dead_link_check.graph import LinkGraph
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.preprocess import process_md_file
+
+
+def test_parse_name_status():
+    diff = parse_name_status("M\0a.md\0A\0new.md\0D\0old.md\0R090\0from.md\0to.md\0")
+    assert diff.changed == {"a.md": set(), "new.md": None, "to.md": set()}
+    assert diff.removed == {"old.md", "from.md"}
+
+
+def test_parse_changed_lines():
+    output = "\n".join(
+        (
+            "diff --git a/a.md b/a.md",
+            "--- a/a.md",
+            "+++ b/a.md",
+            "@@ -1 +1 @@",
+            "-old",
+            "+new",
+            "@@ -5,0 +6,2 @@ header",
+            "+x",
+            "+y",
+            "@@ -10,2 +11,0 @@",
+            '+++ "b/\\321\\204.md"',
+            "@@ -3 +3 @@",
+            "+++ b/my doc.md\t",
+            "@@ -2 +2 @@",
+            "+++ /dev/null",
+            "@@ -1 +0,0 @@",
+        )
+    )
+    assert parse_changed_lines(output) == {"a.md": {1, 6, 7}, "ф.md": {3}, "my doc.md": {2}}
+
+
+def test_unquote_path():
+    assert unquote_path("a b.md") == "a b.md"
+    assert unquote_path('"a\\tb\\".md"') == 'a\tb".md'
+
+
+def test_select_affected_links(tmp_path: Path):
+    files = {
+        "a.md": "https://example.com/old\n[link](b.md)\nhttps://example.com/new\n",
+        "b.md": "# Header\n",
+        "c.md": "[link](b.md#header)\n[link](b.md)\n[link](docs/d.md)\n[link](docs)\nhttps://example.com/c\n",
+    }
+    for name, text in files.items():
+        (tmp_path / name).write_text(text)
+    md_data = {name: process_md_file(Path(name), tmp_path) for name in files}
+    graph = LinkGraph.from_md_data(md_data)
+    diff = RepoDiff(changed={"a.md": {3}, "b.md": {1}}, removed={"docs/d.md"})
+
+    affected = select_affected_links(diff, md_data, graph, RepoFiles(files))
+    assert {f: [li.link for li in links] for f, links in affected.items()} == {
+        "a.md": ["b.md", "https://example.com/new"],
+        "c.md": ["b.md#header", "docs/d.md", "docs"],
+    }
+
+
+def test_get_repo_diff(tmp_path: Path):
+    repo = Repo.init(tmp_path)
+    with repo.config_writer() as writer:
+        writer.set_value("user", "name", "test")
+        writer.set_value("user", "email", "test@example.com")
+    (tmp_path / "a.md").write_text("line 1\nline 2\n")
+    (tmp_path / "b.md").write_text("text\n")
+    (tmp_path / "my doc.md").write_text("text\n")
+    repo.index.add(["a.md", "b.md", "my doc.md"])
+    repo.index.commit("init")
+    base = repo.head.commit.hexsha
+
+    (tmp_path / "a.md").write_text("line 1\nchanged\n")
+    (tmp_path / "my doc.md").write_text("text\n[link](https://example.com)\n")
+    repo.index.remove(["b.md"], working_tree=True)
+    (tmp_path / "c.md").write_text("new\n")
+    repo.index.add(["a.md", "c.md", "my doc.md"])
+    repo.index.commit("change")
+    (tmp_path / "untracked.md").write_text("new\n")
+
+    diff = get_repo_diff(repo, base, untracked_files=True)
+    assert diff.changed == {"a.md": {2}, "my doc.md": {2}, "c.md": None, "untracked.md": None}
+    assert diff.removed == {"b.md"}
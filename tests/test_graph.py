@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pytest
+
+from md_dead_link_check.graph import LinkGraph
+from md_dead_link_check.graph import resolve_link_target
+from md_dead_link_check.preprocess import LinkInfo
+from md_dead_link_check.preprocess import MarkdownInfo
+
+
+@pytest.mark.parametrize(
+    "link, source, ref",
+    (
+        ("b.md", "docs/a.md", "docs/b.md"),
+        ("../b.md#header", "docs/a.md", "b.md"),
+        ("/b.md", "docs/a.md", "b.md"),
+        ("#header", "docs/a.md", "docs/a.md"),
+        ("./dir/", "a.md", "dir"),
+        ("https://example.com/b.md", "a.md", None),
+        ("mailto:user@example.com", "a.md", None),
+    ),
+)
+def test_resolve_link_target(link, source, ref):
+    assert resolve_link_target(link, source) == ref
+
+
+def md_info(path: str, links: list[str]) -> MarkdownInfo:
+    return MarkdownInfo(path=Path(path), links=[LinkInfo(link, Path(path), 1) for link in links])
+
+
+def test_link_graph():
+    graph = LinkGraph.from_md_data(
+        {
+            "a.md": md_info("a.md", ["b.md#header", "https://example.com"]),
+            "c.md": md_info("c.md", ["b.md"]),
+        }
+    )
+    assert graph.linked_from("b.md") == {"a.md", "c.md"}
+    assert graph.targets["a.md"] == {"b.md"}
+
+    graph.update("a.md", md_info("a.md", ["c.md"]))
+    assert graph.linked_from("b.md") == {"c.md"}
+    assert graph.linked_from("c.md") == {"a.md"}
+
+    graph.update("c.md", None)
+    assert graph.linked_from("b.md") == set()
+    assert "c.md" not in graph.targets
@@ -0,0 +1,78 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from md_dead_link_check.helpers import JsonlReporter
+from md_dead_link_check.helpers import JsonReporter
+from md_dead_link_check.helpers import SarifReporter
+from md_dead_link_check.helpers import StreamReporter
+from md_dead_link_check.link_checker import Status
+from md_dead_link_check.link_checker import StatusInfo
+from md_dead_link_check.preprocess import LinkInfo
+
+STATUSES = [
+    StatusInfo(LinkInfo("https://a.com", Path("a.md"), 1), Status.OK, code=200, duration=0.5),
+    StatusInfo(LinkInfo("https://b.com", Path("a.md"), 2), Status.ERROR, "404: Not Found", 404, 0.25),
+    StatusInfo(LinkInfo("https://c.com", Path("d/b.md"), 3), Status.WARNING, "408: Timeout", 408),
+]
+
+
+def report(reporter_cls, print_warn=False, print_all=False):
+    stream = io.StringIO()
+    reporter = reporter_cls(print_warn=print_warn, print_all=print_all, no_color=True, stream=stream)
+    for x in STATUSES:
+        reporter.report(x)
+    assert reporter.finish() == 1
+    return stream.getvalue()
+
+
+def test_stream_reporter():
+    lines = report(StreamReporter, print_all=True).splitlines()
+    assert lines[0].endswith("OK")
+    assert lines[1].endswith("Error: 404: Not Found")
+    assert lines[2].endswith("Warn: 408: Timeout")
+    assert lines[3].startswith("Found 1 dead link")
+
+
+@pytest.mark.parametrize(
+    "print_warn, print_all, ref",
+    (
+        (False, False, ["https://b.com"]),
+        (True, False, ["https://b.com", "https://c.com"]),
+        (False, True, ["https://a.com", "https://b.com", "https://c.com"]),
+    ),
+)
+def test_jsonl_reporter(print_warn, print_all, ref):
+    records = [json.loads(line) for line in report(JsonlReporter, print_warn, print_all).splitlines()]
+    assert [r["link"] for r in records] == ref
+    assert records[0 if not print_all else 1] == {
+        "file": "a.md",
+        "line": 2,
+        "link": "https://b.com",
+        "status": "error",
+        "message": "404: Not Found",
+        "code": 404,
+        "duration": 0.25,
+    }
+
+
+def test_json_reporter():
+    data = json.loads(report(JsonReporter, print_all=True))
+    assert [r["link"] for r in data["results"]] == ["https://a.com", "https://b.com", "https://c.com"]
+    assert data["summary"] == {"ok": 1, "warning": 1, "error": 1}
+
+    data = json.loads(report(JsonReporter, print_warn=False))
+    assert [r["link"] for r in data["results"]] == ["https://b.com"]
+
+
+def test_sarif_reporter():
+    data = json.loads(report(SarifReporter, print_all=True))
+    assert data["version"] == "2.1.0"
+    [run] = data["runs"]
+    assert run["tool"]["driver"]["rules"][0]["id"] == SarifReporter.RULE_ID
+    # OK results are not reported
+    assert [r["level"] for r in run["results"]] == ["error", "warning"]
+    location = run["results"][1]["locations"][0]["physicalLocation"]
+    assert location == {"artifactLocation": {"uri": "d/b.md"}, "region": {"startLine": 3}}
@@ -0,0 +1,124 @@
+import asyncio
+import socket
+
+import pytest
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.hosts import HostChecker
+from md_dead_link_check.hosts import create_resolver
+from md_dead_link_check.hosts import get_host_key
+from md_dead_link_check.hosts import probe_host
+from md_dead_link_check.link_checker import LinkRequest
+from md_dead_link_check.link_checker import Status
+from md_dead_link_check.link_checker import async_check_links
+from md_dead_link_check.retry import RetryPolicy
+
+
+@pytest.fixture
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize(
+    "link, ref",
+    (
+        ("https://example.com/a", ("example.com", 443)),
+        ("http://Example.com:8080/a", ("example.com", 8080)),
+        ("http://[::1]/", ("::1", 80)),
+        ("ftp://example.com/a", None),
+        ("https://example.com:port/a", None),
+    ),
+)
+def test_get_host_key(link, ref):
+    assert get_host_key(link, {}) == ref
+
+
+def test_get_host_key_proxy():
+    assert get_host_key("https://example.com/a", {"https": "http://proxy:3128"}) is None
+
+
+class LocalResolver(AbstractResolver):
+    """Resolves all hosts ending with `.test` to the loopback address."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls.append(host)
+        if not host.endswith(".test"):
+            msg = f"Unknown host {host}"
+            raise OSError(msg)
+        return [{"hostname": host, "host": "127.0.0.1", "port": port, "family": family, "proto": 0, "flags": 0}]
+
+    async def close(self):
+        pass
+
+
+async def run_probes(keys, resolver=None):
+    resolver = resolver or create_resolver(Config())
+    try:
+        return [await probe_host(host, port, 1, resolver) for host, port in keys]
+    finally:
+        await resolver.close()
+
+
+def test_probe_host(closed_port):
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        assert asyncio.run(run_probes([("127.0.0.1", server.getsockname()[1])])) == [None]
+    [error] = asyncio.run(run_probes([("127.0.0.1", closed_port)]))
+    assert error is not None and not error.timeout
+    assert error.msg.startswith(f"Cannot connect to 127.0.0.1:{closed_port}")
+    [error] = asyncio.run(run_probes([("host.invalid", 80)]))
+    assert error is not None and error.msg.startswith("Cannot resolve host host.invalid")
+
+
+def test_probe_host_uses_resolver(closed_port):
+    resolver = LocalResolver()
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        port = server.getsockname()[1]
+        errors = asyncio.run(run_probes([("docs.test", port), ("other.example", port)], resolver))
+    assert errors[0] is None
+    assert errors[1] is not None and errors[1].msg == "Cannot resolve host other.example: Unknown host other.example"
+    assert resolver.calls == ["docs.test", "other.example"]
+
+
+def test_create_resolver():
+    async def create():
+        resolver = create_resolver(Config(connector={"resolver": "threaded"}))
+        await resolver.close()
+        return resolver
+
+    assert isinstance(asyncio.run(create()), DefaultResolver)
+
+
+def test_host_checker(closed_port):
+    config = Config(retry_attempts={"connection": 0})
+    checker = HostChecker(config, RetryPolicy(config))
+    checker.proxies = {}
+    links = [f"http://127.0.0.1:{closed_port}/a", f"http://127.0.0.1:{closed_port}/b", "ftp://127.0.0.1/c"]
+    asyncio.run(checker.check(links))
+    assert list(checker.dead_hosts) == [("127.0.0.1", closed_port)]
+    assert checker.get_error(links[0]) is checker.get_error(links[1])
+    assert checker.get_error(links[2]) is None
+    assert checker.num_skipped_links == 2
+
+
+def test_async_check_links_precheck_hosts(closed_port, mocker, capsys):
+    mocker.patch("md_dead_link_check.hosts.get_host_key", side_effect=lambda link, _: ("127.0.0.1", closed_port))
+    process_link = mocker.patch("md_dead_link_check.link_checker.process_link")
+    config = Config(precheck_hosts=True, retry_attempts={"connection": 0})
+    links = [LinkRequest(f"http://127.0.0.1:{closed_port}/{x}") for x in "ab"]
+    ret = asyncio.run(async_check_links(links, config))
+    assert [x.link for x in ret] == [li.link for li in links]
+    assert all(x.status == Status.ERROR for x in ret)
+    assert ret[0].msg == ret[1].msg
+    process_link.assert_not_called()
+    assert "1 hosts are unreachable, 2 links to them were not requested" in capsys.readouterr().out
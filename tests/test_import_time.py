@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Cumulative time to import the CLI module, aiohttp alone takes about 250 ms
+IMPORT_TIME_BUDGET_US = 400_000
+HEAVY_MODULES = ("aiohttp", "git", "importlib.metadata")
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True, cwd=ROOT_DIR)
+
+
+def test_import_time():
+    # Best of several runs to reduce noise
+    times = []
+    for _ in range(3):
+        stderr = run_python("-X", "importtime", "-c", "import md_dead_link_check.__main__").stderr
+        line = next(x for x in stderr.splitlines() if x.endswith("| md_dead_link_check.__main__"))
+        times.append(int(line.split("|")[1]))
+    assert min(times) < IMPORT_TIME_BUDGET_US
+
+
+def test_heavy_modules_are_not_imported(tmp_path: Path):
+    config = tmp_path / "config.toml"
+    config.write_text("[tool.md_dead_link_check]\ncheck_web_links = false\n")
+    code = (
+        "import sys\n"
+        "from md_dead_link_check.__main__ import main\n"
+        f"sys.argv = ['md-dead-link-check', '--config', {config.as_posix()!r}, 'README.md']\n"
+        "main()\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    assert run_python("-c", code).stdout.splitlines()[-1] == ""
@@ -1,23 +1,39 @@
+import asyncio
+import time
 from dataclasses import dataclass
 from pathlib import Path
 
 import pytest
 from aiohttp import ClientResponseError
 from aiohttp import RequestInfo
+from aiohttp import web
 from aiohttp.client_exceptions import NonHttpUrlClientError
 from pytest_mock import MockerFixture
 from yarl import URL
 
 from md_dead_link_check.config import Config
-from md_dead_link_check.link_checker import LinkWithDelay
+from md_dead_link_check.link_checker import LinkRequest
+from md_dead_link_check.link_checker import LinkStatus
 from md_dead_link_check.link_checker import MarkdownInfo
 from md_dead_link_check.link_checker import Status
 from md_dead_link_check.link_checker import StatusInfo
+from md_dead_link_check.link_checker import TransferStats
 from md_dead_link_check.link_checker import check_all_links
 from md_dead_link_check.link_checker import check_web_links
-from md_dead_link_check.link_checker import generate_delays_for_one_domain_links
+from md_dead_link_check.link_checker import collect_web_links
+from md_dead_link_check.link_checker import create_link_request
+from md_dead_link_check.link_checker import create_session
+from md_dead_link_check.link_checker import report_all_links
+from md_dead_link_check.link_checker import request_link
+from md_dead_link_check.link_checker import run_async
+from md_dead_link_check.preprocess import LazyMarkdownData
 from md_dead_link_check.preprocess import LinkInfo
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.preprocess import find_all_markdowns
 from md_dead_link_check.preprocess import process_md_file
+from md_dead_link_check.preprocess import process_md_files
+from md_dead_link_check.stats import STATS
+from md_dead_link_check.throttle import Throttler
 
 ERROR_404 = [
     "https://github.com/AlexanderDokuchaev/FAILELINK",
@@ -30,14 +46,30 @@ CLIENT_CONNECTION_ERROR = [
 ]
 
 
+class MockContent:
+    def __init__(self):
+        self.total_bytes = 0
+
+
 class MockResponse:
     def __init__(self):
         self.status = 200
         self.reason = "OK"
+        self.method = "GET"
+        self.headers = {}
+        self.raw_headers = ()
+        self.content_length = None
+        self.content = MockContent()
 
     def raise_for_status(self):
         pass
 
+    def close(self):
+        pass
+
+    def release(self):
+        pass
+
 
 @pytest.fixture(autouse=True)
 def session_mock(mocker: MockerFixture) -> None:
@@ -68,7 +100,7 @@ def test_check_link(url, msg):
     assert r.msg == msg
 
 
-TEST_FILES = [Path("tests/test_md_files/fail.md"), Path("tests/test_md_files/a.md")]
+TEST_FILES = RepoFiles(["tests/test_md_files/fail.md", "tests/test_md_files/a.md"])
 
 
 def test_fails():
@@ -164,7 +196,7 @@ def test_fails():
 class PathLinkCase:
     name: str
     link: str
-    files_in_repo: list[Path]
+    files_in_repo: list[str]
     status: Status
     msg: str | None = None
 
@@ -178,56 +210,56 @@ class PathLinkCase:
         PathLinkCase(
             "prefix_of_filename",
             "dir/file.pn",
-            [Path("tests/test_md_files/dir/file.png")],
+            ["tests/test_md_files/dir/file.png"],
             Status.ERROR,
             "Path not found",
         ),
         PathLinkCase(
             "file_without_extension",
             "dir/file",
-            [Path("tests/test_md_files/dir/file.png")],
+            ["tests/test_md_files/dir/file.png"],
             Status.ERROR,
             "Path not found",
         ),
         PathLinkCase(
             "prefix_of_dirname",
             "di",
-            [Path("tests/test_md_files/dir/file.png")],
+            ["tests/test_md_files/dir/file.png"],
             Status.ERROR,
             "Path not found",
         ),
         PathLinkCase(
             "dir_prefix_of_other_dir",
             "dir",
-            [Path("tests/test_md_files/dirty/file.png")],
+            ["tests/test_md_files/dirty/file.png"],
             Status.ERROR,
             "Path not found",
         ),
         PathLinkCase(
             "exact_file",
             "dir/file.png",
-            [Path("tests/test_md_files/dir/file.png")],
+            ["tests/test_md_files/dir/file.png"],
             Status.OK,
             None,
         ),
         PathLinkCase(
             "exact_file_among_many",
             "dir/file.png",
-            [Path("tests/test_md_files/other/img.png"), Path("tests/test_md_files/dir/file.png")],
+            ["tests/test_md_files/other/img.png", "tests/test_md_files/dir/file.png"],
             Status.OK,
             None,
         ),
         PathLinkCase(
             "directory",
             "dir",
-            [Path("tests/test_md_files/dir/file.png")],
+            ["tests/test_md_files/dir/file.png"],
             Status.OK,
             None,
         ),
         PathLinkCase(
             "nested_directory",
             "a/b",
-            [Path("tests/test_md_files/a/b/c/file.png")],
+            ["tests/test_md_files/a/b/c/file.png"],
             Status.OK,
             None,
         ),
@@ -239,7 +271,7 @@ def test_path_link_prefix_not_silently_accepted(case: PathLinkCase):
     md_path = "tests/test_md_files/prefix.md"
     link_info = LinkInfo(case.link, Path(md_path), 1)
     md_data = {md_path: MarkdownInfo(Path(md_path), links=[link_info])}
-    ret = check_all_links(md_data, Config(check_web_links=False), root_dir, [md_path], case.files_in_repo)
+    ret = check_all_links(md_data, Config(check_web_links=False), root_dir, [md_path], RepoFiles(case.files_in_repo))
     assert ret == [StatusInfo(link_info, case.status, case.msg)]
 
 
@@ -334,23 +366,225 @@ def test_exclude_links(exclude_links):
     assert ret == ref
 
 
-def test_generate_delays_for_one_domain_links():
-    links = ["https://example.com/1", "https://example.com/2", "https://example.com/3", "https://example2.com/1"]
+def test_check_web_links_with_cache(tmp_path: Path, mocker: MockerFixture):
+    config = Config(cache_file=(tmp_path / "cache.sqlite").as_posix())
+    links = ["https://github.com/AlexanderDokuchaev", "https://github.com/AlexanderDokuchaev/FAILED"]
+    data = {"test.md": MarkdownInfo("test.md", links=[LinkInfo(link, Path("test.md"), 0) for link in links])}
+
+    ret = check_web_links(data, config, ["test.md"])
+    assert [r.status for r in ret] == [Status.OK, Status.ERROR]
 
-    config = Config(throttle_groups=2, throttle_delay=10)
-    ret = generate_delays_for_one_domain_links(links, config)
-    assert ret == [
-        LinkWithDelay("https://example.com/1", 0),
-        LinkWithDelay("https://example.com/2", 0),
-        LinkWithDelay("https://example.com/3", 10),
-        LinkWithDelay("https://example2.com/1", 0),
+    # Results are taken from the cache, requests are not sent
+    async def check_links_side_effect(links, config, on_done=None, cancellation=None):
+        ret = [LinkStatus(li.link, Status.ERROR, "404: Not Found", 404) for li in links]
+        for li_status in ret:
+            on_done(li_status)
+        return ret
+
+    async_check_links = mocker.patch(
+        "md_dead_link_check.link_checker.async_check_links", side_effect=check_links_side_effect
+    )
+    assert check_web_links(data, config, ["test.md"]) == ret
+    assert async_check_links.call_args[0][0] == []
+
+    # Expired error is checked again
+    config.cache_ttl_error = 0
+    check_web_links(data, config, ["test.md"])
+    assert async_check_links.call_args[0][0] == [LinkRequest("https://github.com/AlexanderDokuchaev/FAILED")]
+
+
+def test_check_web_links_canonical(mocker: MockerFixture):
+    links = ["https://example.com/a", "https://example.com/a#install", "HTTPS://Example.com/a", "https://example.com/b"]
+    data = {
+        "test.md": MarkdownInfo("test.md", links=[LinkInfo(link, Path("test.md"), i) for i, link in enumerate(links)])
+    }
+
+    async def check_links_side_effect(links, config, on_done=None, cancellation=None):
+        ret = [LinkStatus(li.link, Status.ERROR, "404: Not Found", 404) for li in links]
+        for li_status in ret:
+            on_done(li_status)
+        return ret
+
+    async_check_links = mocker.patch(
+        "md_dead_link_check.link_checker.async_check_links", side_effect=check_links_side_effect
+    )
+    ret = check_web_links(data, Config(), ["test.md"])
+    assert async_check_links.call_args[0][0] == [
+        LinkRequest("https://example.com/a"),
+        LinkRequest("https://example.com/b"),
     ]
+    # Results are reported for every occurrence with the original link
+    assert sorted(r.link_info.link for r in ret) == sorted(links)
 
-    config = Config(throttle_groups=1, throttle_delay=100, throttle_max_delay=1000)
-    ret = generate_delays_for_one_domain_links(links, config)
-    assert ret == [
-        LinkWithDelay("https://example.com/1", 0),
-        LinkWithDelay("https://example.com/2", 100),
-        LinkWithDelay("https://example.com/3", 200),
-        LinkWithDelay("https://example2.com/1", 0),
+
+def test_force_get_and_exclude_patterns_match_original_links():
+    config = Config(
+        force_get_requests_for_links=["https://ru.wikipedia.org/wiki/Ссылка_*", "https://Example.com/*"],
+        exclude_links=["https://Skip.org/*"],
+    )
+    links = [
+        "https://ru.wikipedia.org/wiki/Ссылка_1",
+        "https://Example.com/a",
+        "https://example.com/a#b",
+        "https://example.org/b",
+        "https://Skip.org/x",
+    ]
+    md_links = [LinkInfo(link, Path("test.md"), i) for i, link in enumerate(links)]
+    data = {"test.md": MarkdownInfo("test.md", links=md_links)}
+
+    web_links = collect_web_links(data, config, ["test.md"])
+    requests = [create_link_request(link, occurrences, config) for link, occurrences in web_links.items()]
+    assert requests == [
+        LinkRequest("https://ru.wikipedia.org/wiki/%D0%A1%D1%81%D1%8B%D0%BB%D0%BA%D0%B0_1", force_get=True),
+        LinkRequest("https://example.com/a", force_get=True),
+        LinkRequest("https://example.org/b"),
     ]
+
+
+def test_check_path_links_lazy():
+    root_dir = Path(__file__).parent.parent
+    md_files = find_all_markdowns([p.relative_to(root_dir).as_posix() for p in root_dir.glob("tests/**/*.md")])
+    files_in_repo = RepoFiles(p.as_posix() for p in md_files)
+    path = "tests/test_md_files/d/a.md"
+
+    md_data = process_md_files(md_files, root_dir)
+    ref = check_all_links(md_data, Config(check_web_links=False), root_dir, [], files_in_repo)
+    ref = [x for x in ref if x.link_info.location == Path(path)]
+
+    lazy_md_data = LazyMarkdownData(md_files, root_dir)
+    ret = check_all_links(lazy_md_data, Config(check_web_links=False), root_dir, [], files_in_repo, [path])
+    assert ret == ref
+    # Only files with links to fragments are parsed
+    assert lazy_md_data.parsed_files == [path, "tests/test_md_files/a.md"]
+
+
+def test_create_session():
+    async def run():
+        config = Config(validate_ssl=False, connector={"limit": 10, "limit_per_host": 2, "ttl_dns_cache": 60})
+        async with create_session(config) as session:
+            connector = session.connector
+            assert connector.limit == 10
+            assert connector.limit_per_host == 2
+
+    run_async(run(), Config())
+
+
+def test_retry_transient_errors(mocker: MockerFixture):
+    url = "https://example.com/flaky"
+    num_calls = 0
+
+    async def side_effect(url, *args, **kwargs):
+        nonlocal num_calls
+        num_calls += 1
+        if num_calls == 1:
+            raise ClientResponseError(
+                RequestInfo(url=url, method="GET", headers={}), (), status=503, message="Service Unavailable"
+            )
+        return MockResponse()
+
+    mocker.patch("aiohttp.ClientSession.head", side_effect=side_effect)
+    data = {"test.md": MarkdownInfo("test.md", links=[LinkInfo(url, Path("test.md"), 0)])}
+
+    [r] = check_web_links(data, Config(retry_backoff=0), ["test.md"])
+    assert r.status == Status.OK
+    assert num_calls == 2
+
+    num_calls = 0
+    [r] = check_web_links(data, Config(retry_attempts={"server_error": 0}), ["test.md"])
+    assert r.msg == "503: Service Unavailable"
+    assert num_calls == 1
+
+
+def test_report_all_links_streaming():
+    root_dir = Path(__file__).parent.parent
+    md_files = find_all_markdowns([p.relative_to(root_dir).as_posix() for p in root_dir.glob("tests/**/*.md")])
+    files_in_repo = RepoFiles(p.as_posix() for p in md_files)
+    md_data = process_md_files(md_files, root_dir)
+    files = list(md_data)
+
+    ref = check_all_links(md_data, Config(), root_dir, files, files_in_repo)
+    ret: list[StatusInfo] = []
+    report_all_links(md_data, Config(), root_dir, files, files_in_repo, ret.append)
+
+    def key(x: StatusInfo):
+        return (x.link_info.location, x.link_info.line_num, x.link_info.link)
+
+    assert sorted(ret, key=key) == sorted(ref, key=key)
+
+
+def test_fail_fast_cancels_web_checks(mocker: MockerFixture):
+    async def slow_side_effect(url, *args, **kwargs):
+        await asyncio.sleep(10)
+        return MockResponse()
+
+    mocker.patch("aiohttp.ClientSession.head", side_effect=slow_side_effect)
+    root_dir = Path(__file__).parent.parent
+    md_files = find_all_markdowns([p.relative_to(root_dir).as_posix() for p in root_dir.glob("tests/**/*.md")])
+    files_in_repo = RepoFiles(p.as_posix() for p in md_files)
+    md_data = process_md_files(md_files, root_dir)
+
+    start = time.monotonic()
+    ret = check_all_links(md_data, Config(), root_dir, list(md_data), files_in_repo, fail_fast=True)
+    assert time.monotonic() - start < 5
+    assert [x.status for x in ret].count(Status.ERROR) == 1
+    assert not any(x.link_info.link.startswith("https://") for x in ret)
+
+
+def test_get_fallback_does_not_download_body(mocker: MockerFixture):
+    mocker.stopall()
+    body_size = 10_000_000
+
+    async def handler(request: web.Request) -> web.Response:
+        if request.method == "HEAD":
+            return web.Response(status=404)
+        return web.Response(body=b"x" * body_size)
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/file", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        config = Config()
+        stats = TransferStats()
+        try:
+            async with create_session(config) as session:
+                link_status, _, _ = await request_link(
+                    LinkRequest(f"http://127.0.0.1:{port}/file"), session, config, Throttler(config), stats
+                )
+        finally:
+            await runner.cleanup()
+        return link_status, stats
+
+    link_status, stats = run_async(run(), Config())
+    assert link_status.status == Status.OK
+    assert stats.num_responses == 2
+    assert stats.body_bytes < body_size // 10
+    assert stats.skipped_bytes == body_size - stats.body_bytes
+
+
+@pytest.mark.parametrize("event_loop", ("uvloop", "auto"))
+def test_run_async_keeps_import_error_of_coroutine(event_loop, mocker: MockerFixture):
+    mocker.patch.dict("sys.modules", {"uvloop": mocker.Mock(run=asyncio.run)})
+
+    async def run():
+        msg = "error inside the coroutine"
+        raise ImportError(msg)
+
+    with pytest.raises(ImportError, match="error inside the coroutine"):
+        run_async(run(), Config(event_loop=event_loop))
+
+
+def test_web_requests_stats():
+    links = ["https://github.com/AlexanderDokuchaev", "https://example.com/"]
+    data = {"test.md": MarkdownInfo("test.md", links=[LinkInfo(link, Path("test.md"), 0) for link in links])}
+    STATS.enabled = True
+    try:
+        check_web_links(data, Config(), ["test.md"])
+        assert sorted(STATS.domains) == ["example.com", "github.com"]
+        assert len(STATS.slowest) == 2
+    finally:
+        STATS.enabled = False
+        STATS.reset()
@@ -0,0 +1,87 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from md_dead_link_check.listing import Backend
+from md_dead_link_check.listing import UnsupportedIndexError
+from md_dead_link_check.listing import find_git_root
+from md_dead_link_check.listing import get_root_dir
+from md_dead_link_check.listing import git_ls_files
+from md_dead_link_check.listing import list_files
+from md_dead_link_check.listing import parse_git_index
+from md_dead_link_check.listing import read_varint
+from md_dead_link_check.listing import scandir_files
+
+
+def git(root_dir: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=root_dir, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo_dir(tmp_path: Path) -> Path:
+    git(tmp_path, "init")
+    for rel_path in ("a.md", "docs/b.md", "docs/sub dir/c.md", "docs/ü.md", "img.png"):
+        (tmp_path / rel_path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel_path).write_text("text\n")
+    (tmp_path / ".gitignore").write_text("ignored.md\n")
+    git(tmp_path, "add", ".")
+    (tmp_path / "untracked.md").write_text("text\n")
+    (tmp_path / "ignored.md").write_text("text\n")
+    return tmp_path
+
+
+@pytest.mark.parametrize("index_version", ("2", "3", "4"))
+def test_parse_git_index(repo_dir: Path, index_version: str):
+    git(repo_dir, "update-index", "--index-version", index_version)
+    ref = git_ls_files(repo_dir, untracked_files=False)
+    assert "docs/ü.md" in ref
+    assert parse_git_index((repo_dir / ".git" / "index").read_bytes()) == ref
+
+
+def test_parse_git_index_unsupported():
+    with pytest.raises(UnsupportedIndexError):
+        parse_git_index(b"DIRC\x00\x00\x00\x05\x00\x00\x00\x00")
+
+
+@pytest.mark.parametrize(
+    "data, ref",
+    (
+        (b"\x05", 5),
+        (b"\x7f", 127),
+        (b"\x80\x00", 128),
+        (b"\x80\x7f", 255),
+    ),
+)
+def test_read_varint(data, ref):
+    assert read_varint(data, 0) == (ref, len(data))
+
+
+@pytest.mark.parametrize("backend", list(Backend))
+def test_list_files(repo_dir: Path, backend: Backend):
+    files = list_files(repo_dir, backend, untracked_files=True)
+    assert {"a.md", "docs/sub dir/c.md", "img.png", "untracked.md"} <= set(files)
+    assert not any(f.startswith(".git/") for f in files)
+    if backend != Backend.SCANDIR:
+        assert "ignored.md" not in files
+        assert "untracked.md" not in list_files(repo_dir, backend, untracked_files=False)
+
+
+def test_scandir_files(tmp_path: Path):
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "a.md").write_text("")
+    (tmp_path / "b.md").write_text("")
+    (tmp_path / "link").symlink_to(tmp_path / "docs")
+    assert scandir_files(tmp_path) == ["b.md", "docs/a.md", "link"]
+
+
+def test_get_root_dir(repo_dir: Path, tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch):
+    assert find_git_root(repo_dir / "docs") == repo_dir
+    monkeypatch.chdir(repo_dir / "docs")
+    assert get_root_dir(Backend.GIT) == repo_dir
+
+    no_git_dir = tmp_path_factory.mktemp("no_git")
+    monkeypatch.chdir(no_git_dir)
+    assert get_root_dir(Backend.SCANDIR) == no_git_dir
+    with pytest.raises(ValueError, match="Not a git repository"):
+        get_root_dir(Backend.GIT)
@@ -1,14 +1,28 @@
+import random
+import re
 from dataclasses import dataclass
 from pathlib import Path
 
 import pytest
+from git import Repo
+from pytest_mock import MockerFixture
 
+from md_dead_link_check.preprocess import RE_SUB
+from md_dead_link_check.preprocess import AnchorIndex
+from md_dead_link_check.preprocess import Engine
 from md_dead_link_check.preprocess import LinkInfo
+from md_dead_link_check.preprocess import RepoFiles
 from md_dead_link_check.preprocess import detect_headers
 from md_dead_link_check.preprocess import detect_links
 from md_dead_link_check.preprocess import find_all_markdowns
+from md_dead_link_check.preprocess import get_num_jobs
 from md_dead_link_check.preprocess import process_header_to_fragment
 from md_dead_link_check.preprocess import process_md_file
+from md_dead_link_check.preprocess import process_md_files
+from md_dead_link_check.preprocess import process_md_files_with_cache
+from md_dead_link_check.preprocess import process_md_files_with_index
+from md_dead_link_check.preprocess import scan_line
+from md_dead_link_check.stats import Stats
 
 
 def test_find_all_markdowns():
@@ -214,19 +228,28 @@ class HeaderTestCase:
     ids=str,
 )
 def test_detect_headers(param: HeaderTestCase):
-    fragments = []
+    fragments = AnchorIndex()
     detect_headers(param.line, fragments)
-    assert param.header == fragments[0]
+    assert param.header == next(iter(fragments))
 
 
 def test_same_header():
-    fragments = []
+    fragments = AnchorIndex()
     detect_headers("## Header", fragments)
     detect_headers("## Header", fragments)
     detect_headers("## Header", fragments)
     assert fragments == ["header", "header-1", "header-2"]
 
 
+def test_same_header_with_suffix():
+    fragments = AnchorIndex()
+    for line in ["## Header", "## Header 1", "## Header", '<a id="header-2"></a>', "## Header", "## Header"]:
+        detect_headers(line, fragments)
+    assert fragments == ["header", "header-1", "header-2", "header-2", "header-3", "header-4"]
+    assert "header-3" in fragments
+    assert "header-5" not in fragments
+
+
 @pytest.mark.parametrize(
     "line, ref",
     (
@@ -249,3 +272,196 @@ def test_same_header():
 def test_detect_links(line, ref):
     ret = detect_links(line)
     assert ret == ref
+
+
+def test_repo_files():
+    files = RepoFiles(["README.md", "docs/a/b.md", "docs/a/c/d.png", "docs/e.md"])
+    assert len(files) == 4
+    assert files.dirs == {".", "docs", "docs/a", "docs/a/c"}
+    for path in ["README.md", "docs/a/b.md", "docs", "docs/a", "docs/a/c", "."]:
+        assert path in files
+    for path in ["READM", "docs/a/b", "doc", "docs/a/c/d", "b.md"]:
+        assert path not in files
+
+
+def test_process_md_files_parallel(mocker: MockerFixture):
+    mocker.patch("md_dead_link_check.preprocess.PARALLEL_MIN_FILES", 0)
+    mocker.patch("md_dead_link_check.preprocess.PARALLEL_MIN_FILES_PER_JOB", 1)
+    root_dir = Path(__file__).parent.parent
+    md_files = find_all_markdowns([p.relative_to(root_dir).as_posix() for p in root_dir.glob("tests/**/*.md")])
+    ref = process_md_files(md_files, root_dir, jobs=1)
+    assert process_md_files(md_files, root_dir, jobs=2) == ref
+    assert list(ref) == [p.as_posix() for p in md_files]
+
+
+@pytest.mark.parametrize(
+    "jobs, num_files, ref",
+    (
+        (1, 10000, 1),
+        (4, 10, 1),
+        (4, 10000, 4),
+        (16, 400, 8),
+    ),
+)
+def test_get_num_jobs(jobs, num_files, ref):
+    assert get_num_jobs(jobs, num_files) == ref
+
+
+def test_process_md_files_with_cache(tmp_path: Path, mocker: MockerFixture):
+    root_dir = Path(__file__).parent.parent
+    repo = Repo(root_dir)
+    md_files = [Path("tests/test_md_files/a.md"), Path("tests/test_md_files/b.md")]
+    ref = process_md_files(md_files, root_dir)
+
+    assert process_md_files_with_cache(md_files, repo, 1, tmp_path / "parse_cache") == ref
+    process_md_file = mocker.patch("md_dead_link_check.preprocess.process_md_file")
+    assert process_md_files_with_cache(md_files, repo, 1, tmp_path / "parse_cache") == ref
+    process_md_file.assert_not_called()
+
+
+def test_process_md_files_with_cache_stats(tmp_path: Path, mocker: MockerFixture):
+    root_dir = Path(__file__).parent.parent
+    repo = Repo(root_dir)
+    md_files = [Path("tests/test_md_files/a.md"), Path("tests/test_md_files/b.md")]
+    stats = mocker.patch("md_dead_link_check.preprocess.STATS", Stats())
+    stats.enabled = True
+
+    process_md_files_with_cache(md_files[:1], repo, 1, tmp_path / "parse_cache")
+    num_lines = (root_dir / md_files[0]).read_text(encoding="utf8").count("\n")
+    assert (stats.num_files, stats.num_lines, stats.num_cached_files) == (1, num_lines, 0)
+    process_md_files_with_cache(md_files, repo, 1, tmp_path / "parse_cache")
+    assert stats.num_files == 2
+    assert stats.num_cached_files == 1
+
+
+def test_process_md_files_with_index(tmp_path: Path, mocker: MockerFixture):
+    root_dir = Path(__file__).parent.parent
+    repo = Repo(root_dir)
+    md_files = [Path("tests/test_md_files/a.md"), Path("tests/test_md_files/b.md")]
+    ref = process_md_files(md_files, root_dir)
+
+    assert process_md_files_with_index(md_files, repo, 1, tmp_path / "index.sqlite") == ref
+    process_md_file = mocker.patch("md_dead_link_check.preprocess.process_md_file")
+    assert process_md_files_with_index(md_files[:1], repo, 1, tmp_path / "index.sqlite") == {
+        "tests/test_md_files/a.md": ref["tests/test_md_files/a.md"]
+    }
+    process_md_file.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "path",
+    (
+        "tests/test_md_files/a.md",
+        "tests/test_md_files/b.md",
+        "tests/test_md_files/d/a.md",
+        "tests/test_md_files/fail.md",
+        "README.md",
+        "CHANGELOG.md",
+    ),
+)
+def test_scanner_same_as_regex_engine(path):
+    root_dir = Path(__file__).parent.parent
+    ref = process_md_file(Path(path), root_dir, Engine.REGEX)
+    assert process_md_file(Path(path), root_dir, Engine.SCANNER) == ref
+
+
+@pytest.mark.parametrize(
+    "line",
+    (
+        "https://a [x](b)",
+        "[![1](img)](link) [a](b)",
+        "<https://x> [a](<https://x>)",
+        "[a](https://x) https://x.",
+        "[https://a](https://b)",
+        '[a](b "c https://d")',
+        '<img src="https://x.png" alt="y">',
+        '<a href="https://x" id="Top">https://y</a>',
+        "[x [a](b)](c)",
+        "[<https://a>](b)",
+        "[![a](b) ![c](d)](e)",
+        "[![a](b)](<https://c>)",
+        "text `[a](b)` $x$ [c](d)",
+        '<a name="n" href="h">',
+        "### Header <http://link> \\<T\\>",
+        "- ## badge [a](b)",
+        '<a href="https://x.org/?a=1>2">',
+        "<a title='a > b' href=\"https://x\">",
+        '<img alt="a>b" src="https://x.png">',
+        '<a id="a" name="b">',
+        "[![a](https://x)](https://x)",
+        '[a](https://x/(b) "https://x/(b)")',
+        "https://x<a href='y'>",
+    ),
+)
+def test_scan_line_same_as_regex_engine(line):
+    assert_scan_line_same_as_regex_engine(line)
+
+
+def assert_scan_line_same_as_regex_engine(line: str) -> None:
+    fragments = AnchorIndex()
+    detect_headers(line, fragments)
+    ref_links = detect_links(re.sub(RE_SUB, "", line))
+
+    scanned_line = scan_line(line)
+    ids = [i.lower() for i in scanned_line.ids]
+    if scanned_line.header is not None:
+        ids.insert(0, process_header_to_fragment(scanned_line.header))
+    assert scanned_line.links == ref_links, line
+    assert ids == list(fragments), line
+
+
+@pytest.mark.parametrize(
+    "line, ref",
+    (
+        ('[a](https://x.com/a) <a href="https://x.com/a">b</a>', ["https://x.com/a", "https://x.com/a"]),
+        ('<a href="https://x.com/a">[a](https://x.com/a)</a>', ["https://x.com/a", "https://x.com/a"]),
+        ('[a](d.md#e "d.md#e") <a href="d.md#e">', ["d.md#e", "d.md#e"]),
+    ),
+)
+def test_scan_line_repeated_url_differs_from_regex_engine(line, ref):
+    # detect_links replaces targets of markdown links by a placeholder before it searches hrefs,
+    # so an href with the same url is reported as the placeholder. The scanner intentionally
+    # reports the real url, this case is excluded from comparisons with the regex engine.
+    assert scan_line(line).links == ref
+    assert detect_links(line) != ref
+
+
+# Lines use different urls in different fragments, detect_links corrupts hrefs that contain targets of other links,
+# see test_scan_line_repeated_url_differs_from_regex_engine
+FUZZ_URLS = ("https://x.org/a", "http://y.io/b?q=1&r=2", "https://x.org/(c)", "d.md#e", "#top", "../f.md", "g.png")
+FUZZ_FRAGMENTS = (
+    "text",
+    "end.",
+    "{url}",
+    "{url},",
+    "<{url}>",
+    "[text]({url})",
+    '[text]({url} "title {url}")',
+    "![alt]({url})",
+    "[![alt]({url})]({url})",
+    "[![a]({url}) ![b]({url})]({url})",
+    "[x [inner]({url})]({url})",
+    "[text](<{url}>)",
+    '<a href="{url}">text</a>',
+    "<a href='{url}?a=1>2'>",
+    '<a title="a > b" href="{url}">',
+    '<a id="Top" name="n">',
+    "<a name='x>y'>",
+    '<img src="{url}" alt="a>b">',
+    '<img alt="<{url}>" src="{url}">',
+    "`[a]({url})`",
+    "$x$",
+)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_scan_line_same_as_regex_engine_random(seed):
+    rng = random.Random(seed)
+    for _ in range(500):
+        num_fragments = rng.randint(1, 6)
+        fragments = rng.choices(FUZZ_FRAGMENTS, k=num_fragments)
+        urls = rng.sample(FUZZ_URLS, num_fragments)
+        line = " ".join(fragment.format(url=url) for fragment, url in zip(fragments, urls, strict=True))
+        if rng.random() < 0.2:
+            line = "## " + line
+        assert_scan_line_same_as_regex_engine(line)
@@ -0,0 +1,53 @@
+import pytest
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.retry import RetryPolicy
+from md_dead_link_check.retry import RetryReason
+from md_dead_link_check.retry import get_retry_reason
+
+
+@pytest.mark.parametrize(
+    "code, ref",
+    (
+        (404, None),
+        (429, RetryReason.TOO_MANY_REQUESTS),
+        (500, RetryReason.SERVER_ERROR),
+        (503, RetryReason.SERVER_ERROR),
+    ),
+)
+def test_get_retry_reason(code, ref):
+    assert get_retry_reason(code) == ref
+
+
+def test_retry_policy_delays():
+    policy = RetryPolicy(Config(retry_backoff=2, retry_max_backoff=5, retry_attempts={"timeout": 3, "connection": 0}))
+    assert 1 <= policy.get_delay(RetryReason.TIMEOUT, 1) <= 2
+    assert 2 <= policy.get_delay(RetryReason.TIMEOUT, 2) <= 4
+    assert 2.5 <= policy.get_delay(RetryReason.TIMEOUT, 3) <= 5
+    assert policy.get_delay(RetryReason.TIMEOUT, 4) is None
+    assert policy.get_delay(RetryReason.CONNECTION, 1) is None
+
+
+def test_retry_policy_retry_after():
+    policy = RetryPolicy(Config(retry_backoff=1, retry_max_backoff=10))
+    assert policy.get_delay(RetryReason.TOO_MANY_REQUESTS, 1, retry_after=7) == 7
+    assert policy.get_delay(RetryReason.TOO_MANY_REQUESTS, 1, retry_after=60) is None
+
+
+def test_retry_policy_budget(capsys):
+    policy = RetryPolicy(Config(retry_budget=2))
+    assert policy.get_delay(RetryReason.TIMEOUT, 1) is not None
+    assert policy.get_delay(RetryReason.CONNECTION, 1) is not None
+    assert policy.get_delay(RetryReason.SERVER_ERROR, 1) is None
+    policy.print_summary()
+    assert "Retry budget exhausted" in capsys.readouterr().out
+
+
+def test_retry_policy_budget_too_many_requests():
+    policy = RetryPolicy(Config(retry_budget=1, retry_attempts={"too_many_requests": 5}))
+    # Storm of 429 responses from one domain
+    for _ in range(100):
+        assert policy.get_delay(RetryReason.TOO_MANY_REQUESTS, 1) is not None
+    # Budget is left for a timeout of another domain
+    assert policy.get_delay(RetryReason.TIMEOUT, 1) is not None
+    assert policy.get_delay(RetryReason.TIMEOUT, 1) is None
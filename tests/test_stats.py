@@ -0,0 +1,54 @@
+import pytest
+
+from md_dead_link_check.stats import NUM_SLOWEST_LINKS
+from md_dead_link_check.stats import Stats
+from md_dead_link_check.stats import percentile
+
+
+@pytest.mark.parametrize(
+    "q, ref",
+    (
+        (0, 1),
+        (50, 5),
+        (95, 10),
+        (100, 10),
+    ),
+)
+def test_percentile(q, ref):
+    assert percentile([float(x) for x in range(1, 11)], q) == ref
+
+
+def test_disabled_stats():
+    stats = Stats()
+    with stats.phase("parse markdown"):
+        pass
+    assert stats.phases == {}
+
+
+def test_stats_report(capsys):
+    stats = Stats()
+    stats.enabled = True
+    with stats.phase("parse markdown"):
+        pass
+    for idx in range(100):
+        stats.add_request(f"https://example.com/{idx}", idx / 100)
+    stats.add_throttle_sleep("example.com", 1.5)
+
+    assert list(stats.phases) == ["parse markdown"]
+    assert len(stats.domains["example.com"].latencies) == 100
+    stats.print_report()
+    out = capsys.readouterr().out
+    assert "example.com" in out
+    slowest = out.split("Slowest links:\n")[1].splitlines()
+    assert len(slowest) == NUM_SLOWEST_LINKS
+    assert slowest[0].endswith("https://example.com/99")
+
+
+def test_stats_report_parse_markdown(capsys):
+    stats = Stats()
+    stats.enabled = True
+    stats.phases["parse markdown"] = 2.0
+    stats.num_files, stats.num_lines, stats.num_cached_files = 10, 1000, 5
+    stats.print_report()
+    out = capsys.readouterr().out
+    assert "(10 files parsed, 5 files/s, 500 lines/s, 5 files from cache)" in out
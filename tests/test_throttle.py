@@ -0,0 +1,164 @@
+import asyncio
+import heapq
+import itertools
+import math
+from collections.abc import Coroutine
+from typing import Any
+from typing import TypeVar
+
+import pytest
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.throttle import DomainLimiter
+from md_dead_link_check.throttle import ThrottleSettings
+from md_dead_link_check.throttle import get_throttle_settings
+from md_dead_link_check.throttle import parse_retry_after
+
+T = TypeVar("T")
+
+
+def test_get_throttle_settings():
+    config = Config(
+        throttle_groups=10,
+        throttle_delay=20,
+        throttle_max_delay=100,
+        throttle_domains={"*.github.com": {"rate": 2, "max_concurrency": 4}, "example.com": {"max_delay": 5}},
+    )
+    assert get_throttle_settings("other.com", config) == ThrottleSettings(0.5, 10, 2.0, 0, 100)
+    assert get_throttle_settings("api.github.com", config) == ThrottleSettings(2, 10, 8.0, 4, 100)
+    assert get_throttle_settings("example.com", config) == ThrottleSettings(0.5, 10, 2.0, 0, 5)
+
+    settings = get_throttle_settings("other.com", Config(throttle_delay=0))
+    assert math.isinf(settings.rate)
+
+
+@pytest.mark.parametrize(
+    "value, ref",
+    (
+        (None, None),
+        ("", None),
+        ("120", 120.0),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+        ("invalid", None),
+    ),
+)
+def test_parse_retry_after(value, ref):
+    assert parse_retry_after(value) == ref
+
+
+class FakeClock:
+    """Virtual time for limiters, timers are fired in order of their time when other tasks are blocked."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self._timers: list[tuple[float, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._timers, (self.now + delay, next(self._counter), future))
+        await future
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        async def main() -> T:
+            task = asyncio.ensure_future(coro)
+            while not task.done():
+                # Let all ready tasks run before advancing the time
+                for _ in range(10):
+                    await asyncio.sleep(0)
+                if self._timers:
+                    self.now, _, future = heapq.heappop(self._timers)
+                    future.set_result(None)
+            return task.result()
+
+        return asyncio.run(main())
+
+
+def create_limiter(clock: FakeClock, **kwargs) -> DomainLimiter:
+    settings = {"rate": 100, "burst": 1, "max_rate": 100, "max_concurrency": 0, "max_delay": 1000, **kwargs}
+    return DomainLimiter(ThrottleSettings(**settings), clock.now, clock=clock, sleep=clock.sleep)
+
+
+def test_domain_limiter_burst_and_rate():
+    clock = FakeClock()
+
+    async def run() -> list[float]:
+        limiter = create_limiter(clock, burst=2)
+        return await asyncio.gather(*[limiter.acquire() for _ in range(4)])
+
+    assert clock.run(run()) == pytest.approx([0, 0, 0.01, 0.02])
+
+
+def test_domain_limiter_max_delay():
+    clock = FakeClock()
+
+    async def run() -> list[float]:
+        limiter = create_limiter(clock, rate=0.1, max_rate=0.1, max_delay=5)
+        return [await limiter.acquire() for _ in range(3)]
+
+    assert clock.run(run()) == pytest.approx([0, 5, 5])
+
+
+def test_domain_limiter_waiting_requests_use_new_rate():
+    clock = FakeClock()
+
+    async def run() -> list[float]:
+        limiter = create_limiter(clock, rate=1, max_rate=100)
+        waiting = asyncio.gather(*[limiter.acquire() for _ in range(5)])
+        await asyncio.sleep(0)
+        # Rate is increased while requests are waiting
+        limiter.rate = 100
+        return await waiting
+
+    times = clock.run(run())
+    # Only the request that is already sleeping waits with the old rate
+    assert times[-1] == pytest.approx(1.03)
+
+
+def test_domain_limiter_recovers_after_429_burst():
+    clock = FakeClock()
+    num_links = 200
+    latency = 0.1
+
+    async def run() -> DomainLimiter:
+        limiter = create_limiter(clock, rate=10, burst=20, max_rate=10)
+
+        async def request() -> None:
+            while True:
+                sent_at = await limiter.acquire()
+                await clock.sleep(latency)
+                # Server rejects all requests of the first burst
+                status = 429 if sent_at < latency else 200
+                limiter.on_response(status, retry_after=1 if status == 429 else None, sent_at=sent_at)
+                if status != 429:
+                    return
+
+        await asyncio.gather(*[request() for _ in range(num_links)])
+        return limiter
+
+    limiter = clock.run(run())
+    # 429 responses of one burst decrease the rate once
+    assert limiter.num_429 == 20
+    assert limiter.min_rate == 5
+    assert limiter.rate == 10
+    # Pause of 1 second, then a few requests with the decreased rate and the rest with the configured rate
+    assert clock.now < 1 + num_links / 10 + 1
+
+
+def test_domain_limiter_adaptive_rate():
+    async def run() -> DomainLimiter:
+        limiter = DomainLimiter(ThrottleSettings(rate=10, burst=1, max_rate=20, max_concurrency=0, max_delay=10), 0)
+        limiter.on_response(429, retry_after=5)
+        assert limiter.rate == 5
+        assert limiter.paused_until > asyncio.get_running_loop().time() + 4
+        for _ in range(20):
+            limiter.on_response(200)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.rate == 20
+    assert limiter.min_rate == 5
+    assert limiter.num_429 == 1
@@ -0,0 +1,108 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from md_dead_link_check.config import Config
+from md_dead_link_check.link_checker import LinkStatus
+from md_dead_link_check.link_checker import Status
+from md_dead_link_check.preprocess import RepoFiles
+from md_dead_link_check.preprocess import process_md_file
+from md_dead_link_check.watch import InotifyWatcher
+from md_dead_link_check.watch import PollingWatcher
+from md_dead_link_check.watch import WatchSession
+
+
+def create_session(root_dir: Path, files: dict[str, str], config: Config) -> WatchSession:
+    for name, text in files.items():
+        (root_dir / name).write_text(text)
+    md_data = {name: process_md_file(Path(name), root_dir) for name in files}
+    return WatchSession(md_data, root_dir, RepoFiles(files), config, list(files), untracked_files=True)
+
+
+def test_watch_session_internal_links(tmp_path: Path):
+    session = create_session(
+        tmp_path,
+        {"a.md": "[link](b.md#header)\n", "b.md": "# Header\n", "c.md": "[link](c.md)\n"},
+        Config(check_web_links=False),
+    )
+    asyncio.run(session.check(set(session.md_data), set(), None))
+    assert session.num_errors() == 0
+
+    (tmp_path / "b.md").write_text("# Renamed\n")
+    path_files, web_files = session.apply_changes({"b.md"})
+    assert path_files == {"a.md", "b.md"}
+    assert web_files == {"b.md"}
+    asyncio.run(session.check(path_files, web_files, None))
+    assert [x.link_info.link for x in session.get_results("a.md") if x.status == Status.ERROR] == ["b.md#header"]
+
+    (tmp_path / "b.md").unlink()
+    path_files, _ = session.apply_changes({"b.md"})
+    assert path_files == {"a.md"}
+    assert "b.md" not in session.md_data
+    asyncio.run(session.check(path_files, set(), None))
+    assert session.get_results("a.md")[0].msg == "Path not found"
+    assert session.num_errors() == 1
+
+
+def test_watch_session_checks_only_new_web_links(tmp_path: Path, mocker: MockerFixture):
+    async def mock_check(links, config, on_done=None, cancellation=None, session=None):
+        return [LinkStatus(x.link, Status.OK) for x in links]
+
+    mock = mocker.patch("md_dead_link_check.watch.async_check_links", side_effect=mock_check)
+    session = create_session(tmp_path, {"a.md": "https://example.com/a\n"}, Config())
+    asyncio.run(session.check(set(session.md_data), {"a.md"}, None))
+    assert mock.call_count == 1
+
+    (tmp_path / "a.md").write_text("https://example.com/a\nhttps://example.com/b\n")
+    path_files, web_files = session.apply_changes({"a.md"})
+    asyncio.run(session.check(path_files, web_files, None))
+    assert [x.link for x in mock.call_args.args[0]] == ["https://example.com/b"]
+    assert len(session.get_results("a.md")) == 2
+
+
+async def wait_changes(watcher, path: Path) -> set[str]:
+    task = asyncio.create_task(watcher.wait())
+    await asyncio.sleep(0.05)
+    path.write_text("# Header\n")
+    return await asyncio.wait_for(task, 5)
+
+
+def test_polling_watcher(tmp_path: Path):
+    (tmp_path / "docs").mkdir()
+    watcher = PollingWatcher(tmp_path, [".", "docs"], interval=0.01)
+    assert asyncio.run(wait_changes(watcher, tmp_path / "docs" / "a.md")) == {"docs/a.md"}
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is available only on Linux")
+def test_inotify_watcher(tmp_path: Path):
+    watcher = InotifyWatcher(tmp_path, ["."])
+    try:
+        assert asyncio.run(wait_changes(watcher, tmp_path / "a.md")) == {"a.md"}
+        (tmp_path / "new" / "sub").mkdir(parents=True)
+        (tmp_path / "new" / "sub" / "b.md").write_text("")
+        assert watcher.read_events() == {"new/sub/b.md"}
+    finally:
+        watcher.close()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is available only on Linux")
+def test_inotify_watcher_moved_dir(tmp_path: Path):
+    root_dir = tmp_path / "repo"
+    (root_dir / "docs" / "sub").mkdir(parents=True)
+    watcher = InotifyWatcher(root_dir, [".", "docs", "docs/sub"])
+    try:
+        (root_dir / "docs").rename(root_dir / "guides")
+        assert watcher.read_events() == set()
+        assert watcher.removed_dirs == {"docs"}
+        (root_dir / "guides" / "sub" / "a.md").write_text("")
+        assert watcher.read_events() == {"guides/sub/a.md"}
+
+        (root_dir / "guides").rename(tmp_path / "outside")
+        (tmp_path / "outside" / "sub" / "b.md").write_text("")
+        assert watcher.read_events() == set()
+        assert watcher.removed_dirs == {"docs", "guides"}
+    finally:
+        watcher.close()